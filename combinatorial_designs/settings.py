@@ -46,8 +46,13 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'golf.middleware.RequestStatsMiddleware',
 )
 
+# Whether to log the statistics RequestStatsMiddleware records for each
+# request
+GOLF_REQUEST_STATS_LOG = False
+
 ROOT_URLCONF = 'combinatorial_designs.urls'
 
 WSGI_APPLICATION = 'combinatorial_designs.wsgi.application'
@@ -63,6 +68,22 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/1.6/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'golf',
+        # Enough for a cell of the index page for every instance
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Number of seconds to keep the cached parts of the index page for (they
+# are looked up by when they last changed, so stale entries are never used)
+GOLF_INDEX_CACHE_TIMEOUT = 24 * 60 * 60
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.6/topics/i18n/
 
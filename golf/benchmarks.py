@@ -0,0 +1,221 @@
+"""
+Benchmarks for the golf hot paths.
+
+Run them with "python manage.py benchmark", which uses a test database
+rather than the real one.  Each benchmark is run for a range of instance
+sizes (with generated valid solutions), and the results can be saved as JSON
+and compared against a saved baseline to spot slowdowns.
+"""
+import gc
+import platform
+import time
+
+import django
+from django.core.urlresolvers import reverse
+from django.test.client import Client
+
+import constructions
+import models
+
+# (num_groups, group_size) of the instances to benchmark with
+BENCHMARK_SIZES = [(4, 3), (5, 4), (8, 4), (10, 10), (13, 13), (20, 20), (30, 30)]
+
+# Largest numbers of groups of the instance grids to run construct_all() on
+CONSTRUCT_ALL_SIZES = [5, 10, 20]
+
+# Each benchmark is timed over at least this many seconds (but at least
+# once), and the best of REPEAT such timings taken
+MIN_TIME = 0.2
+REPEAT = 3
+
+# Ratio to the baseline time above which a benchmark counts as slower
+DEFAULT_THRESHOLD = 1.1
+
+
+def generate_solution(num_groups, group_size):
+    """
+    Generates a valid solution for the given instance, as nested lists of
+    rounds of groups of players, with as many rounds as are easy to come by.
+    Player (i, j) (position i, group j in the first round) is in group
+    (j + r * i) % num_groups in round r, and rounds which would repeat a
+    pair are skipped; when num_groups is prime, none are.
+    """
+    rounds = []
+    met = set()
+    for r in xrange(num_groups):
+        round = [[] for group in xrange(num_groups)]
+        for i in xrange(group_size):
+            for j in xrange(num_groups):
+                round[(j + r * i) % num_groups].append(i * num_groups + j)
+        pairs = set((p, q) for group in round for p in group for q in group if p < q)
+        if not pairs & met:
+            met |= pairs
+            rounds.append(round)
+    return rounds
+
+
+def time_function(function, min_time=MIN_TIME, repeat=REPEAT):
+    """
+    Times the function, returning the best time per call (in seconds) and the
+    number of calls per timing
+    """
+    number = 1
+    while True:
+        start = time.time()
+        for n in xrange(number):
+            function()
+        elapsed = time.time() - start
+        if elapsed >= min_time or number >= 1000000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    timings = [elapsed]
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for n in xrange(repeat - 1):
+            start = time.time()
+            for n in xrange(number):
+                function()
+            timings.append(time.time() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return min(timings) / number, number
+
+
+class SizeFixture(object):
+    """
+    The instance and a saved solution used to benchmark a given size
+    """
+
+    def __init__(self, num_groups, group_size):
+        self.array = generate_solution(num_groups, group_size)
+        self.string = models.GolfSolution.solution_array_to_string(self.array)
+        self.instance = models.GolfInstance.objects.get_or_create_many([(num_groups, group_size)])[0]
+        user = models.User.objects.create(name='Benchmark', email='benchmark@example.com')
+        citation = models.Citation.objects.create(citation='Benchmark solution')
+        submission_info = models.SubmissionInfo.objects.create(citation=citation, submitter=user)
+        self.solution = models.GolfSolution(
+            instance=self.instance,
+            num_rounds=len(self.array),
+            submission_info=submission_info,
+            solution_string=self.string,
+        )
+        self.solution.save()
+
+
+def benchmark_solution_string_to_array(fixture):
+    string = fixture.string
+    return lambda: models.GolfSolution.solution_string_to_array(string)
+
+
+def benchmark_solution_array_to_string(fixture):
+    array = fixture.array
+    return lambda: models.GolfSolution.solution_array_to_string(array)
+
+
+def benchmark_validate_solution_string(fixture):
+    solution = fixture.solution
+    string = fixture.string
+    return lambda: solution.validate_solution_string(string)
+
+
+def benchmark_solution_property(fixture):
+    solution = models.GolfSolution.objects.get(pk=fixture.solution.pk)
+
+    def run():
+        solution._solution = None
+        return solution.solution
+    return run
+
+
+def benchmark_lower_bound(fixture):
+    pk = fixture.instance.pk
+    return lambda: models.GolfInstance.objects.get(pk=pk).lower_bound
+
+
+# Benchmarks run for each size, taking a SizeFixture and returning the
+# function to time
+SIZE_BENCHMARKS = [
+    ('solution_string_to_array', benchmark_solution_string_to_array),
+    ('solution_array_to_string', benchmark_solution_array_to_string),
+    ('validate_solution_string', benchmark_validate_solution_string),
+    ('solution_property', benchmark_solution_property),
+    ('lower_bound', benchmark_lower_bound),
+]
+
+
+def benchmark_construct_all(max_num_groups):
+    constructors = constructions.Constructors()
+    constructors._instances = models.GolfInstance.objects.get_or_create_many(
+        (num_groups, group_size)
+        for num_groups in xrange(2, max_num_groups + 1)
+        for group_size in xrange(2, num_groups + 1)
+    )
+    return constructors.construct_all
+
+
+def benchmark_index_view():
+    client = Client()
+    url = reverse('golf:index')
+    return lambda: client.get(url)
+
+
+def run_benchmarks(sizes=BENCHMARK_SIZES, construct_all_sizes=CONSTRUCT_ALL_SIZES, names=None, min_time=MIN_TIME, repeat=REPEAT, log=None):
+    """
+    Runs the benchmarks (or just those whose names contain one of the given
+    names) in the current database, returning the results in a form suitable
+    for saving as JSON.  Each result is keyed by the benchmark name and
+    parameter, e.g. "validate_solution_string[20x20]".
+    If given, log is called with each result as it comes in.
+    """
+    results = {}
+
+    def wanted(name):
+        return names is None or any(wanted_name in name for wanted_name in names)
+
+    def run(name, parameter, function):
+        seconds, number = time_function(function, min_time, repeat)
+        key = '%s[%s]' % (name, parameter)
+        results[key] = {'seconds': seconds, 'number': number}
+        if log:
+            log(key, seconds)
+
+    for num_groups, group_size in sizes:
+        benchmarks = [(name, benchmark) for name, benchmark in SIZE_BENCHMARKS if wanted(name)]
+        if benchmarks:
+            fixture = SizeFixture(num_groups, group_size)
+            for name, benchmark in benchmarks:
+                run(name, '%dx%d' % (num_groups, group_size), benchmark(fixture))
+    if wanted('construct_all'):
+        for max_num_groups in construct_all_sizes:
+            run('construct_all', 'up to %dx%d' % (max_num_groups, max_num_groups), benchmark_construct_all(max_num_groups))
+    if wanted('index_view'):
+        run('index_view', '%d instances' % models.GolfInstance.objects.count(), benchmark_index_view())
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare_results(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares benchmark results with a baseline (both as returned by
+    run_benchmarks()).  Returns a list of (key, baseline seconds, seconds,
+    ratio, slower) for the benchmarks in both, slower being whether the
+    ratio of the time to the baseline's exceeds the threshold.
+    """
+    comparison = []
+    baseline_results = baseline['results']
+    for key in sorted(results['results']):
+        if key in baseline_results:
+            seconds = results['results'][key]['seconds']
+            baseline_seconds = baseline_results[key]['seconds']
+            ratio = seconds / baseline_seconds if baseline_seconds else float('inf')
+            comparison.append((key, baseline_seconds, seconds, ratio, ratio > threshold))
+    return comparison
@@ -0,0 +1,53 @@
+"""
+Keys for the cached parts of the index page: the list of instances making up
+the grid and the rendered cell for each instance.
+
+Rather than being invalidated when something changes (which only the process
+making the change would see), the keys include stamps read from the
+database: the IDs of the instances for the list, and when its bounds last
+changed for each cell.  So changes made by any process are seen, and the
+entries for old stamps are simply never looked up again.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache.utils import make_template_fragment_key
+
+# Default number of seconds to keep the cached parts of the index page for;
+# they are looked up by their stamps, so this can be long
+DEFAULT_INDEX_CACHE_TIMEOUT = 24 * 60 * 60
+
+INDEX_INSTANCES_KEY_PREFIX = 'golf.index.instances'
+
+# Name of the template fragment for each cell of the index page (as used in
+# golf/index.html), varying on the instance ID and its stamp
+INDEX_CELL_FRAGMENT = 'golf_index_cell'
+
+
+def index_cache_timeout():
+    return getattr(settings, 'GOLF_INDEX_CACHE_TIMEOUT', DEFAULT_INDEX_CACHE_TIMEOUT)
+
+
+def index_stamp(last_modified):
+    """
+    Returns the stamp for an index page cell whose instance's bounds last
+    changed at the given time (or None if it has no summary)
+    """
+    return last_modified.isoformat() if last_modified else ''
+
+
+def index_instances_key(instance_ids):
+    """
+    Returns the cache key of the list of instances on the index page, given
+    the IDs of the instances
+    """
+    digest = hashlib.md5(','.join(str(instance_id) for instance_id in sorted(instance_ids))).hexdigest()
+    return '%s.%s' % (INDEX_INSTANCES_KEY_PREFIX, digest)
+
+
+def index_cell_key(instance_id, stamp):
+    """
+    Returns the cache key of the index page cell for the given instance, with
+    the given stamp
+    """
+    return make_template_fragment_key(INDEX_CELL_FRAGMENT, [instance_id, stamp])
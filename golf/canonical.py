@@ -0,0 +1,473 @@
+from collections import deque
+
+
+def canonical_form(rounds):
+    """
+    Returns the canonical form of a solution given as nested lists of rounds
+    of groups of players: a unique representative of the solution's
+    equivalence class under relabelling of the players, reordering of the
+    rounds and reordering of the groups within each round.  The players of
+    the canonical form are numbered from 0, and its rounds, the groups within
+    each round and the players within each group are sorted.
+
+    Two solutions describe the same design if and only if their canonical
+    forms are equal.
+    """
+    return _Canonicaliser(rounds).canonical_form()
+
+
+def canonical_solution_string(string):
+    """
+    Returns the canonical form (see canonical_form()) of the given solution
+    string, as a solution string
+    """
+    rounds = [[[int(player) for player in group.split(',')] for group in round.split('|')] for round in string.split('\n')]
+    return '\n'.join(['|'.join([','.join([str(player) for player in group]) for group in round]) for round in canonical_form(rounds)])
+
+
+class _Leaf(object):
+    """
+    A leaf of the search tree: the sequence of individualised vertices
+    leading to it, the resulting labelling of the vertices and the key used
+    to compare it with other leaves
+    """
+    __slots__ = ('sequence', 'labels', 'key')
+
+    def __init__(self, sequence, labels, key):
+        self.sequence = sequence
+        self.labels = labels
+        self.key = key
+
+
+class _Canonicaliser(object):
+    """
+    Computes canonical forms by individualisation and refinement, in the
+    style of nauty.
+
+    The solution is treated as a coloured graph with a vertex for each
+    player, each group and each round, players joined to their groups and
+    groups to their rounds.  Equivalent solutions are exactly those whose
+    graphs are isomorphic by an isomorphism preserving the vertex kinds.
+
+    An ordered partition of the vertices (initially by kind, and players by
+    a vertex invariant) is refined to an equitable one, then a vertex is
+    individualised from a cell chosen as in nauty (see
+    _Partition.target_cell()) and the process repeated until the partition
+    is discrete (or only has cells of interchangeable players left), giving
+    a labelling of the vertices.  Each such partition in the search tree
+    gives a candidate labelling; the canonical form is the one with the
+    smallest key, a key being the refinement traces along the path followed
+    by the relabelled solution.  Since the refinement is label-invariant, so
+    is the set of keys, and hence so is the result.
+
+    The tree is pruned in three ways: subtrees whose traces are already
+    worse than the best leaf's are abandoned; leaves with the same key as an
+    earlier leaf give automorphisms, which (along with swapping
+    interchangeable players) let the search skip children in the same orbit
+    as a child already explored; and when such an automorphism is found the
+    search jumps back to where the two paths diverged, as the rest of that
+    subtree is equivalent to one already explored.
+    """
+
+    def __init__(self, rounds):
+        players = sorted(set(player for round in rounds for group in round for player in group))
+        self.num_players = len(players)
+        index = dict((player, n) for n, player in enumerate(players))
+        self.groups = []
+        self.round_groups = []
+        for round in rounds:
+            round_groups = []
+            for group in round:
+                round_groups.append(len(self.groups))
+                self.groups.append([index[player] for player in group])
+            self.round_groups.append(round_groups)
+        # Vertices are numbered players first, then groups, then rounds
+        num_groups = len(self.groups)
+        group_base = self.num_players
+        round_base = group_base + num_groups
+        self.num_vertices = round_base + len(rounds)
+        self.adjacency = [[] for _ in xrange(self.num_vertices)]
+        for group_index, group in enumerate(self.groups):
+            for player in group:
+                self.adjacency[player].append(group_base + group_index)
+                self.adjacency[group_base + group_index].append(player)
+        for round_index, round_groups in enumerate(self.round_groups):
+            for group_index in round_groups:
+                self.adjacency[round_base + round_index].append(group_base + group_index)
+                self.adjacency[group_base + group_index].append(round_base + round_index)
+        # Players in exactly the same groups are interchangeable
+        player_groups = {}
+        for group_index, group in enumerate(self.groups):
+            for player in group:
+                player_groups.setdefault(player, []).append(group_index)
+        twins = {}
+        for player, group_indexes in player_groups.iteritems():
+            twins.setdefault(tuple(group_indexes), []).append(player)
+        self.twins = [players for players in twins.itervalues() if len(players) > 1]
+        self.twin = range(self.num_vertices)
+        for players in self.twins:
+            for player in players:
+                self.twin[player] = players[0]
+        self.initial_cells = self.player_cells() + [range(group_base, round_base), range(round_base, self.num_vertices)]
+        self._count = [0] * self.num_vertices
+
+    def player_cells(self):
+        """
+        Returns the players partitioned (in a label-invariant order) by a
+        vertex invariant: how many other players they meet how many times,
+        and, if they do not meet everyone, the number of triangles they are
+        in in the graph of who meets whom.  Refinement alone cannot tell
+        players apart in this way, so for solutions with few symmetries this
+        saves exploring most of the players at the root of the search tree.
+        """
+        num_players = self.num_players
+        met = [0] * num_players
+        num_meetings = [0] * num_players
+        for group in self.groups:
+            mask = sum(1 << player for player in group)
+            for player in group:
+                met[player] |= mask
+                num_meetings[player] += len(group) - 1
+        for player in xrange(num_players):
+            met[player] &= ~(1 << player)
+        degrees = [bin(player_met).count('1') for player_met in met]
+        invariants = [[degree] for degree in degrees]
+        if degrees != num_meetings:
+            # Some pairs meet more than once
+            meetings = [dict() for player in xrange(num_players)]
+            for group in self.groups:
+                for player in group:
+                    player_meetings = meetings[player]
+                    for other in group:
+                        if other != player:
+                            player_meetings[other] = player_meetings.get(other, 0) + 1
+            for player, player_meetings in enumerate(meetings):
+                histogram = {}
+                for times in player_meetings.itervalues():
+                    histogram[times] = histogram.get(times, 0) + 1
+                invariants[player].append(tuple(sorted(histogram.items())))
+        if any(degree < num_players - 1 for degree in degrees):
+            for player, player_met in enumerate(met):
+                others = player_met
+                triangles = 0
+                while others:
+                    other_bit = others & -others
+                    triangles += bin(player_met & met[other_bit.bit_length() - 1]).count('1')
+                    others ^= other_bit
+                invariants[player].append(triangles)
+        cells = {}
+        for player, invariant in enumerate(invariants):
+            cells.setdefault(tuple(invariant), []).append(player)
+        return [cells[invariant] for invariant in sorted(cells)]
+
+    def canonical_form(self):
+        """
+        Runs the search and returns the canonical form of the solution
+        """
+        self.best = None
+        self.first = None
+        self.generators = []
+        partition = _Partition(self.initial_cells)
+        trace = self.refine(partition, sorted(set(partition.cell)))
+        self.search(partition, [], (trace,))
+        return self.relabel(self.best.labels)
+
+    def relabel(self, labels):
+        """
+        Returns the solution relabelled by the given vertex labelling, with
+        everything sorted
+        """
+        return sorted(
+            sorted(sorted(labels[player] for player in self.groups[group_index]) for group_index in round_groups)
+            for round_groups in self.round_groups
+        )
+
+    def refine(self, partition, splitters, bound=None):
+        """
+        Refines the partition in place until it is equitable, starting from
+        the given splitter cells.  Returns a trace of the refinement, which
+        depends only on the partition (not on how the vertices are numbered).
+
+        If a bound (another trace) is given, the refinement is abandoned as
+        soon as its trace is known to be greater than the bound, returning
+        None.
+        """
+        elements = partition.elements
+        position = partition.position
+        cell = partition.cell
+        size = partition.size
+        adjacency = self.adjacency
+        count = self._count
+        queue = deque(sorted(splitters))
+        queued = set(queue)
+        trace = []
+        while queue:
+            if bound is not None and len(trace) > len(bound):
+                # Longer than the bound with the bound as a prefix
+                return None
+            splitter = queue.popleft()
+            queued.discard(splitter)
+            touched = []
+            touched_cells = set()
+            for vertex in elements[splitter:splitter + size[splitter]]:
+                for neighbour in adjacency[vertex]:
+                    if not count[neighbour]:
+                        touched.append(neighbour)
+                        touched_cells.add(cell[neighbour])
+                    count[neighbour] += 1
+            for start in sorted(touched_cells):
+                cell_size = size[start]
+                if cell_size == 1:
+                    continue
+                members = elements[start:start + cell_size]
+                members.sort(key=count.__getitem__)
+                first_count = count[members[0]]
+                if first_count == count[members[-1]]:
+                    continue
+                # Split the cell into runs of equal counts, in count order
+                elements[start:start + cell_size] = members
+                new_cells = []
+                run_start = start
+                run_count = first_count
+                for offset, vertex in enumerate(members):
+                    position[vertex] = start + offset
+                    vertex_count = count[vertex]
+                    if vertex_count != run_count:
+                        new_cells.append((run_start, start + offset - run_start, run_count))
+                        run_start = start + offset
+                        run_count = vertex_count
+                    cell[vertex] = run_start
+                new_cells.append((run_start, start + cell_size - run_start, run_count))
+                entry = (splitter, start, tuple(new_cells))
+                trace.append(entry)
+                if bound is not None and len(trace) <= len(bound):
+                    bound_entry = bound[len(trace) - 1]
+                    if entry > bound_entry:
+                        for vertex in touched:
+                            count[vertex] = 0
+                        return None
+                    elif entry < bound_entry:
+                        bound = None
+                for new_start, new_size, _ in new_cells:
+                    size[new_start] = new_size
+                if start in queued:
+                    add = new_cells[1:]
+                else:
+                    largest = max(new_cells, key=lambda new_cell: new_cell[1])
+                    add = [new_cell for new_cell in new_cells if new_cell is not largest]
+                for new_start, _, _ in add:
+                    queue.append(new_start)
+                    queued.add(new_start)
+            for vertex in touched:
+                count[vertex] = 0
+        return tuple(trace)
+
+    def search(self, partition, sequence, traces):
+        """
+        Searches the subtree below the given (refined) partition, reached by
+        individualising the given sequence of vertices with the given
+        refinement traces.  Returns None, or the depth to jump back to if an
+        automorphism shows the rest of an ancestor's subtree is not needed.
+        """
+        depth = len(sequence)
+        bound = None
+        if self.best:
+            best_traces = self.best.key[0]
+            if traces > best_traces[:depth + 1]:
+                return None
+            if traces == best_traces[:depth + 1] and len(best_traces) > depth + 1:
+                # Children can be abandoned as soon as they fall behind the
+                # best leaf's path
+                bound = best_traces[depth + 1]
+        target = partition.target_cell(self.twin, self.adjacency)
+        if target is None:
+            return self.leaf(partition, sequence, traces)
+        explored = []
+        orbits = None
+        for vertex in sorted(partition.elements[target:target + partition.size[target]]):
+            if explored:
+                if orbits is None:
+                    orbits = self.twin_orbits(sequence)
+                    num_generators = 0
+                if num_generators != len(self.generators):
+                    self.add_orbits(orbits, self.generators[num_generators:], sequence)
+                    num_generators = len(self.generators)
+                root = orbits.find(vertex)
+                if any(orbits.find(other) == root for other in explored):
+                    continue
+            child = partition.copy()
+            child.individualise(vertex)
+            trace = self.refine(child, [child.cell[vertex]], bound)
+            explored.append(vertex)
+            if trace is None:
+                continue
+            jump = self.search(child, sequence + [vertex], traces + (trace,))
+            if jump is not None and jump < depth:
+                return jump
+        return None
+
+    def leaf(self, partition, sequence, traces):
+        """
+        Processes a leaf (discrete partition) of the search tree
+        """
+        labels = partition.position
+        leaf = _Leaf(sequence, labels, (traces, self.relabel(labels)))
+        if self.first is None:
+            self.first = self.best = leaf
+            return None
+        for other in (self.first, self.best):
+            if leaf.key == other.key:
+                # Mapping each vertex to the vertex with the same label in
+                # this leaf is an automorphism
+                vertex_with_label = [None] * self.num_vertices
+                for vertex, label in enumerate(labels):
+                    vertex_with_label[label] = vertex
+                self.generators.append([vertex_with_label[label] for label in other.labels])
+                common = 0
+                while common < len(sequence) and sequence[common] == other.sequence[common]:
+                    common += 1
+                return common
+        if leaf.key < self.best.key:
+            self.best = leaf
+        return None
+
+    def twin_orbits(self, sequence):
+        """
+        Returns the orbits (as a _UnionFind) of the automorphisms swapping
+        interchangeable players, other than those in the given sequence
+        """
+        orbits = _UnionFind(self.num_vertices)
+        fixed = set(sequence)
+        for players in self.twins:
+            players = [player for player in players if player not in fixed]
+            for player in players[1:]:
+                orbits.union(players[0], player)
+        return orbits
+
+    def add_orbits(self, orbits, generators, sequence):
+        """
+        Merges the orbits (a _UnionFind) with those of the given automorphisms
+        that fix all the vertices in the given sequence
+        """
+        for generator in generators:
+            if all(generator[vertex] == vertex for vertex in sequence):
+                for vertex, image in enumerate(generator):
+                    if vertex != image:
+                        orbits.union(vertex, image)
+
+
+class _Partition(object):
+    """
+    An ordered partition of the vertices 0..n-1: the vertices in order, the
+    position of each vertex in that order, the start position of the cell
+    each vertex is in, and the size of each cell (indexed by its start)
+    """
+    __slots__ = ('elements', 'position', 'cell', 'size')
+
+    def __init__(self, cells=None):
+        """
+        Makes the partition with the given cells (lists of vertices), in order
+        """
+        if cells is None:
+            return
+        self.elements = [vertex for cell in cells for vertex in cell]
+        num_vertices = len(self.elements)
+        self.position = [0] * num_vertices
+        self.cell = [0] * num_vertices
+        self.size = [0] * num_vertices
+        start = 0
+        for cell in cells:
+            if cell:
+                self.size[start] = len(cell)
+                for offset, vertex in enumerate(cell):
+                    self.position[vertex] = start + offset
+                    self.cell[vertex] = start
+                start += len(cell)
+
+    def copy(self):
+        partition = _Partition()
+        partition.elements = self.elements[:]
+        partition.position = self.position[:]
+        partition.cell = self.cell[:]
+        partition.size = self.size[:]
+        return partition
+
+    def target_cell(self, twin, adjacency):
+        """
+        Returns the start of the cell to split next, or None if there are
+        none left to split.  Cells of vertices with the same twin
+        (interchangeable vertices) need not be split, as the order of the
+        vertices in them makes no difference.
+
+        As in nauty, the cell chosen is the first of those whose vertices are
+        joined non-trivially (to some but not all of the vertices) to the
+        most other non-singleton cells, so individualising one of its
+        vertices splits as many cells as possible.  (Just taking the largest
+        cell would, for example, branch over hundreds of groups at each level
+        for a round robin, where a group's players split everything.)
+        """
+        elements = self.elements
+        size = self.size
+        cell = self.cell
+        candidates = []
+        start = 0
+        while start < len(size):
+            cell_size = size[start]
+            if cell_size > 1:
+                first = twin[elements[start]]
+                if any(twin[vertex] != first for vertex in elements[start + 1:start + cell_size]):
+                    candidates.append(start)
+            start += cell_size
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+        target = None
+        for start in candidates:
+            # The vertices of an equitable partition's cell all have the
+            # same number of neighbours in each cell, so one will do
+            counts = {}
+            for neighbour in adjacency[elements[start]]:
+                if size[cell[neighbour]] > 1:
+                    counts[cell[neighbour]] = counts.get(cell[neighbour], 0) + 1
+            joins = sum(1 for other, count in counts.iteritems() if count < size[other])
+            if target is None or joins > most_joins:
+                target, most_joins = start, joins
+        return target
+
+    def individualise(self, vertex):
+        """
+        Splits the given vertex off into a cell of its own, at the start of
+        the cell it is in
+        """
+        start = self.cell[vertex]
+        other = self.elements[start]
+        old_position = self.position[vertex]
+        self.elements[start], self.elements[old_position] = vertex, other
+        self.position[vertex], self.position[other] = start, old_position
+        self.size[start + 1] = self.size[start] - 1
+        self.size[start] = 1
+        for v in self.elements[start + 1:start + 1 + self.size[start + 1]]:
+            self.cell[v] = start + 1
+
+
+class _UnionFind(object):
+    """
+    Disjoint sets of the integers 0..n-1
+    """
+
+    def __init__(self, n):
+        self.parent = range(n)
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, x, y):
+        x = self.find(x)
+        y = self.find(y)
+        if x != y:
+            self.parent[max(x, y)] = min(x, y)
@@ -1,16 +1,135 @@
 import gettext
 _ = gettext.gettext
 
+from array import array
+import itertools
+import multiprocessing
+import sys
+import time
+try:
+    import resource
+except ImportError:
+    # Not available on all platforms; peak memory use is then not recorded
+    resource = None
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from dlx import ExactCover, SearchLimitReached
+from finite_fields import finite_field, prime_power
+from local_search import TabuSearch
 import models
+from schedule import Schedule
+from validation import validate_schedule
 
 MAX_NUM_GROUPS = 20
 MAX_GROUP_SIZE = 20
 
+# Number of instances constructed at a time by construct_all() (by a worker
+# process, if in parallel); the results for each chunk are saved together
+CONSTRUCT_CHUNK_SIZE = 16
+
+# Number of replaced constructions deleted per query by construct_all()
+DELETE_BATCH_SIZE = 500
+
+
+def _usage():
+    """
+    Returns the current wall time, the CPU time used by this process so far
+    and the peak memory use of this process so far (in KB, or 0 if unknown)
+    """
+    if resource is None:
+        return time.time(), time.clock(), 0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    peak_memory = usage.ru_maxrss
+    if sys.platform == 'darwin':
+        # Reported in bytes rather than KB
+        peak_memory //= 1024
+    return time.time(), usage.ru_utime + usage.ru_stime, peak_memory
+
+
+# Process-wide registry of the SubmissionInfo records used by constructors,
+# keyed by (constructor ID, version); see resolve_submission_infos()
+_submission_infos = {}
+
+
+def resolve_submission_infos(constructors, refresh=False):
+    """
+    Looks up (creating them if necessary) the SubmissionInfo records for any
+    of the given constructors not already in the registry (or all of them, if
+    refresh is True), using a few queries for all of them rather than several
+    per constructor.  Records in the registry which are no longer in the
+    database (e.g. because another process has cleared the constructions)
+    are looked up again.
+    """
+    if not refresh:
+        registered = [
+            (constructor.id, constructor.version) for constructor in constructors
+            if (constructor.id, constructor.version) in _submission_infos
+        ]
+        if registered:
+            existing = set(models.SubmissionInfo.objects.filter(
+                id__in=[_submission_infos[key].id for key in registered],
+            ).values_list('id', flat=True))
+            for key in registered:
+                if _submission_infos[key].id not in existing:
+                    del _submission_infos[key]
+        constructors = [constructor for constructor in constructors if (constructor.id, constructor.version) not in _submission_infos]
+    if not constructors:
+        return
+    users = dict(
+        ((user.name, user.email), user)
+        for user in models.User.objects.filter(email__in=set(constructor.email for constructor in constructors)).order_by('-id')
+    )
+    citations = dict(
+        (citation.citation, citation)
+        for citation in models.Citation.objects.filter(citation__in=set(constructor.description for constructor in constructors)).order_by('-id')
+    )
+    construction_infos = dict(
+        ((construction_info.id, construction_info.version), construction_info)
+        for construction_info in models.ConstructionInfo.objects.filter(id__in=set(constructor.id for constructor in constructors))
+    )
+    submission_infos = dict(
+        ((submission_info.citation_id, submission_info.submitter_id, submission_info.construction_id), submission_info)
+        for submission_info in models.SubmissionInfo.objects.filter(construction__in=construction_infos.values()).order_by('-id')
+    )
+    for constructor in constructors:
+        user = users.get((constructor.name, constructor.email))
+        if not user:
+            user = users[(constructor.name, constructor.email)] = models.User.objects.create(name=constructor.name, email=constructor.email)
+        citation = citations.get(constructor.description)
+        if not citation:
+            citation = citations[constructor.description] = models.Citation.objects.create(citation=constructor.description)
+        construction_info = construction_infos.get((constructor.id, constructor.version))
+        if not construction_info:
+            construction_info = construction_infos[(constructor.id, constructor.version)] = models.ConstructionInfo.objects.create(
+                id=constructor.id,
+                version=constructor.version,
+            )
+        submission_info = submission_infos.get((citation.id, user.id, construction_info.id))
+        if not submission_info:
+            submission_info = submission_infos[(citation.id, user.id, construction_info.id)] = models.SubmissionInfo.objects.create(
+                citation=citation,
+                submitter=user,
+                construction=construction_info,
+            )
+        _submission_infos[(constructor.id, constructor.version)] = submission_info
+
+
+def clear_submission_infos():
+    """
+    Empties the registry of SubmissionInfo records used by constructors
+    """
+    _submission_infos.clear()
+
+
 class Constructor(object):
     """
     Base class for constructors
     """
-    _submission_info = None
+    # Whether do_construct() needs the database, in which case the
+    # constructor is always run in the main process
+    uses_database = False
 
     @property
     def submission_info(self):
@@ -24,36 +143,138 @@ class Constructor(object):
             email: An email address for the author/maintainer
             description: A description
         """
-        if not self._submission_info:
-            user, _ = models.User.objects.get_or_create(
-                name=self.name,
-                email=self.email,
-            )
-            citation, _ = models.Citation.objects.get_or_create(citation=self.description)
-            construction_info, _ = models.ConstructionInfo.objects.get_or_create(id=self.id, version=self.version)
-            self._submission_info, _ = models.SubmissionInfo.objects.get_or_create(citation=citation, submitter=user, construction=construction_info)
-        return self._submission_info
+        key = (self.id, self.version)
+        if key not in _submission_infos:
+            resolve_submission_infos([self])
+        return _submission_infos[key]
 
     def clear_constructions(self):
         """
         Deletes all constructions by this constructor from the database
         """
-        self._submission_info = None
+        for key in [key for key in _submission_infos if key[0] == self.id]:
+            del _submission_infos[key]
         models.ConstructionInfo.objects.filter(id=self.id).delete()
 
+    def pending_instances(self, instances, incremental=False):
+        """
+        Prepares to run the constructor on the given instances, returning
+        those it needs to be run on, and the existing constructions to be
+        replaced once it has been (see replace_constructions()) or None if
+        they are to be kept.  Normally this is all of the instances and all
+        of the existing constructions.  In incremental mode, if this version
+        of the constructor has been run to completion before then only
+        instances added since then are returned and the existing
+        constructions are kept.
+        """
+        construction_info = models.ConstructionInfo.objects.filter(id=self.id).first()
+        if incremental and construction_info and construction_info.version == self.version and construction_info.max_instance_id:
+            return [instance for instance in instances if instance.id > construction_info.max_instance_id], None
+        if construction_info:
+            # Not run to completion until the constructions are replaced
+            models.ConstructionInfo.objects.filter(id=self.id).update(version=self.version, max_instance_id=0)
+        bound_ids = set(models.GolfBound.objects.filter(submission_info__construction=self.id).values_list('id', flat=True))
+        run_ids = set(models.ConstructionRun.objects.filter(construction=self.id).values_list('id', flat=True))
+        return instances, (bound_ids, run_ids)
+
+    def replace_constructions(self, replaced, kept_bound_ids, instances):
+        """
+        Finishes replacing the constructor's constructions once it has been
+        run on the given instances, deleting the replaced bounds and
+        ConstructionRuns (as returned by pending_instances()) other than the
+        bounds with the given IDs (solutions equivalent to new ones, which
+        are kept rather than saved again), and records the instances as
+        constructed
+        """
+        bound_ids, run_ids = replaced
+        for model, ids in ((models.GolfBound, sorted(bound_ids - kept_bound_ids)), (models.ConstructionRun, sorted(run_ids))):
+            for start in xrange(0, len(ids), DELETE_BATCH_SIZE):
+                model.objects.filter(id__in=ids[start:start + DELETE_BATCH_SIZE]).delete()
+        self.record_constructed(instances)
+
+    def record_constructed(self, instances):
+        """
+        Records that the constructor has been run on the given instances
+        """
+        if instances:
+            max_instance_id = max(instance.id for instance in instances)
+            models.ConstructionInfo.objects.filter(id=self.id, max_instance_id__lt=max_instance_id).update(max_instance_id=max_instance_id)
+
     def construct(self, instance):
         """
         Performs the construction for the given instance.  Returns the
         constructed item, or None if the construction is not applicable for
         this instance.
         Calls do_construct() to do the work, and then calls save() on the
-        result, if any.
+        result, if any.  Solutions equivalent to one already in the database
+        are not saved again; the existing solution is returned instead.
+        A ConstructionRun is saved recording the cost of the construction.
+        The constructor's SubmissionInfo is taken from the registry as is
+        (construct_all() checks the registry once per run).
+        """
+        bound, run = self.measured_construct(instance)
+        start = time.time()
+        saved = self.save_construction(bound)
+        self.record_runs([(bound, run)], time.time() - start)
+        return saved
+
+    def measured_construct(self, instance):
+        """
+        Calls do_construct() for the given instance, returning the result
+        and an unsaved ConstructionRun recording the time it took, the peak
+        memory use of the process and how much it raised that (see
+        record_runs())
         """
+        # Resolved first so that it doesn't count towards the construction
+        construction_id = self.submission_info.construction_id
+        start_time, start_cpu_time, start_peak_memory = _usage()
         bound = self.do_construct(instance)
-        if bound:
+        end_time, end_cpu_time, peak_memory = _usage()
+        run = models.ConstructionRun(
+            construction_id=construction_id,
+            instance_id=instance.id,
+            construct_time=end_time - start_time,
+            construct_cpu_time=end_cpu_time - start_cpu_time,
+            peak_memory=peak_memory,
+            peak_memory_growth=peak_memory - start_peak_memory,
+        )
+        return bound, run
+
+    def record_runs(self, results, save_time):
+        """
+        Saves the ConstructionRuns for the given (unsaved bound or None,
+        run) pairs, as returned by measured_construct(), given the time
+        taken to save the bounds together; this is divided equally between
+        the runs which produced a bound
+        """
+        produced = sum(1 for bound, run in results if bound)
+        for bound, run in results:
+            if bound:
+                run.produced = True
+                run.save_time += save_time / produced
+                if isinstance(bound, models.GolfSolution):
+                    run.output_size = len(bound.solution_string)
+        models.ConstructionRun.objects.bulk_create([run for bound, run in results])
+
+    def save_construction(self, bound):
+        """
+        Saves a bound returned by do_construct(), if any, and returns it (or
+        the existing equivalent solution)
+        """
+        if isinstance(bound, models.GolfSolution):
+            bound = bound.save_unless_duplicate()
+        elif bound:
             bound.save()
         return bound
 
+    def save_constructions(self, bounds):
+        """
+        Saves the bounds returned by do_construct() for several instances in
+        one go (see GolfBound.save_many()), skipping any Nones.  Returns the
+        saved bounds.
+        """
+        return models.GolfBound.save_many(bound for bound in bounds if bound)
+
 
 class TrivialSolutionConstructor(Constructor):
     """
@@ -67,10 +288,12 @@ class TrivialSolutionConstructor(Constructor):
     description = 'Trivial two-round construction'
 
     def do_construct(self, instance):
-        solution = [[[] for _ in xrange(instance.num_groups)] for _ in xrange(2)]
-        for p in xrange(instance.num_players):
-            solution[0][p / instance.group_size].append(p)
-            solution[1][p % instance.num_groups].append(p)
+        # Player p is in group p / group_size in the first round and group
+        # p % num_groups in the second
+        players = array(Schedule.TYPECODE, xrange(instance.num_players))
+        for g in xrange(instance.num_groups):
+            players.extend(xrange(g, instance.num_players, instance.num_groups))
+        solution = Schedule(2, instance.num_groups, instance.group_size, players)
         return models.GolfSolution(instance=instance, submission_info=self.submission_info, num_rounds=2, solution=solution)
 
 
@@ -90,6 +313,309 @@ class TrivialUpperBoundConstructor(Constructor):
         return models.GolfUpperBound(instance=instance, submission_info=self.submission_info, num_rounds=bound)
 
 
+class RoundRobinConstructor(Constructor):
+    """
+    Round robin constructor - constructs a solution in which every pair of
+    players meets, for any instance with groups of two, by the circle
+    method: one player stays put while the others rotate around a circle,
+    each paired with the player opposite
+    """
+    id = 'golf_round_robin_constructor'
+    version = 1
+    name = 'Round robin constructor'
+    email = 'warwick.harvey@gmail.com'
+    description = 'Round robin (circle method) construction for groups of two'
+
+    def do_construct(self, instance):
+        if instance.group_size != 2:
+            return None
+        n = instance.num_players - 1
+        players = array(Schedule.TYPECODE)
+        for r in xrange(n):
+            players.extend((r, n))
+            for i in xrange(1, instance.num_groups):
+                players.extend(((r + i) % n, (r - i) % n))
+        solution = Schedule(n, instance.num_groups, instance.group_size, players)
+        return models.GolfSolution(instance=instance, submission_info=self.submission_info, num_rounds=n, solution=solution)
+
+
+class AffineGeometryConstructor(Constructor):
+    """
+    Affine geometry constructor - constructs a solution in which every pair
+    of players meets, for instances with groups of size q, a prime power,
+    and q^(m-1) groups for some m >= 2.  The players are the points of the
+    affine space of dimension m over the field of order q, and each round is
+    a parallel class of lines: those in a given direction.  (Groups of two
+    are left to the round robin constructor.)
+    """
+    id = 'golf_affine_geometry_constructor'
+    version = 1
+    name = 'Affine geometry constructor'
+    email = 'warwick.harvey@gmail.com'
+    description = 'Parallel classes of lines of a finite affine space'
+
+    def do_construct(self, instance):
+        q = instance.group_size
+        n = instance.num_players
+        if q < 3 or prime_power(q) is None:
+            return None
+        m = 1
+        while q ** m < n:
+            m += 1
+        if m < 2 or q ** m != n:
+            return None
+        field = finite_field(q)
+        add, mul = field.add, field.mul
+        # Point p has coordinates the base-q digits of p
+        places = [q ** i for i in xrange(m)]
+        points = [[p // place % q for place in places] for p in xrange(n)]
+        players = array(Schedule.TYPECODE)
+        num_rounds = 0
+        for direction in points:
+            # One direction per line through the origin: the point on it
+            # whose last non-zero coordinate is 1
+            nonzero = [i for i, c in enumerate(direction) if c]
+            if not nonzero or direction[nonzero[-1]] != 1:
+                continue
+            num_rounds += 1
+            # Each line in the direction passes through one point with a
+            # zero in that coordinate
+            j = nonzero[-1]
+            steps = [[(i, mul[t][c]) for i, c in enumerate(direction) if c] for t in xrange(q)]
+            for base, point in enumerate(points):
+                if point[j]:
+                    continue
+                # Adding t * direction only changes the coordinates where the
+                # direction is non-zero
+                line = [base + sum((add[point[i]][c] - point[i]) * places[i] for i, c in step) for step in steps]
+                players.extend(sorted(line))
+        solution = Schedule(num_rounds, instance.num_groups, q, players)
+        return models.GolfSolution(instance=instance, submission_info=self.submission_info, num_rounds=num_rounds, solution=solution)
+
+
+class TransversalDesignConstructor(Constructor):
+    """
+    Transversal design constructor - constructs a q-round solution for
+    instances with q groups, a prime power, of size k, for 3 <= k < q.
+    Player (x, y), for x < k and y in the field of order q, is in group
+    y - a * x in the round for a, so players with different x meet exactly
+    once.  (With k = q the affine geometry constructor does one round
+    better, and with k = 2 the round robin constructor better still.)
+    """
+    id = 'golf_transversal_design_constructor'
+    version = 1
+    name = 'Transversal design constructor'
+    email = 'warwick.harvey@gmail.com'
+    description = 'Resolvable transversal design from the lines of an affine plane'
+
+    def do_construct(self, instance):
+        q = instance.num_groups
+        k = instance.group_size
+        if not 3 <= k < q or prime_power(q) is None:
+            return None
+        field = finite_field(q)
+        add, mul = field.add, field.mul
+        players = array(Schedule.TYPECODE)
+        for a in xrange(q):
+            for c in xrange(q):
+                # The points on the line y = a * x + c, player (x, y) being
+                # numbered y * k + x so that the first round is in order
+                players.extend(add[mul[a][x]][c] * k + x for x in xrange(k))
+        solution = Schedule(q, q, k, players)
+        return models.GolfSolution(instance=instance, submission_info=self.submission_info, num_rounds=q, solution=solution)
+
+
+def unmet_groups(meetings, players, group_size, limit):
+    """
+    Returns a list of all the groups of group_size of the given players in
+    which no pair of players has met (according to the given Meetings), each
+    as a sorted list, or None if there are more than limit of them
+    """
+    groups = []
+
+    def extend(group, candidates):
+        if len(group) == group_size:
+            if len(groups) == limit:
+                raise SearchLimitReached('More than %d groups' % limit)
+            groups.append(list(group))
+            return
+        while candidates:
+            # Give up on the group if there aren't enough candidates left
+            # to fill it
+            if len(group) + bin(candidates).count('1') < group_size:
+                return
+            low = candidates & -candidates
+            candidates ^= low
+            player = low.bit_length() - 1
+            group.append(player)
+            # Only players after this one, to list each group once
+            extend(group, candidates & meetings.unmet_mask(player))
+            group.pop()
+
+    mask = 0
+    for player in players:
+        mask |= 1 << player
+    try:
+        extend([], mask)
+    except SearchLimitReached:
+        return None
+    return groups
+
+
+class RoundExtensionConstructor(Constructor):
+    """
+    Round extension constructor - extends the best solution in the database
+    for an instance (other than its own) by one round, if the players can be
+    partitioned into groups in which no pair of players has already met.
+    This is an exact cover problem (covering each player exactly once with
+    such groups), solved with dancing links (see dlx).
+    """
+    id = 'golf_round_extension_constructor'
+    version = 1
+    name = 'Round extension constructor'
+    email = 'warwick.harvey@gmail.com'
+    description = 'Extension of the best known solution by one round, found by exact cover search'
+    uses_database = True
+
+    # Limits on the search for each instance: the number of candidate
+    # groups and the number of rows tried.  These keep what is constructed
+    # the same from run to run; a time limit (in seconds) can also be given,
+    # but then what is constructed depends on how fast the machine is.
+    MAX_CANDIDATE_GROUPS = 20000
+    MAX_SEARCH_NODES = 100000
+
+    def __init__(self, time_limit=None):
+        self.time_limit = time_limit
+
+    def find_round(self, schedule):
+        """
+        Returns a new round for the given schedule (as a list of groups)
+        in which no pair of players has met in the schedule, or None if
+        there isn't one or the search gives up
+        """
+        meetings = schedule.meetings
+        players = sorted(set(schedule.players))
+        group_size = schedule.group_size
+        # The players in a group are all connected by unmet pairs, so each
+        # connected component of unmet pairs must split into whole groups
+        remaining = 0
+        for player in players:
+            remaining |= 1 << player
+        while remaining:
+            component = frontier = remaining & -remaining
+            while frontier:
+                low = frontier & -frontier
+                frontier ^= low
+                new = meetings.unmet_mask(low.bit_length() - 1) & remaining & ~component
+                component |= new
+                frontier |= new
+            if bin(component).count('1') % group_size:
+                return None
+            remaining &= ~component
+        # Each player can be in at most C(unmet partners, group_size - 1)
+        # groups, so that many over group_size bounds the number of groups;
+        # don't bother listing them if the bound is too large
+        bound = 0
+        for player in players:
+            bound += _binomial(len(meetings.unmet_partners(player)), group_size - 1)
+        if bound / group_size > self.MAX_CANDIDATE_GROUPS:
+            return None
+        groups = unmet_groups(meetings, players, group_size, self.MAX_CANDIDATE_GROUPS)
+        if not groups:
+            return None
+        column = dict((player, n) for n, player in enumerate(players))
+        problem = ExactCover(len(players), [[column[player] for player in group] for group in groups])
+        try:
+            rows = problem.solve(max_nodes=self.MAX_SEARCH_NODES, time_limit=self.time_limit)
+        except SearchLimitReached:
+            return None
+        if rows is None:
+            return None
+        return sorted(groups[row] for row in rows)
+
+    def do_construct(self, instance):
+        # Not one of its own, which are only replaced at the end of a run
+        solution = models.GolfSolution.objects.filter(instance=instance).exclude(
+            submission_info__construction=self.id,
+        ).order_by('-num_rounds', 'id').first()
+        if solution is None:
+            return None
+        schedule = solution.schedule
+        new_round = self.find_round(schedule)
+        if new_round is None:
+            return None
+        players = array(Schedule.TYPECODE, schedule.players)
+        for group in new_round:
+            players.extend(group)
+        extended = Schedule(schedule.num_rounds + 1, schedule.num_groups, schedule.group_size, players)
+        return models.GolfSolution(instance=instance, submission_info=self.submission_info, num_rounds=extended.num_rounds, solution=extended)
+
+
+class LocalSearchConstructor(Constructor):
+    """
+    Local search constructor - searches for a solution with a given number
+    of rounds (by default one more than the best lower bound in the
+    database) by tabu search over swaps of players between groups within a
+    round (see local_search).  The search is seeded and limited in
+    iterations and time; it is only repeatable if the time limit is None,
+    as otherwise what it finds depends on how fast the machine is.  The
+    solution found, if any, is only returned once it has passed the usual
+    validation.
+
+    It is not one of the constructors run by Constructors, since searching
+    every instance would take far longer than the other constructions; run
+    it on chosen instances with the search_solution command.
+    """
+    id = 'golf_local_search_constructor'
+    version = 1
+    name = 'Local search constructor'
+    email = 'warwick.harvey@gmail.com'
+    description = 'Solution found by tabu search over swaps of players within rounds'
+
+    # Default limits on the search for each instance: the number of
+    # iterations and the time taken (in seconds)
+    MAX_ITERATIONS = 100000
+    TIME_LIMIT = 10.0
+
+    def __init__(self, num_rounds=None, seed=0, max_iterations=MAX_ITERATIONS, time_limit=TIME_LIMIT):
+        self.num_rounds = num_rounds
+        self.seed = seed
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit
+
+    @property
+    def uses_database(self):
+        # To find the best lower bound
+        return self.num_rounds is None
+
+    def do_construct(self, instance):
+        num_rounds = self.num_rounds
+        if num_rounds is None:
+            best = models.GolfLowerBound.objects.filter(instance=instance).order_by('-num_rounds').values_list('num_rounds', flat=True).first()
+            num_rounds = (best or 1) + 1
+        # Beyond the trivial upper bound there is certainly no solution
+        if num_rounds < 1 or num_rounds > (instance.num_players - 1) / (instance.group_size - 1):
+            return None
+        search = TabuSearch(num_rounds, instance.num_groups, instance.group_size, self.seed)
+        schedule = search.run(self.max_iterations, self.time_limit)
+        if schedule is None:
+            return None
+        try:
+            validate_schedule(schedule, num_rounds, instance.num_groups, instance.group_size)
+        except ValidationError:
+            return None
+        return models.GolfSolution(instance=instance, submission_info=self.submission_info, num_rounds=num_rounds, solution=schedule)
+
+
+def _binomial(n, k):
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    for i in xrange(min(k, n - k)):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
 class Constructors(object):
     """
     Class for managing and running Constructor instances
@@ -103,6 +629,11 @@ class Constructors(object):
             self._constructors = [
                 TrivialSolutionConstructor(),
                 TrivialUpperBoundConstructor(),
+                RoundRobinConstructor(),
+                AffineGeometryConstructor(),
+                TransversalDesignConstructor(),
+                # After the other constructors, so as to extend their solutions
+                RoundExtensionConstructor(),
             ]
         return self._constructors
 
@@ -112,22 +643,80 @@ class Constructors(object):
         Returns a list of all instances the constructors should be run on
         """
         if not self._instances:
-            self._instances = []
-            for num_groups in range(2, MAX_NUM_GROUPS + 1):
-                for group_size in range(2, min(num_groups, MAX_GROUP_SIZE) + 1):
-                    instance, _ = models.GolfInstance.objects.get_or_create(
-                        num_groups=num_groups,
-                        group_size=group_size,
-                    )
-                    self._instances.append(instance)
+            self._instances = models.GolfInstance.objects.get_or_create_many(
+                (num_groups, group_size)
+                for num_groups in xrange(2, MAX_NUM_GROUPS + 1)
+                for group_size in xrange(2, min(num_groups, MAX_GROUP_SIZE) + 1)
+            )
         return self._instances
 
-    def construct_all(self):
+    def construct_all(self, processes=1, incremental=False):
         """
-        Run all constructors on all instances
+        Run all constructors on all instances.
+        If processes is not 1, the constructions are done in parallel by a
+        pool of that many worker processes (or one per CPU if None), with
+        the results saved by this process in the same order as a serial run.
+        If incremental is True, constructors are only run on instances they
+        have not already been run on (see Constructor.pending_instances()).
         """
-        for constructor in self.constructors:
-            constructor.clear_constructions()
-            for instance in self.instances:
-                constructor.construct(instance)
+        all_instances = self.instances
+        pool = None
+        if processes != 1:
+            # Don't share the database connection with the workers
+            connection.close()
+            pool = multiprocessing.Pool(processes)
+        try:
+            pending = [(constructor,) + constructor.pending_instances(all_instances, incremental) for constructor in self.constructors]
+            # Done here (after any old versions' records are updated) so the
+            # workers don't need to, and so the constructions are recorded
+            # even if nothing comes of them.  Refreshed in case the records
+            # have been deleted behind the registry's back.
+            resolve_submission_infos(self.constructors, refresh=True)
+            for constructor, instances, replaced in pending:
+                # Each chunk is saved in its own transaction, so as not to
+                # hold the database for the whole run.  When only adding to
+                # the constructions, the instances are recorded as
+                # constructed along with each chunk (in order of ID), so that
+                # an incremental run after a failure neither skips nor
+                # repeats any of them.  Otherwise the old constructions are
+                # only deleted at the end, so there are always some.
+                instances = sorted(instances, key=lambda instance: instance.id)
+                chunks = [instances[start:start + CONSTRUCT_CHUNK_SIZE] for start in xrange(0, len(instances), CONSTRUCT_CHUNK_SIZE)]
+                kept_bound_ids = set()
+                if constructor.uses_database:
+                    results = ((chunk, None) for chunk in chunks)
+                else:
+                    imap = pool.imap if pool is not None else itertools.imap
+                    submission_infos = {(constructor.id, constructor.version): constructor.submission_info}
+                    results = itertools.izip(chunks, imap(_do_construct_chunk, [(constructor, chunk, submission_infos) for chunk in chunks]))
+                for chunk, chunk_results in results:
+                    with transaction.atomic():
+                        if chunk_results is None:
+                            saved = [constructor.construct(instance) for instance in chunk]
+                        else:
+                            start = time.time()
+                            saved = constructor.save_constructions(bound for bound, run in chunk_results)
+                            constructor.record_runs(chunk_results, time.time() - start)
+                        if replaced is None:
+                            constructor.record_constructed(chunk)
+                    kept_bound_ids.update(bound.id for bound in saved if bound)
+                if replaced is not None:
+                    with transaction.atomic():
+                        constructor.replace_constructions(replaced, kept_bound_ids, instances)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+
+def _do_construct_chunk(args):
+    """
+    Runs a constructor on a chunk of instances (possibly in a worker
+    process), without touching the database, returning the (unsaved) results
+    and ConstructionRuns, as for Constructor.measured_construct().
+    The constructor's SubmissionInfo is passed in for the registry.
+    """
+    constructor, instances, submission_infos = args
+    _submission_infos.update(submission_infos)
+    return [constructor.measured_construct(instance) for instance in instances]
 
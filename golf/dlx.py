@@ -0,0 +1,151 @@
+"""
+Exact cover search by Knuth's Algorithm X with dancing links.
+
+An exact cover problem has a set of columns (here numbered from 0) and a
+list of rows, each covering some of the columns; a solution is a set of rows
+covering every column exactly once.
+"""
+import time
+
+
+class SearchLimitReached(Exception):
+    """
+    Raised when a search gives up before finding a solution or showing that
+    there isn't one
+    """
+    pass
+
+
+class ExactCover(object):
+    """
+    An exact cover problem, represented as a sparse matrix of doubly-linked
+    nodes: one header node per column (plus the root), and one node per
+    (row, column) entry, linked left and right within its row and up and
+    down within its column.  The links are kept in flat lists indexed by
+    node number, and covering a column unlinks it and every row intersecting
+    it in O(entries) time, restored in reverse when backtracking.
+    """
+
+    def __init__(self, num_columns, rows):
+        self.num_columns = num_columns
+        self.num_rows = len(rows)
+        # Node 0 is the root and nodes 1..num_columns are the column headers
+        num_nodes = num_columns + 1
+        self.left = [n - 1 for n in xrange(num_nodes)]
+        self.right = [n + 1 for n in xrange(num_nodes)]
+        self.left[0] = num_columns
+        self.right[num_columns] = 0
+        self.up = range(num_nodes)
+        self.down = range(num_nodes)
+        self.column = range(num_nodes)
+        self.row = [-1] * num_nodes
+        # Number of rows remaining in each column, indexed by header node
+        self.size = [0] * num_nodes
+        for row_index, columns in enumerate(rows):
+            first = None
+            for c in columns:
+                header = c + 1
+                node = len(self.column)
+                self.column.append(header)
+                self.row.append(row_index)
+                # Append to the bottom of the column
+                self.up.append(self.up[header])
+                self.down.append(header)
+                self.down[self.up[header]] = node
+                self.up[header] = node
+                self.size[header] += 1
+                # Append to the end of the row
+                if first is None:
+                    first = node
+                    self.left.append(node)
+                    self.right.append(node)
+                else:
+                    self.left.append(self.left[first])
+                    self.right.append(first)
+                    self.right[self.left[first]] = node
+                    self.left[first] = node
+
+    def _cover(self, header):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def _uncover(self, header):
+        left, right, up, down, column, size = self.left, self.right, self.up, self.down, self.column, self.size
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def solve(self, max_nodes=None, time_limit=None):
+        """
+        Returns a list of the indices of the rows making up an exact cover,
+        or None if there isn't one.  Columns are chosen by the usual
+        heuristic of fewest remaining rows.  Raises SearchLimitReached if
+        more than max_nodes rows are tried, or the search takes more than
+        time_limit seconds, first.  The problem is left as it was.
+        """
+        deadline = time.time() + time_limit if time_limit is not None else None
+        self._nodes = 0
+        self._max_nodes = max_nodes
+        self._deadline = deadline
+        solution = []
+        if self._search(solution):
+            return [self.row[node] for node in solution]
+        return None
+
+    def _search(self, solution):
+        right, down, size = self.right, self.down, self.size
+        if right[0] == 0:
+            return True
+        header = None
+        c = right[0]
+        while c != 0:
+            if header is None or size[c] < size[header]:
+                header = c
+                if size[c] == 0:
+                    return False
+            c = right[c]
+        self._cover(header)
+        try:
+            r = down[header]
+            while r != header:
+                self._nodes += 1
+                if self._max_nodes is not None and self._nodes > self._max_nodes:
+                    raise SearchLimitReached('Exceeded %d search nodes' % self._max_nodes)
+                if self._deadline is not None and self._nodes % 1000 == 0 and time.time() > self._deadline:
+                    raise SearchLimitReached('Exceeded the time limit')
+                solution.append(r)
+                j = right[r]
+                while j != r:
+                    self._cover(self.column[j])
+                    j = right[j]
+                try:
+                    if self._search(solution):
+                        return True
+                finally:
+                    j = self.left[r]
+                    while j != r:
+                        self._uncover(self.column[j])
+                        j = self.left[j]
+                solution.pop()
+                r = down[r]
+            return False
+        finally:
+            self._uncover(header)
@@ -0,0 +1,114 @@
+"""
+Feed of the changes to the bounds in the database since a given cursor, so
+that copies of the database can be kept up to date incrementally.
+
+Each change is a dictionary: bounds added are reported with their details
+(and solution string, for solutions), and bounds deleted with the deleted
+bound's ID.  The changes come from the log of changes (GolfBoundChange), in
+the order they were made, and each has a cursor (the ID of its log entry) to
+ask for the changes after it.  Log entries are never deleted, so unlike
+bound IDs (which SQLite reuses after deletions) or timestamps (which several
+changes can share), no change after a cursor is missed.
+"""
+import json
+
+import models
+
+# Number of log entries read from the database at a time
+CHANGES_BATCH_SIZE = 500
+
+
+def parse_cursor(string):
+    """
+    Parses a cursor, as given with each change, into the ID of the last log
+    entry seen.  Raises ValueError if it is not valid.
+    """
+    try:
+        change_id = int(string)
+    except ValueError:
+        raise ValueError('Invalid cursor %r' % string)
+    if change_id < 0:
+        raise ValueError('Invalid cursor %r' % string)
+    return change_id
+
+
+def format_cursor(cursor):
+    return '%d' % cursor
+
+
+def _changes(entries):
+    """
+    Generates the changes for a batch of log entries.  An addition of a bound
+    which has since been deleted is left out, as the bound's details are
+    gone (and its deletion follows).
+    """
+    added_ids = [entry.bound_id for entry in entries if entry.change == models.GolfBoundChange.ADDED]
+    last_deletions = {}
+    for bound_id, entry_id in models.GolfBoundChange.objects.filter(
+        change=models.GolfBoundChange.DELETED,
+        bound_id__in=added_ids,
+        id__gt=entries[0].id,
+    ).values_list('bound_id', 'id'):
+        last_deletions[bound_id] = max(entry_id, last_deletions.get(bound_id, 0))
+    bounds = models.GolfBound.objects.select_related('instance', 'submission_info').in_bulk(added_ids)
+    solution_strings = dict(models.GolfSolution.objects.filter(id__in=[
+        entry.bound_id for entry in entries if entry.kind == 'solution'
+    ]).values_list('id', 'solution_string'))
+    for entry in entries:
+        if entry.change == models.GolfBoundChange.DELETED:
+            change = {
+                'change': 'deleted',
+                'id': entry.bound_id,
+                'instance_id': entry.instance_id,
+                'num_rounds': entry.num_rounds,
+                'timestamp': entry.timestamp.isoformat(),
+            }
+        else:
+            bound = bounds.get(entry.bound_id)
+            if bound is None or last_deletions.get(entry.bound_id, 0) > entry.id:
+                continue
+            change = {
+                'change': 'added',
+                'kind': entry.kind,
+                'id': bound.id,
+                'instance_id': bound.instance_id,
+                'num_groups': bound.instance.num_groups,
+                'group_size': bound.instance.group_size,
+                'num_rounds': bound.num_rounds,
+                'citation': bound.submission_info.citation_id,
+                'timestamp': bound.timestamp.isoformat(),
+            }
+            if entry.kind == 'solution':
+                change['solution_string'] = solution_strings[entry.bound_id]
+        change['cursor'] = format_cursor(entry.id)
+        yield change
+
+
+def bound_changes(since=None):
+    """
+    Generates the changes to the bounds made after the given cursor (or all
+    of them, if None), in order, reading them from the database as it goes
+    """
+    after_id = since or 0
+    while True:
+        entries = list(models.GolfBoundChange.objects.filter(id__gt=after_id).order_by('id')[:CHANGES_BATCH_SIZE])
+        if not entries:
+            return
+        for change in _changes(entries):
+            yield change
+        after_id = entries[-1].id
+
+
+def bound_changes_json_chunks(since=None):
+    """
+    Generates the changes since the given cursor as JSON, a piece at a time,
+    along with the cursor for the next changes
+    """
+    cursor = format_cursor(since) if since is not None else None
+    yield '{"changes": ['
+    separator = '\n'
+    for change in bound_changes(since):
+        yield separator + json.dumps(change, sort_keys=True)
+        separator = ',\n'
+        cursor = change['cursor']
+    yield '\n], "cursor": %s}\n' % json.dumps(cursor)
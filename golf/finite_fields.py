@@ -0,0 +1,133 @@
+"""
+Arithmetic in small finite fields, for the algebraic constructions.
+
+The elements of the field of order q = p^m are numbered 0..q-1, element a
+standing for the polynomial (over the integers mod p) whose coefficients are
+the base-p digits of a, least significant first; arithmetic is modulo a fixed
+irreducible polynomial of degree m.  So 0 and 1 are the field's zero and one,
+and for a prime order the arithmetic is just that of the integers mod p.
+"""
+
+# The fields made so far, by order
+_fields = {}
+
+
+def prime_power(n):
+    """
+    Returns (p, m) such that n = p^m for a prime p and m >= 1, or None if n
+    is not a prime power
+    """
+    if n < 2:
+        return None
+    p = 2
+    while p * p <= n and n % p:
+        p += 1
+    if n % p:
+        # n is prime
+        return n, 1
+    m = 0
+    while n % p == 0:
+        n //= p
+        m += 1
+    if n != 1:
+        return None
+    return p, m
+
+
+def _poly_mod(a, f, p):
+    """
+    Returns the remainder of polynomial a modulo monic polynomial f, over
+    the integers mod p (polynomials being lists of coefficients, least
+    significant first)
+    """
+    a = list(a)
+    degree = len(f) - 1
+    for i in xrange(len(a) - 1, degree - 1, -1):
+        c = a[i]
+        if c:
+            for j in xrange(degree + 1):
+                a[i - degree + j] = (a[i - degree + j] - c * f[j]) % p
+    return a[:degree]
+
+
+def _poly_mul(a, b, p):
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] = (result[i + j] + x * y) % p
+    return result
+
+
+def _monic_polys(degree, p):
+    """
+    Generates the monic polynomials of the given degree over the integers mod p
+    """
+    for n in xrange(p ** degree):
+        coefficients = []
+        for i in xrange(degree):
+            coefficients.append(n % p)
+            n //= p
+        yield coefficients + [1]
+
+
+def _irreducible_poly(p, m):
+    """
+    Returns the first monic irreducible polynomial of degree m over the
+    integers mod p, found by trial division
+    """
+    for f in _monic_polys(m, p):
+        if all(any(_poly_mod(f, g, p)) for degree in xrange(1, m // 2 + 1) for g in _monic_polys(degree, p)):
+            return f
+    raise ValueError('No irreducible polynomial of degree %d mod %d' % (m, p))
+
+
+class FiniteField(object):
+    """
+    The finite field of the given (prime power) order, with its addition,
+    negation, multiplication and inverse tables worked out in advance.  Use
+    finite_field() to get one, rather than making it again.
+    """
+
+    def __init__(self, order):
+        factors = prime_power(order)
+        if factors is None:
+            raise ValueError('%d is not a prime power' % order)
+        self.order = q = order
+        self.characteristic, self.degree = p, m = factors
+        digits = [self.to_poly(a) for a in xrange(q)]
+        self.add = [[self.from_poly([(x + y) % p for x, y in zip(digits[a], digits[b])]) for b in xrange(q)] for a in xrange(q)]
+        self.neg = [self.add[a].index(0) for a in xrange(q)]
+        if m == 1:
+            self.mul = [[a * b % p for b in xrange(q)] for a in xrange(q)]
+        else:
+            f = _irreducible_poly(p, m)
+            self.mul = [[self.from_poly(_poly_mod(_poly_mul(digits[a], digits[b], p), f, p)) for b in xrange(q)] for a in xrange(q)]
+        self.inv = [None] + [self.mul[a].index(1) for a in xrange(1, q)]
+
+    def to_poly(self, a):
+        """
+        Returns the coefficients of the polynomial element a stands for
+        """
+        coefficients = []
+        for i in xrange(self.degree):
+            coefficients.append(a % self.characteristic)
+            a //= self.characteristic
+        return coefficients
+
+    def from_poly(self, coefficients):
+        a = 0
+        for c in reversed(coefficients):
+            a = a * self.characteristic + c
+        return a
+
+
+def finite_field(order):
+    """
+    Returns the FiniteField of the given order, making it the first time.
+    Raises ValueError if the order is not a prime power.
+    """
+    field = _fields.get(order)
+    if field is None:
+        field = _fields[order] = FiniteField(order)
+    return field
@@ -0,0 +1,204 @@
+"""
+Tabu search for golf schedules.
+
+The search works on complete schedules with the right number of rounds,
+groups and group size (players 0..n-1), in which pairs of players may meet
+more than once, and tries to remove these conflicts by swapping players
+between groups within a round.  The first round is fixed (players in order),
+since any schedule can be relabelled to have it.
+"""
+import random
+import time
+
+from schedule import Schedule
+
+
+class TabuSearch(object):
+    """
+    Tabu search for a schedule with the given numbers of rounds, groups and
+    group size.
+
+    The number of times each pair of players meets is kept in a table (a
+    flat list indexed by p * n + q), so the change in the number of
+    conflicts (the sum over pairs of the number of meetings after the first)
+    caused by swapping two players in a round is found in O(group size), and
+    the table is updated in O(group size) when a swap is made.
+
+    Each iteration makes the best swap of a player meeting someone in its
+    group more than once with a player in another group of the same round,
+    other than swaps made tabu by recently moving either player in that
+    round (unless the swap gives the best schedule so far).  If there has
+    been no improvement for a while, the schedule is perturbed with random
+    swaps.  Given the same seed and iteration limit, and no time limit, the
+    search is repeatable; with a time limit, what it finds depends on how
+    fast the machine is.
+    """
+
+    # Number of iterations for which a player moved in a round can't be
+    # moved again in that round is this plus a random number up to it
+    TABU_TENURE = 3
+    # Number of iterations without improvement before perturbing, and the
+    # number of random swaps to make when perturbing
+    STAGNATION_ITERATIONS = 200
+    PERTURBATION_SWAPS = 3
+
+    def __init__(self, num_rounds, num_groups, group_size, seed=None):
+        self.num_rounds = num_rounds
+        self.num_groups = num_groups
+        self.group_size = group_size
+        self.num_players = n = num_groups * group_size
+        self.rng = random.Random(seed)
+        self.counts = [0] * (n * n)
+        self.num_conflicts = 0
+        self.groups = []
+        self.group_of = []
+        for r in xrange(num_rounds):
+            players = range(n)
+            if r > 0:
+                self.rng.shuffle(players)
+            round = [players[start:start + group_size] for start in xrange(0, n, group_size)]
+            self.groups.append(round)
+            group_of = [0] * n
+            for g, group in enumerate(round):
+                for p in group:
+                    group_of[p] = g
+                for i in group:
+                    for j in group:
+                        if i < j:
+                            self._meet(i, j, 1)
+            self.group_of.append(group_of)
+        self.tabu_until = [[0] * n for r in xrange(num_rounds)]
+
+    def _meet(self, p, q, change):
+        """
+        Changes the number of times players p and q meet by change (1 or -1)
+        """
+        n = self.num_players
+        count = self.counts[p * n + q] + change
+        self.counts[p * n + q] = self.counts[q * n + p] = count
+        if change > 0 and count > 1:
+            self.num_conflicts += 1
+        elif change < 0 and count >= 1:
+            self.num_conflicts -= 1
+
+    def swap_delta(self, r, x, y):
+        """
+        Returns the change in the number of conflicts from swapping players x
+        and y (in different groups) in round r
+        """
+        n = self.num_players
+        counts = self.counts
+        x_row = x * n
+        y_row = y * n
+        delta = 0
+        for z in self.groups[r][self.group_of[r][x]]:
+            if z != x:
+                delta += (counts[y_row + z] >= 1) - (counts[x_row + z] > 1)
+        for z in self.groups[r][self.group_of[r][y]]:
+            if z != y:
+                delta += (counts[x_row + z] >= 1) - (counts[y_row + z] > 1)
+        return delta
+
+    def swap(self, r, x, y):
+        """
+        Swaps players x and y (in different groups) in round r
+        """
+        group_of = self.group_of[r]
+        a = group_of[x]
+        b = group_of[y]
+        group_a = self.groups[r][a]
+        group_b = self.groups[r][b]
+        for z in group_a:
+            if z != x:
+                self._meet(x, z, -1)
+                self._meet(y, z, 1)
+        for z in group_b:
+            if z != y:
+                self._meet(y, z, -1)
+                self._meet(x, z, 1)
+        group_a[group_a.index(x)] = y
+        group_b[group_b.index(y)] = x
+        group_of[x] = b
+        group_of[y] = a
+
+    def best_move(self, iteration, best_conflicts, deadline=None):
+        """
+        Returns the best allowed (delta, round, x, y) swap, in a round after
+        the first, of a player x meeting someone else in its group more than
+        once with a player y in another group, ties being broken randomly,
+        or None if there isn't one.  Also returns None if the deadline (a
+        time.time() value) passes before all the swaps have been looked at,
+        which for large instances can take seconds.
+        """
+        n = self.num_players
+        counts = self.counts
+        best = None
+        num_best = 0
+        for r in xrange(1, self.num_rounds):
+            groups = self.groups[r]
+            group_of = self.group_of[r]
+            tabu_until = self.tabu_until[r]
+            for group in groups:
+                if deadline is not None and time.time() > deadline:
+                    return None
+                for x in group:
+                    x_row = x * n
+                    if not any(counts[x_row + z] > 1 for z in group if z != x):
+                        continue
+                    for y in xrange(n):
+                        if group_of[y] == group_of[x]:
+                            continue
+                        delta = self.swap_delta(r, x, y)
+                        tabu = tabu_until[x] > iteration or tabu_until[y] > iteration
+                        if tabu and self.num_conflicts + delta >= best_conflicts:
+                            continue
+                        if best is None or delta < best[0]:
+                            best = (delta, r, x, y)
+                            num_best = 1
+                        elif delta == best[0]:
+                            # Reservoir sampling among the equally good moves
+                            num_best += 1
+                            if self.rng.randrange(num_best) == 0:
+                                best = (delta, r, x, y)
+        return best
+
+    def perturb(self):
+        """
+        Makes a few random swaps, to move the search somewhere new
+        """
+        for n in xrange(self.PERTURBATION_SWAPS):
+            r = self.rng.randrange(1, self.num_rounds)
+            x = self.rng.randrange(self.num_players)
+            y = self.rng.randrange(self.num_players)
+            if self.group_of[r][x] != self.group_of[r][y]:
+                self.swap(r, x, y)
+
+    def run(self, max_iterations=None, time_limit=None):
+        """
+        Searches until a schedule without conflicts is found, returning it as
+        a Schedule, or until max_iterations iterations have been done or
+        time_limit seconds have passed, returning None
+        """
+        deadline = time.time() + time_limit if time_limit is not None else None
+        best_conflicts = self.num_conflicts
+        last_improvement = 0
+        iteration = 0
+        while self.num_conflicts:
+            if max_iterations is not None and iteration >= max_iterations:
+                return None
+            if deadline is not None and time.time() > deadline:
+                return None
+            iteration += 1
+            move = self.best_move(iteration, best_conflicts, deadline)
+            if move is not None:
+                delta, r, x, y = move
+                self.swap(r, x, y)
+                tenure = self.TABU_TENURE + self.rng.randrange(self.TABU_TENURE + 1)
+                self.tabu_until[r][x] = self.tabu_until[r][y] = iteration + tenure
+            if self.num_conflicts < best_conflicts:
+                best_conflicts = self.num_conflicts
+                last_improvement = iteration
+            elif iteration - last_improvement > self.STAGNATION_ITERATIONS:
+                self.perturb()
+                last_improvement = iteration
+        return Schedule.from_array(self.groups)
@@ -0,0 +1,79 @@
+import json
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from golf import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs the golf benchmarks (in a test database), optionally saving the '
+        'results as JSON and comparing them with a saved baseline.'
+    )
+    option_list = BaseCommand.option_list + (
+        make_option('--output', '-o', help='Write the results to this JSON file'),
+        make_option('--baseline', '-b', help='Compare the results with those in this JSON file'),
+        make_option(
+            '--threshold', type='float', default=benchmarks.DEFAULT_THRESHOLD,
+            help='Ratio to the baseline time above which a benchmark counts as slower (default %default)',
+        ),
+        make_option(
+            '--only', action='append', metavar='NAME',
+            help='Only run the benchmarks whose names contain NAME (may be repeated)',
+        ),
+        make_option(
+            '--max-size', type='int',
+            help='Only benchmark instances with at most this many groups',
+        ),
+        make_option(
+            '--min-time', type='float', default=benchmarks.MIN_TIME,
+            help='Minimum time in seconds to run each benchmark for (default %default)',
+        ),
+    )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (IOError, ValueError) as e:
+                raise CommandError('Could not read baseline %s: %s' % (options['baseline'], e))
+        sizes = benchmarks.BENCHMARK_SIZES
+        construct_all_sizes = benchmarks.CONSTRUCT_ALL_SIZES
+        if options['max_size']:
+            sizes = [size for size in sizes if size[0] <= options['max_size']]
+            construct_all_sizes = [size for size in construct_all_sizes if size <= options['max_size']]
+
+        def log(key, seconds):
+            self.stdout.write('%-50s %12.6f ms' % (key, seconds * 1000))
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0)
+        try:
+            results = benchmarks.run_benchmarks(
+                sizes=sizes,
+                construct_all_sizes=construct_all_sizes,
+                names=options['only'],
+                min_time=options['min_time'],
+                log=log,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(results, output_file, indent=2, sort_keys=True)
+        if baseline:
+            comparison = benchmarks.compare_results(results, baseline, options['threshold'])
+            self.stdout.write('')
+            self.stdout.write('%-50s %12s %12s %8s' % ('benchmark', 'baseline ms', 'ms', 'ratio'))
+            for key, baseline_seconds, seconds, ratio, slower in comparison:
+                self.stdout.write('%-50s %12.6f %12.6f %8.2f%s' % (key, baseline_seconds * 1000, seconds * 1000, ratio, ' SLOWER' if slower else ''))
+            slower = [key for key, baseline_seconds, seconds, ratio, is_slower in comparison if is_slower]
+            if slower:
+                raise CommandError('%d benchmark(s) slower than the baseline: %s' % (len(slower), ', '.join(slower)))
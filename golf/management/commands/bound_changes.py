@@ -0,0 +1,28 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from golf import feed
+
+
+class Command(BaseCommand):
+    help = (
+        'Writes the bounds added and deleted since the given cursor (or all of '
+        'them) as JSON, along with the cursor to ask for the next changes since.'
+    )
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--since', '-s',
+            help='Only report changes after this cursor (as given with each change)',
+        ),
+    )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = feed.parse_cursor(options['since'])
+            except ValueError as e:
+                raise CommandError(str(e))
+        for chunk in feed.bound_changes_json_chunks(since):
+            self.stdout.write(chunk, ending='')
@@ -0,0 +1,42 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from golf import models
+
+
+class Command(BaseCommand):
+    help = (
+        'Reports the cost of the most expensive constructions recorded by the '
+        'last run of each constructor, slowest first.'
+    )
+    option_list = BaseCommand.option_list + (
+        make_option('--constructor', '-c', help='Only report the runs of the constructor with this ID'),
+        make_option(
+            '--min-groups', type='int',
+            help='Only report the runs on instances with at least this many groups',
+        ),
+        make_option(
+            '--limit', '-n', type='int', default=20,
+            help='Number of runs to report, or 0 for all of them (default %default)',
+        ),
+    )
+
+    def handle(self, *args, **options):
+        runs = models.ConstructionRun.report(options['constructor'], options['min_groups'])
+        if options['limit']:
+            runs = runs[:options['limit']]
+        self.stdout.write('%-40s %8s %12s %12s %12s %10s %10s %10s' % (
+            'constructor', 'instance', 'construct ms', 'cpu ms', 'save ms', 'peak KB', 'growth KB', 'output',
+        ))
+        for run in runs:
+            self.stdout.write('%-40s %8s %12.1f %12.1f %12.1f %10d %10d %10s' % (
+                run.construction_id,
+                run.instance.name,
+                run.construct_time * 1000,
+                run.construct_cpu_time * 1000,
+                run.save_time * 1000,
+                run.peak_memory,
+                run.peak_memory_growth,
+                run.output_size if run.produced else '-',
+            ))
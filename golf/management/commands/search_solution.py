@@ -0,0 +1,50 @@
+from optparse import make_option
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from golf import constructions
+from golf import models
+
+
+class Command(BaseCommand):
+    args = '<num_groups> <group_size>'
+    help = (
+        'Searches for a solution to the given instance by local search, saving '
+        'it if one is found.'
+    )
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--rounds', '-r', type='int',
+            help='Number of rounds to search for (default one more than the best lower bound)',
+        ),
+        make_option('--seed', type='int', default=0, help='Random seed (default %default)'),
+        make_option(
+            '--iterations', type='int', default=constructions.LocalSearchConstructor.MAX_ITERATIONS,
+            help='Maximum number of iterations (default %default)',
+        ),
+        make_option(
+            '--time-limit', type='float', default=constructions.LocalSearchConstructor.TIME_LIMIT,
+            help='Maximum time to search for, in seconds (default %default); 0 for no limit, making the search repeatable',
+        ),
+    )
+
+    def handle(self, *args, **options):
+        try:
+            num_groups, group_size = [int(arg) for arg in args]
+        except ValueError:
+            raise CommandError('Expected the number of groups and the group size')
+        try:
+            # Validates the instance, which get_or_create_many() doesn't
+            models.GolfInstance(num_groups=num_groups, group_size=group_size)
+        except ValidationError as e:
+            raise CommandError('Invalid instance %dx%d: %s' % (num_groups, group_size, ' '.join(e.messages)))
+        instance = models.GolfInstance.objects.get_or_create_many([(num_groups, group_size)])[0]
+        constructor = constructions.LocalSearchConstructor(
+            options['rounds'], options['seed'], options['iterations'], options['time_limit'] or None,
+        )
+        solution = constructor.construct(instance)
+        if solution is None:
+            self.stdout.write('No solution found for %s' % instance.name)
+        else:
+            self.stdout.write('Found a %d-round solution for %s' % (solution.num_rounds, instance.name))
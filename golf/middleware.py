@@ -0,0 +1,135 @@
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# The views (as "namespace:name") whose requests are instrumented, unless
+# overridden by the GOLF_REQUEST_STATS_VIEWS setting
+DEFAULT_TRACKED_VIEWS = ('golf:index', 'golf:detail')
+
+
+def percentile(values, fraction):
+    """
+    Returns the given percentile (as a fraction) of the given sorted values,
+    using the nearest rank
+    """
+    if not values:
+        return None
+    rank = int(math.ceil(fraction * len(values))) - 1
+    return values[min(max(rank, 0), len(values) - 1)]
+
+
+class RequestStats(object):
+    """
+    Rolling in-process store of statistics about requests: for each view,
+    the values of each metric for the most recent max_samples requests
+    """
+    METRICS = ('queries', 'db_time', 'render_time', 'total_time')
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, view, **values):
+        """
+        Records the metric values for a request to the given view
+        """
+        with self._lock:
+            samples = self._samples.setdefault(view, [])
+            samples.append(tuple(values[metric] for metric in self.METRICS))
+            if len(samples) > self.max_samples:
+                del samples[:len(samples) - self.max_samples]
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        """
+        Returns a list of (view, number of requests, metric summaries) for
+        the views with recorded requests, the metric summaries being a list
+        of (metric, p50, p95, max) in METRICS order
+        """
+        with self._lock:
+            samples = dict((view, list(view_samples)) for view, view_samples in self._samples.iteritems())
+        summary = []
+        for view in sorted(samples):
+            metric_summaries = []
+            for index, metric in enumerate(self.METRICS):
+                values = sorted(sample[index] for sample in samples[view])
+                metric_summaries.append((metric, percentile(values, 0.5), percentile(values, 0.95), values[-1]))
+            summary.append((view, len(samples[view]), metric_summaries))
+        return summary
+
+
+# The process's request statistics
+request_stats = RequestStats()
+
+
+class RequestStatsMiddleware(object):
+    """
+    Records, for each request to one of the tracked views, the number of SQL
+    queries, the time spent in the database, the time spent rendering the
+    template (for views returning a TemplateResponse) and the total time, in
+    request_stats.  If the GOLF_REQUEST_STATS_LOG setting is True, each
+    request is also logged.
+
+    Queries are only recorded by Django with a debug cursor, so one is used
+    for the tracked requests.
+    """
+
+    def process_request(self, request):
+        request._golf_stats_start = time.time()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        tracked_views = getattr(settings, 'GOLF_REQUEST_STATS_VIEWS', DEFAULT_TRACKED_VIEWS)
+        match = getattr(request, 'resolver_match', None)
+        if match is None or match.view_name not in tracked_views:
+            return None
+        request._golf_stats = {
+            'view': match.view_name,
+            'queries_start': len(connection.queries),
+            'use_debug_cursor': connection.use_debug_cursor,
+            'render_time': 0.0,
+        }
+        connection.use_debug_cursor = True
+        return None
+
+    def process_template_response(self, request, response):
+        stats = getattr(request, '_golf_stats', None)
+        if stats is not None:
+            render_start = time.time()
+
+            def rendered(response):
+                stats['render_time'] = time.time() - render_start
+            response.add_post_render_callback(rendered)
+        return response
+
+    def process_response(self, request, response):
+        stats = getattr(request, '_golf_stats', None)
+        if stats is None:
+            return response
+        del request._golf_stats
+        total_time = time.time() - getattr(request, '_golf_stats_start', time.time())
+        queries = connection.queries[stats['queries_start']:]
+        connection.use_debug_cursor = stats['use_debug_cursor']
+        db_time = sum(float(query['time']) for query in queries)
+        request_stats.record(
+            stats['view'],
+            queries=len(queries),
+            db_time=db_time,
+            render_time=stats['render_time'],
+            total_time=total_time,
+        )
+        if getattr(settings, 'GOLF_REQUEST_STATS_LOG', False):
+            logger.info(
+                '%s %s: %d queries, %.1fms in database, %.1fms rendering, %.1fms total',
+                stats['view'], request.path, len(queries), db_time * 1000, stats['render_time'] * 1000, total_time * 1000,
+            )
+        return response
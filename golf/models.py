@@ -1,6 +1,17 @@
+import hashlib
+
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import DatabaseError, connections, models, router, transaction
+from django.db.models import Max
+from django.db.models.query import QuerySet
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from golf.canonical import canonical_solution_string
+from golf.schedule import Schedule
+from golf.signals import bounds_changed
+from golf.validation import validate_schedule, validate_solution_arrays, validate_solution_source
 
 import gettext
 _ = gettext.gettext
@@ -23,6 +34,9 @@ class Citation(models.Model):
 class ConstructionInfo(models.Model):
     id = models.CharField(primary_key=True, max_length=80)
     version = models.IntegerField()
+    # The highest ID of the instances this version of the construction has
+    # been run on
+    max_instance_id = models.IntegerField(default=0)
 
     def __unicode__(self):
         return '%s, version %d' % (self.id, self.version)
@@ -38,12 +52,112 @@ class SubmissionInfo(models.Model):
         return '%s (%s %s)' % (unicode(self.citation), unicode(self.submitter), self.timestamp.date().isoformat())
 
 
+class GolfInstanceQuerySet(QuerySet):
+
+    def with_bounds(self):
+        """
+        Annotates each instance with the number of rounds of its best upper
+        bound (best_upper_bound_rounds) and best lower bound
+        (best_lower_bound_rounds), and whether there is a solution among the
+        best lower bounds (best_lower_bound_has_solution), all in the one
+        query.  The bound properties of the instances use these values rather
+        than querying for them.
+        """
+        # The table and column names come from the models, so that this
+        # keeps up with them
+        qn = connections[self.db].ops.quote_name
+        names = {
+            'instance': qn(GolfInstance._meta.db_table),
+            'instance_id': qn(GolfInstance._meta.pk.column),
+            'bound': qn(GolfBound._meta.db_table),
+            'bound_id': qn(GolfBound._meta.pk.column),
+            'bound_instance': qn(GolfBound._meta.get_field('instance').column),
+            'num_rounds': qn(GolfBound._meta.get_field('num_rounds').column),
+        }
+        best_bound_sql = """
+            SELECT %(aggregate)s(b.%(num_rounds)s) FROM %(bound)s b
+            INNER JOIN %(table)s t ON t.%(link)s = b.%(bound_id)s
+            WHERE b.%(bound_instance)s = %(instance)s.%(instance_id)s
+        """
+        best_upper_sql = best_bound_sql % dict(
+            names,
+            aggregate='MIN',
+            table=qn(GolfUpperBound._meta.db_table),
+            link=qn(GolfUpperBound._meta.get_ancestor_link(GolfBound).column),
+        )
+        best_lower_sql = best_bound_sql % dict(
+            names,
+            aggregate='MAX',
+            table=qn(GolfLowerBound._meta.db_table),
+            link=qn(GolfLowerBound._meta.get_ancestor_link(GolfBound).column),
+        )
+        has_solution_sql = """
+            CASE WHEN EXISTS (
+                SELECT 1 FROM %(bound)s b
+                INNER JOIN %(solution)s s ON s.%(link)s = b.%(bound_id)s
+                WHERE b.%(bound_instance)s = %(instance)s.%(instance_id)s AND b.%(num_rounds)s = (%(best_lower)s)
+            ) THEN 1 ELSE 0 END
+        """ % dict(
+            names,
+            solution=qn(GolfSolution._meta.db_table),
+            link=qn(GolfSolution._meta.get_ancestor_link(GolfLowerBound).column),
+            best_lower=best_lower_sql,
+        )
+        return self.extra(select={
+            'best_upper_bound_rounds': best_upper_sql,
+            'best_lower_bound_rounds': best_lower_sql,
+            'best_lower_bound_has_solution': has_solution_sql,
+        })
+
+
+class GolfInstanceManager(models.Manager):
+
+    def get_queryset(self):
+        return GolfInstanceQuerySet(self.model, using=self._db)
+
+    def with_bounds(self):
+        return self.get_queryset().with_bounds()
+
+    def get_or_create_many(self, keys):
+        """
+        Returns the instances with the given (num_groups, group_size) keys, in
+        the same order, creating any that don't exist yet.  Uses a fixed
+        number of queries however many instances there are: the existing
+        instances are read in one go, and any missing ones (and their
+        summaries) bulk-created.
+        """
+        keys = list(keys)
+        if not keys:
+            return []
+
+        def read_instances():
+            return dict(
+                ((instance.num_groups, instance.group_size), instance)
+                for instance in self.get_queryset().filter(
+                    num_groups__range=(min(key[0] for key in keys), max(key[0] for key in keys)),
+                    group_size__range=(min(key[1] for key in keys), max(key[1] for key in keys)),
+                )
+            )
+
+        instances = read_instances()
+        missing = sorted(set(key for key in keys if key not in instances))
+        if missing:
+            self.bulk_create([GolfInstance(num_groups=num_groups, group_size=group_size) for num_groups, group_size in missing])
+            # bulk_create() doesn't set the IDs, so read the new instances
+            # back; it doesn't send post_save either, so make their summaries
+            instances = read_instances()
+            GolfInstanceSummary.objects.bulk_create([GolfInstanceSummary(instance=instances[key]) for key in missing])
+        return [instances[key] for key in keys]
+
+
 class GolfInstance(models.Model):
     num_groups = models.IntegerField(validators=[MinValueValidator(2)])
     group_size = models.IntegerField(validators=[MinValueValidator(2)])
     _upper_bound = None
     _lower_bound = None
 
+    objects = GolfInstanceManager()
+
     class Meta:
         unique_together = ('num_groups', 'group_size')
         index_together = [
@@ -52,6 +166,10 @@ class GolfInstance(models.Model):
 
     def __init__(self, *args, **kwargs):
         super(GolfInstance, self).__init__(*args, **kwargs)
+        # Instances loaded from the database (which Django constructs with
+        # positional arguments) were validated when saved
+        if args:
+            return
         # Can't do a full_clean() or validation complains about already having
         # an instance with this ID, etc. when loading an instance from the
         # database, but validate what we can...
@@ -95,6 +213,12 @@ class GolfInstance(models.Model):
         """
         if not self._upper_bound:
             bounds = GolfUpperBound.objects.filter(instance_id=self.id).order_by('num_rounds')
+            if self.has_annotated_bounds:
+                # with_bounds() has already told us which bound we want
+                if self.best_upper_bound_rounds is None:
+                    bounds = []
+                else:
+                    bounds = bounds.filter(num_rounds=self.best_upper_bound_rounds)[:1]
             if bounds:
                 self._upper_bound = bounds[0]
             else:
@@ -107,6 +231,15 @@ class GolfInstance(models.Model):
         Returns the best lower bound for this instance, giving preference to
         those with solutions
         """
+        if not self._lower_bound and self.has_annotated_bounds:
+            # with_bounds() has already told us which bound we want
+            rounds = self.best_lower_bound_rounds
+            if rounds is None:
+                self._lower_bound = DummyBound()
+            elif self.best_lower_bound_has_solution:
+                self._lower_bound = GolfSolution.objects.filter(instance_id=self.id, num_rounds=rounds).first()
+            else:
+                self._lower_bound = GolfLowerBound.objects.filter(instance_id=self.id, num_rounds=rounds).first()
         if not self._lower_bound:
             # We don't seem to be able to easily order by whether or not there
             # is a solution corresponding to the bound, so just give preference
@@ -135,16 +268,36 @@ class GolfInstance(models.Model):
         return self.lower_bound.as_solution()
 
     @property
-    def is_closed(self):
+    def has_annotated_bounds(self):
         """
-        Is a closed instance (upper and lower bounds are the same)
+        Whether this instance was loaded using with_bounds()
+        """
+        return 'best_lower_bound_rounds' in self.__dict__
+
+    def _bound_rounds(self):
         """
+        Returns the number of rounds of the best lower and upper bounds (None
+        if unknown), without loading the bounds if they have been annotated
+        """
+        if self.has_annotated_bounds:
+            return self.best_lower_bound_rounds, self.best_upper_bound_rounds
         l = self.lower_bound
         u = self.upper_bound
-        if isinstance(l, DummyBound) or isinstance(u, DummyBound):
+        return (
+            None if isinstance(l, DummyBound) else l.num_rounds,
+            None if isinstance(u, DummyBound) else u.num_rounds,
+        )
+
+    @property
+    def is_closed(self):
+        """
+        Is a closed instance (upper and lower bounds are the same)
+        """
+        l, u = self._bound_rounds()
+        if l is None or u is None:
             return False
         else:
-            return u.num_rounds == l.num_rounds
+            return u == l
 
     @property
     def bound_range(self):
@@ -152,12 +305,15 @@ class GolfInstance(models.Model):
         Returns a string representation of the range of the bounds on this
         instance
         """
-        l = self.lower_bound
-        u = self.upper_bound
-        if l.num_rounds == u.num_rounds:
-            return str(l.num_rounds)
+        l, u = self._bound_rounds()
+        if l is None:
+            l = DummyBound.num_rounds
+        if u is None:
+            u = DummyBound.num_rounds
+        if l == u:
+            return str(l)
         else:
-            return u'%d - %d' % (l.num_rounds, u.num_rounds)
+            return u'%s - %s' % (l, u)
 
 
 class DummyBound(object):
@@ -172,6 +328,106 @@ class GolfBound(models.Model):
     instance = models.ForeignKey(GolfInstance)
     submission_info = models.ForeignKey(SubmissionInfo)
     num_rounds = models.IntegerField()
+    # When the bound was added to the database (which for constructions may
+    # be well after the submission), as reported by the feed of changes
+    timestamp = models.DateTimeField('date added', auto_now_add=True)
+
+    # Number of instance or solution IDs to look up per query when checking
+    # for duplicates
+    DUPLICATE_LOOKUP_BATCH_SIZE = 500
+
+    @staticmethod
+    def save_many(bounds):
+        """
+        Validates and saves many new bounds (of any kind) at once, using a few
+        bulk INSERTs per table in one transaction rather than several INSERTs
+        per bound.  Solutions equivalent to existing ones (or to earlier ones
+        in the list) are not saved, as with
+        GolfSolution.save_unless_duplicate().  Returns the bounds, with any
+        such solutions replaced by the equivalent ones.
+        post_save is not sent for the bounds; bounds_changed is sent instead.
+        """
+        bounds = list(bounds)
+        solutions = [bound for bound in bounds if isinstance(bound, GolfSolution)]
+        for solution in solutions:
+            solution.clean_fields()
+            solution.clean()
+            solution.fill_derived_fields()
+        db = router.db_for_write(GolfBound)
+        with transaction.atomic(using=db):
+            # Only solutions for the same instance and number of rounds can
+            # be equivalent, so look up the existing ones for each
+            keys = set((solution.instance_id, solution.num_rounds) for solution in solutions)
+            instance_ids = sorted(set(instance_id for instance_id, num_rounds in keys))
+            existing_ids = []
+            for start in xrange(0, len(instance_ids), GolfBound.DUPLICATE_LOOKUP_BATCH_SIZE):
+                existing_ids.extend(
+                    id for id, instance_id, num_rounds in GolfSolution.objects.using(db).filter(
+                        instance_id__in=instance_ids[start:start + GolfBound.DUPLICATE_LOOKUP_BATCH_SIZE],
+                    ).values_list('id', 'instance_id', 'num_rounds')
+                    if (instance_id, num_rounds) in keys
+                )
+            others = {}
+            for start in xrange(0, len(existing_ids), GolfBound.DUPLICATE_LOOKUP_BATCH_SIZE):
+                for solution in GolfSolution.objects.using(db).filter(id__in=existing_ids[start:start + GolfBound.DUPLICATE_LOOKUP_BATCH_SIZE]).order_by('id'):
+                    others.setdefault((solution.instance_id, solution.num_rounds), []).append(solution)
+            results = []
+            new_bounds = []
+            for bound in bounds:
+                if isinstance(bound, GolfSolution):
+                    key_others = others.setdefault((bound.instance_id, bound.num_rounds), [])
+                    equivalent = bound.find_equivalent_in(key_others)
+                    if equivalent:
+                        results.append(equivalent)
+                        continue
+                    key_others.append(bound)
+                new_bounds.append(bound)
+                results.append(bound)
+            if not new_bounds:
+                return results
+
+            # bulk_create() can't handle inherited models, so bulk create the
+            # GolfBound rows and then fill in the IDs (which bulk_create()
+            # doesn't) before inserting the rows of the subclass tables
+            # directly.  The new rows are looked up by their instance,
+            # submission and number of rounds among those after the previous
+            # highest ID, so that rows saved concurrently by others are
+            # ignored (unless they are for the same things).
+            previous_max_id = GolfBound.objects.using(db).aggregate(max_id=Max('id'))['max_id'] or 0
+            GolfBound.objects.using(db).bulk_create([
+                GolfBound(instance_id=bound.instance_id, submission_info_id=bound.submission_info_id, num_rounds=bound.num_rounds)
+                for bound in new_bounds
+            ])
+            new_ids = {}
+            for id, instance_id, submission_info_id, num_rounds in GolfBound.objects.using(db).filter(
+                id__gt=previous_max_id,
+                submission_info_id__in=set(bound.submission_info_id for bound in new_bounds),
+            ).order_by('id').values_list('id', 'instance_id', 'submission_info_id', 'num_rounds'):
+                new_ids.setdefault((instance_id, submission_info_id, num_rounds), []).append(id)
+            ids = []
+            for bound in new_bounds:
+                key_ids = new_ids.get((bound.instance_id, bound.submission_info_id, bound.num_rounds))
+                if not key_ids:
+                    raise DatabaseError('Bounds were deleted concurrently with a bulk save')
+                ids.append(key_ids.pop(0))
+            if any(new_ids.itervalues()):
+                raise DatabaseError('The same bounds were saved concurrently with a bulk save')
+            for bound, id in zip(new_bounds, ids):
+                for model in [type(bound)] + list(type(bound)._meta.get_parent_list()):
+                    setattr(bound, model._meta.pk.attname, id)
+                bound._state.adding = False
+                bound._state.db = db
+            connection = connections[db]
+            for model in (GolfUpperBound, GolfLowerBound, GolfSolution):
+                rows = [bound for bound in new_bounds if isinstance(bound, model)]
+                fields = model._meta.local_concrete_fields
+                batch_size = max(connection.ops.bulk_batch_size(fields, rows), 1)
+                for start in xrange(0, len(rows), batch_size):
+                    model._base_manager._insert(rows[start:start + batch_size], fields=fields, using=db)
+            # Sent in the transaction, so that the log of changes is written
+            # along with the bounds
+            bounds_changed.send(sender=GolfBound, instance_ids=sorted(set(bound.instance_id for bound in new_bounds)), bounds=new_bounds)
+        return results
 
 
 class GolfUpperBound(GolfBound):
@@ -196,23 +452,159 @@ class GolfLowerBound(GolfBound):
 
 class GolfSolution(GolfLowerBound):
     solution_string = models.TextField()
+    # The canonical form of the solution and its SHA-1, for finding
+    # equivalent solutions; blank until the solution has needed comparing
+    # with another (see find_equivalent())
     normalised_solution_string = models.TextField(blank=True)
+    normalised_hash = models.CharField(max_length=40, blank=True, db_index=True)
+    # Compact binary encoding of solution_string (see Schedule.to_bytes()),
+    # filled in on save when all the player IDs fit
+    solution_data = models.BinaryField(null=True, blank=True)
 
+    # The solution as a Schedule, the solution string it was made from and
+    # whether it was decoded from solution_data rather than parsed
     _solution = None
+    _solution_from = None
+    _solution_decoded = False
+    # The solution string solution_data encodes
+    _data_from = None
+    # The solution string the normalised fields were last computed from
+    _normalised_from = None
+
+    def __init__(self, *args, **kwargs):
+        super(GolfSolution, self).__init__(*args, **kwargs)
+        # Fields loaded from the database were derived from the loaded
+        # solution string (deferred fields aren't in __dict__)
+        if self.__dict__.get('solution_data'):
+            self._data_from = self.__dict__.get('solution_string')
+        if self.__dict__.get('normalised_solution_string'):
+            self._normalised_from = self.__dict__.get('solution_string')
 
     def clean(self):
         super(GolfSolution, self).clean()
-        self.validate_solution_string(self.solution_string)
-        if self.normalised_solution_string:
-            self.validate_solution_string(self.normalised_solution_string)
+        try:
+            schedule = self.parsed_schedule()
+        except ValueError:
+            # Not representable as a schedule, so check the string to find out
+            # what's wrong with it
+            self.validate_solution_string(self.solution_string)
+        else:
+            validate_schedule(schedule, self.num_rounds, self.instance.num_groups, self.instance.group_size)
 
     def save(self, *args, **kwargs):
         self.full_clean()
+        self.fill_derived_fields()
         super(GolfSolution, self).save(*args, **kwargs)
 
+    def fill_derived_fields(self):
+        """
+        Fills in the fields derived from the solution string: the binary
+        encoding, and the normalised solution string and hash if they have
+        already been computed (otherwise they are cleared, to be filled in
+        when needed: see find_equivalent())
+        """
+        if self._normalised_from != self.solution_string:
+            self.normalised_solution_string = ''
+            self.normalised_hash = ''
+        self.solution_data = None
+        self._data_from = None
+        try:
+            self.solution_data = self.schedule.to_bytes()
+        except ValueError:
+            pass
+        else:
+            self._data_from = self.solution_string
+
     def as_solution(self):
         return self
 
+    def normalise(self):
+        """
+        Fills in the normalised solution string (the canonical form of the
+        solution) and its hash, if not already done for the current solution
+        string
+        """
+        if self._normalised_from != self.solution_string:
+            self.normalised_solution_string = canonical_solution_string(self.solution_string)
+            self.normalised_hash = hashlib.sha1(self.normalised_solution_string).hexdigest()
+            self._normalised_from = self.solution_string
+
+    def find_equivalent(self):
+        """
+        Returns an existing solution for the same instance and number of
+        rounds which is equivalent to this one (the same up to relabelling
+        the players and reordering the rounds and groups), or None if there
+        isn't one.  The solution string is not validated.
+        Finding canonical forms can be slow, so they are only found (and
+        saved, for the existing solutions) if there are other solutions for
+        the instance and number of rounds but none with the same solution
+        string.
+        """
+        others = GolfSolution.objects.filter(instance=self.instance, num_rounds=self.num_rounds)
+        if self.pk:
+            others = others.exclude(pk=self.pk)
+        identical = others.filter(solution_string=self.solution_string).first()
+        if identical:
+            return identical
+        if not others.exists():
+            return None
+        self.normalise()
+        for solution in others.filter(normalised_hash=''):
+            solution.save_normalised()
+        return others.filter(
+            normalised_hash=self.normalised_hash,
+            normalised_solution_string=self.normalised_solution_string,
+        ).first()
+
+    def find_equivalent_in(self, solutions):
+        """
+        Returns the first of the given solutions (for the same instance and
+        number of rounds, saved or not) which is equivalent to this one, or
+        None if there isn't one, as for find_equivalent()
+        """
+        for solution in solutions:
+            if solution.solution_string == self.solution_string:
+                return solution
+        if not solutions:
+            return None
+        self.normalise()
+        for solution in solutions:
+            if solution.pk is None:
+                solution.normalise()
+            else:
+                solution.save_normalised()
+            if solution.normalised_solution_string == self.normalised_solution_string:
+                return solution
+        return None
+
+    def save_normalised(self):
+        """
+        Normalises this saved solution, if not already done, and saves just
+        the normalised fields
+        """
+        if self._normalised_from != self.solution_string:
+            self.normalise()
+            GolfSolution.objects.using(self._state.db).filter(pk=self.pk).update(
+                normalised_solution_string=self.normalised_solution_string,
+                normalised_hash=self.normalised_hash,
+            )
+
+    def save_unless_duplicate(self):
+        """
+        Saves the solution unless an equivalent one already exists (see
+        find_equivalent()), in which case that one is returned instead and
+        this one is neither validated nor saved.  Otherwise returns self.
+        """
+        try:
+            equivalent = self.find_equivalent()
+        except ValueError:
+            # Not even parseable, so let save() report the problem
+            equivalent = None
+        if equivalent:
+            return equivalent
+        self.save()
+        return self
+
     @staticmethod
     def solution_string_to_array(string):
         return [[[int(player) for player in group.split(',')] for group in round.split('|')] for round in string.split('\n')]
@@ -222,102 +614,296 @@ class GolfSolution(GolfLowerBound):
         return '\n'.join(['|'.join([','.join([str(player) for player in group]) for group in round]) for round in array])
 
     def validate_solution_string(self, string):
-        array = GolfSolution.solution_string_to_array(string)
-        if len(array) != self.num_rounds:
-            raise ValidationError(
-                _('Golf solution has %(actual)d rounds; expected %(expected)d.'),
-                code='wrong_number_of_rounds',
-                params={
-                    'actual': len(array),
-                    'expected': self.num_rounds,
-                },
-            )
-        player_set = set()
-        pair_map = {}
-        for round_index, round in enumerate(array):
-            round_num = round_index + 1
-            if len(round) != self.instance.num_groups:
-                raise ValidationError(
-                    _('Golf solution only has %(actual)d groups in round %(round)d; expected %(expected)d.'),
-                    code='wrong_number_of_groups_in_round',
-                    params={
-                        'actual': len(round),
-                        'expected': self.instance.num_groups,
-                        'round': round_num,
-                    },
+        validate_solution_source(string, self.num_rounds, self.instance.num_groups, self.instance.group_size)
+
+    @staticmethod
+    def validate_solutions(solutions):
+        """
+        Validates the solution strings of many GolfSolutions at once (e.g. to
+        re-verify the database).  Returns a list with, for each solution,
+        None if it is valid or the ValidationError describing the problem.
+        The solution strings are checked rather than the binary encodings,
+        and a solution whose binary encoding doesn't match its solution
+        string is also reported.
+        """
+        solutions = list(solutions)
+        arrays = []
+        for solution in solutions:
+            try:
+                arrays.append(solution.parsed_schedule())
+            except ValueError:
+                arrays.append(GolfSolution.solution_string_to_array(solution.solution_string))
+        results = validate_solution_arrays(
+            (solution.instance, solution.num_rounds, array)
+            for solution, array in zip(solutions, arrays)
+        )
+        for n, solution in enumerate(solutions):
+            if results[n] is None and not solution.solution_data_matches():
+                results[n] = ValidationError(
+                    _('Golf solution\'s binary encoding does not match its solution string.'),
+                    code='solution_data_mismatch',
                 )
-            player_map = {}
-            for group_index, group in enumerate(round):
-                group_num = group_index + 1
-                if len(group) != self.instance.group_size:
-                    raise ValidationError(
-                        _('Golf solution has %(actual)d players in group %(group)d of round %(round)d; expected %(expected)d.'),
-                        code='wrong_number_of_players_in_group',
-                        params={
-                            'actual': len(group),
-                            'expected': self.instance.group_size,
-                            'group': group_num,
-                            'round': round_num,
-                        },
-                    )
-                for player in group:
-                    player_set.add(player)
-                    if player in player_map:
-                        raise ValidationError(
-                            _('Player %(player)s appears in groups %(group1)d and %(group2)d in round %(round)d.'),
-                            code='repeated_player_in_round',
-                            params={
-                                'player': player,
-                                'group1': player_map[player],
-                                'group2': group_num,
-                                'round': round_num,
-                            },
-                        )
-                    player_map[player] = group_num
-                for i in range(self.instance.group_size - 1):
-                    for j in range(i + 1, self.instance.group_size):
-                        if group[i] < group[j]:
-                            pair = (group[i], group[j])
-                        else:
-                            pair = (group[j], group[i])
-                        if pair in pair_map:
-                            raise ValidationError(
-                                _('Players %(i)s and %(j)s meet in group %(group)d of round %(round)d but they already met in group %(old_group)d of round %(round)d.'),
-                                code='players_meet_more_than_once',
-                                params={
-                                    'i': group[i],
-                                    'j': group[j],
-                                    'group': group_num,
-                                    'round': round_num,
-                                    'group': pair_map[pair]['group_num'],
-                                    'round': pair_map[pair]['round_num'],
-                                },
-                            )
-                        pair_map[pair] = {
-                            'group_num': group_num,
-                            'round_num': round_num,
-                        }
-        if len(player_set) > self.instance.num_players:
-            raise ValidationError(
-                _('Too many players in solution; found %(actual)d, expected %(expected)d.'),
-                code='too_many_players',
-                params={
-                    'actual': len(player_set),
-                    'expected': self.instance.num_players,
-                },
-            )
+        return results
+
+    def solution_data_matches(self):
+        """
+        Returns whether the binary encoding, if any, is that of the solution
+        string
+        """
+        if not self.solution_data:
+            return True
+        try:
+            return Schedule.from_bytes(bytes(self.solution_data)) == self.parsed_schedule()
+        except ValueError:
+            return False
 
     @property
-    def solution(self):
+    def schedule(self):
         """
-        Returns the solution as a nested array (rounds of groups of players)
+        Returns the solution as a compact Schedule, decoded from the binary
+        encoding if there is one for the current solution string.  Raises
+        ValueError if the solution string can't be represented as one.
         """
-        if not self._solution:
-            self._solution = [[[int(player) for player in group.split(',')] for group in round.split('|')] for round in self.solution_string.split('\n')]
+        if self._solution is None or self._solution_from != self.solution_string:
+            if self.solution_data and self._data_from == self.solution_string:
+                self._solution = Schedule.from_bytes(bytes(self.solution_data))
+                self._solution_decoded = True
+            else:
+                self._solution = Schedule.from_string(self.solution_string)
+                self._solution_decoded = False
+            self._solution_from = self.solution_string
         return self._solution
 
+    def parsed_schedule(self):
+        """
+        As for schedule, but always parsed from the solution string (which
+        is what is validated) rather than decoded from the binary encoding
+        """
+        if self._solution is None or self._solution_from != self.solution_string or self._solution_decoded:
+            self._solution = Schedule.from_string(self.solution_string)
+            self._solution_from = self.solution_string
+            self._solution_decoded = False
+        return self._solution
+
+    @property
+    def solution(self):
+        """
+        Returns the solution as a Schedule (which behaves like nested lists of
+        rounds of groups of players), or as nested lists if it doesn't fit in
+        one (e.g. if its rounds are ragged)
+        """
+        try:
+            return self.schedule
+        except ValueError:
+            return GolfSolution.solution_string_to_array(self.solution_string)
+
     @solution.setter
     def solution(self, array):
-        self._solution = array
-        self.solution_string = '\n'.join(['|'.join([','.join([str(player) for player in group]) for group in round]) for round in array])
+        """
+        Sets the solution from a Schedule or nested lists of rounds of groups
+        of players
+        """
+        try:
+            schedule = Schedule.from_array(array)
+        except ValueError:
+            self._solution = None
+            self.solution_string = GolfSolution.solution_array_to_string(array)
+        else:
+            self._solution = schedule
+            self.solution_string = schedule.to_string()
+            self._solution_from = self.solution_string
+            self._solution_decoded = False
+        self.solution_data = None
+        self._data_from = None
+
+
+class GolfInstanceSummary(models.Model):
+    """
+    Denormalised summary of the best known bounds for a GolfInstance, kept up
+    to date whenever a bound is saved or deleted so that the whole table of
+    instances can be displayed without resolving the bounds one by one
+    """
+    instance = models.OneToOneField(GolfInstance, primary_key=True, related_name='summary')
+    upper_bound = models.ForeignKey(GolfUpperBound, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    lower_bound = models.ForeignKey(GolfLowerBound, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    upper_bound_rounds = models.IntegerField(null=True, blank=True)
+    lower_bound_rounds = models.IntegerField(null=True, blank=True)
+    has_solution = models.BooleanField(default=False)
+    is_closed = models.BooleanField(default=False, db_index=True)
+    # When the instance's bounds last changed (or the summary was made), for
+    # answering conditional requests
+    last_modified = models.DateTimeField(default=timezone.now)
+
+    def __unicode__(self):
+        return '%s: %s' % (unicode(self.instance), self.bound_range)
+
+    @property
+    def bound_range(self):
+        """
+        Returns a string representation of the range of the bounds on the
+        instance (as for GolfInstance.bound_range)
+        """
+        l = self.lower_bound_rounds
+        u = self.upper_bound_rounds
+        if l is None:
+            l = DummyBound.num_rounds
+        if u is None:
+            u = DummyBound.num_rounds
+        if l == u:
+            return str(l)
+        else:
+            return u'%s - %s' % (l, u)
+
+    @staticmethod
+    def refresh(instance_id):
+        """
+        Recomputes the summary for the instance with the given ID from the
+        bounds currently in the database
+        """
+        upper = GolfUpperBound.objects.filter(instance_id=instance_id).order_by('num_rounds').first()
+        # As for GolfInstance.lower_bound, give preference to a solution among
+        # the best lower bounds.
+        lower = GolfLowerBound.objects.filter(instance_id=instance_id).order_by('-num_rounds').first()
+        solution = None
+        if lower:
+            solution = GolfSolution.objects.filter(instance_id=instance_id, num_rounds=lower.num_rounds).first()
+            if solution:
+                lower = solution
+        GolfInstanceSummary.objects.filter(instance_id=instance_id).update(
+            upper_bound=upper,
+            lower_bound=lower,
+            upper_bound_rounds=upper.num_rounds if upper else None,
+            lower_bound_rounds=lower.num_rounds if lower else None,
+            has_solution=solution is not None,
+            is_closed=bool(upper and lower and upper.num_rounds == lower.num_rounds),
+            last_modified=timezone.now(),
+        )
+
+    @staticmethod
+    def rebuild():
+        """
+        Creates any missing summaries and recomputes all of them (e.g. for a
+        database populated before summaries were introduced)
+        """
+        existing = set(GolfInstanceSummary.objects.values_list('instance_id', flat=True))
+        instance_ids = list(GolfInstance.objects.values_list('id', flat=True))
+        GolfInstanceSummary.objects.bulk_create([
+            GolfInstanceSummary(instance_id=instance_id)
+            for instance_id in instance_ids if instance_id not in existing
+        ])
+        for instance_id in instance_ids:
+            GolfInstanceSummary.refresh(instance_id)
+
+
+class ConstructionRun(models.Model):
+    """
+    Accounting for one run of a constructor on one instance: the wall and CPU
+    time taken by do_construct() and the wall time taken to save the result
+    (both in seconds), the peak memory use of the process doing the
+    construction as of its end and how much the construction raised it (in
+    KB), and the size of the result's solution string.  As the peak is over
+    the life of the process, the growth is non-zero only for the runs which
+    used more memory than any before them in the process.
+    """
+    construction = models.ForeignKey(ConstructionInfo, related_name='runs')
+    instance = models.ForeignKey(GolfInstance, related_name='+')
+    timestamp = models.DateTimeField(auto_now_add=True)
+    construct_time = models.FloatField()
+    construct_cpu_time = models.FloatField()
+    save_time = models.FloatField(default=0.0)
+    peak_memory = models.IntegerField(default=0)
+    peak_memory_growth = models.IntegerField(default=0)
+    produced = models.BooleanField(default=False)
+    output_size = models.IntegerField(default=0)
+
+    def __unicode__(self):
+        return '%s on %s' % (self.construction_id, unicode(self.instance))
+
+    @property
+    def total_time(self):
+        return self.construct_time + self.save_time
+
+    @staticmethod
+    def report(construction_id=None, min_num_groups=None):
+        """
+        Returns the recorded runs (optionally just those of one constructor,
+        or on instances with at least the given number of groups), slowest
+        first
+        """
+        runs = ConstructionRun.objects.select_related('instance').extra(
+            select={'total': 'golf_constructionrun.construct_time + golf_constructionrun.save_time'}, order_by=['-total'],
+        )
+        if construction_id is not None:
+            runs = runs.filter(construction_id=construction_id)
+        if min_num_groups is not None:
+            runs = runs.filter(instance__num_groups__gte=min_num_groups)
+        return runs
+
+
+class GolfBoundChange(models.Model):
+    """
+    Entry in the log of changes to the bounds, for the feed of changes: a
+    bound of the given kind being added, or a bound being deleted.  Entries
+    are only ever added, so their IDs always increase (unlike bound IDs,
+    which SQLite reuses after deletions) and can be used to page through the
+    changes.
+    """
+    ADDED = 'added'
+    DELETED = 'deleted'
+    change = models.CharField(max_length=7, choices=((ADDED, 'Added'), (DELETED, 'Deleted')))
+    # 'upper', 'lower' or 'solution' for additions, blank for deletions
+    kind = models.CharField(max_length=8, blank=True)
+    bound_id = models.IntegerField()
+    instance_id = models.IntegerField()
+    num_rounds = models.IntegerField()
+    timestamp = models.DateTimeField(auto_now_add=True)
+
+    def __unicode__(self):
+        return '%s bound %d' % (self.get_change_display(), self.bound_id)
+
+    @staticmethod
+    def added(bound):
+        """
+        Returns an (unsaved) entry for adding the given bound, or None if it
+        isn't of one of the kinds reported
+        """
+        for model, kind in ((GolfSolution, 'solution'), (GolfUpperBound, 'upper'), (GolfLowerBound, 'lower')):
+            if isinstance(bound, model):
+                return GolfBoundChange(change=GolfBoundChange.ADDED, kind=kind, bound_id=bound.id, instance_id=bound.instance_id, num_rounds=bound.num_rounds)
+        return None
+
 
+def _instance_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GolfInstanceSummary.objects.create(instance=instance)
+
+def _bound_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        GolfInstanceSummary.refresh(instance.instance_id)
+
+def _bound_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change = GolfBoundChange.added(instance)
+        if change:
+            change.save()
+
+def _bound_deleted(sender, instance, **kwargs):
+    GolfBoundChange.objects.create(change=GolfBoundChange.DELETED, bound_id=instance.id, instance_id=instance.instance_id, num_rounds=instance.num_rounds)
+
+def _bounds_changed(sender, instance_ids, **kwargs):
+    for instance_id in instance_ids:
+        GolfInstanceSummary.refresh(instance_id)
+
+def _bounds_added(sender, bounds, **kwargs):
+    GolfBoundChange.objects.bulk_create([change for change in (GolfBoundChange.added(bound) for bound in bounds) if change])
+
+post_save.connect(_instance_saved, sender=GolfInstance)
+for bound_class in (GolfBound, GolfUpperBound, GolfLowerBound, GolfSolution):
+    post_save.connect(_bound_changed, sender=bound_class)
+    post_save.connect(_bound_added, sender=bound_class)
+# Deleting any kind of bound always deletes the underlying GolfBound row, so
+# that is the only deletion we need to listen for.
+post_delete.connect(_bound_changed, sender=GolfBound)
+post_delete.connect(_bound_deleted, sender=GolfBound)
+bounds_changed.connect(_bounds_changed)
+bounds_changed.connect(_bounds_added)
@@ -0,0 +1,393 @@
+from array import array
+import sys
+
+
+def parse_round(line):
+    """
+    Parses one line of a solution string into a list of groups of players
+    """
+    return [[int(player) for player in group.split(',')] for group in line.split('|')]
+
+
+def iter_rounds(source):
+    """
+    Generates the rounds of a solution one at a time, parsing them lazily from
+    either a solution string (with one round per line) or a file-like object
+    or other iterable yielding the lines
+    """
+    if isinstance(source, basestring):
+        start = 0
+        end = source.find('\n')
+        while end >= 0:
+            yield parse_round(source[start:end])
+            start = end + 1
+            end = source.find('\n', start)
+        yield parse_round(source[start:])
+    else:
+        for line in source:
+            if line.endswith('\n'):
+                line = line[:-1]
+            yield parse_round(line)
+
+
+class Round(object):
+    """
+    View of one round of a Schedule, behaving like the list of groups of
+    players (each group being made as a list when asked for)
+    """
+    __slots__ = ('schedule', 'index')
+
+    def __init__(self, schedule, index):
+        self.schedule = schedule
+        self.index = index
+
+    def __len__(self):
+        return self.schedule.num_groups
+
+    def __getitem__(self, group_index):
+        if isinstance(group_index, slice):
+            return [self[n] for n in xrange(*group_index.indices(len(self)))]
+        if not isinstance(group_index, (int, long)):
+            raise TypeError('Group indices must be integers')
+        if group_index < 0:
+            group_index += len(self)
+        if not 0 <= group_index < len(self):
+            raise IndexError('Group index out of range')
+        return self.schedule.group(self.index, group_index)
+
+    def __iter__(self):
+        for group_index in xrange(self.schedule.num_groups):
+            yield self.schedule.group(self.index, group_index)
+
+    def __eq__(self, other):
+        if isinstance(other, Round):
+            return self.tolist() == other.tolist()
+        return isinstance(other, list) and self.tolist() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Round(%r)' % self.tolist()
+
+    def tolist(self):
+        return list(self)
+
+
+class Schedule(object):
+    """
+    A golf schedule (the rounds of groups of players making up a solution),
+    stored compactly as a single flat array of unsigned 16-bit player IDs in
+    round, group, position order.
+
+    A schedule behaves like the nested lists of rounds of groups of players
+    it replaces: indexing or iterating over it gives a view of each round
+    (see Round), and indexing or iterating over a round gives each group as
+    a list of players.  For each round there is also a table giving the
+    group of each player (see group_of()).
+
+    The binary encoding (see to_bytes()) is a header of three little-endian
+    unsigned 16-bit integers (number of rounds, number of groups, group size)
+    followed by the player IDs in the same format.
+    """
+    __slots__ = ('num_rounds', 'num_groups', 'group_size', 'players', '_group_tables', '_meetings')
+
+    TYPECODE = 'H'
+    MAX_PLAYER = 0xffff
+    # Entry in a group table for a player not in the round
+    NO_GROUP = 0xffff
+    HEADER_LENGTH = 3
+
+    def __init__(self, num_rounds, num_groups, group_size, players):
+        if len(players) != num_rounds * num_groups * group_size:
+            raise ValueError('Schedule has %d players; expected %d' % (len(players), num_rounds * num_groups * group_size))
+        self.num_rounds = num_rounds
+        self.num_groups = num_groups
+        self.group_size = group_size
+        self.players = players
+        self._group_tables = None
+        self._meetings = None
+
+    def __getstate__(self):
+        return (self.num_rounds, self.num_groups, self.group_size, self.players)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            # As for the nested lists
+            return self.tolist() == other
+        return (
+            isinstance(other, Schedule) and
+            (self.num_rounds, self.num_groups, self.group_size) == (other.num_rounds, other.num_groups, other.group_size) and
+            self.players == other.players
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Schedule(%d, %d, %d, %r)' % (self.num_rounds, self.num_groups, self.group_size, self.players)
+
+    def __len__(self):
+        return self.num_rounds
+
+    def __getitem__(self, round_index):
+        if isinstance(round_index, slice):
+            return [Round(self, n) for n in xrange(*round_index.indices(self.num_rounds))]
+        if not isinstance(round_index, (int, long)):
+            raise TypeError('Round indices must be integers')
+        if round_index < 0:
+            round_index += self.num_rounds
+        if not 0 <= round_index < self.num_rounds:
+            raise IndexError('Round index out of range')
+        return Round(self, round_index)
+
+    def __iter__(self):
+        for round_index in xrange(self.num_rounds):
+            yield Round(self, round_index)
+
+    def __array__(self, dtype=None):
+        """
+        Returns the schedule as a NumPy array of shape (rounds, groups, group
+        size), sharing the player IDs' memory where possible
+        """
+        import numpy
+        players = numpy.frombuffer(self.players, dtype=numpy.uint16) if self.players else numpy.zeros(0, dtype=numpy.uint16)
+        players = players.reshape(self.num_rounds, self.num_groups, self.group_size)
+        return players if dtype is None else players.astype(dtype)
+
+    def group(self, round_index, group_index):
+        """
+        Returns the players in the given group of the given round, as a list
+        """
+        start = (round_index * self.num_groups + group_index) * self.group_size
+        return self.players[start:start + self.group_size].tolist()
+
+    def _build_group_tables(self):
+        if self._group_tables is None:
+            num_ids = max(self.players) + 1 if self.players else 0
+            tables = array(self.TYPECODE, [self.NO_GROUP]) * (num_ids * self.num_rounds)
+            players = self.players
+            group_size = self.group_size
+            round_length = self.num_groups * group_size
+            for round_index in xrange(self.num_rounds):
+                base = round_index * num_ids
+                round_start = round_index * round_length
+                for position in xrange(round_length):
+                    tables[base + players[round_start + position]] = position // group_size
+            self._group_tables = (num_ids, tables)
+        return self._group_tables
+
+    def group_table(self, round_index):
+        """
+        Returns a table (an array indexed by player ID) of the group of each
+        player in the given round, with NO_GROUP for players not in it.  The
+        tables for all the rounds are built together, the first time one is
+        needed.
+        """
+        num_ids, tables = self._build_group_tables()
+        return tables[round_index * num_ids:(round_index + 1) * num_ids]
+
+    @property
+    def meetings(self):
+        """
+        Returns the Meetings of the schedule's players, computed the first
+        time they are needed
+        """
+        if self._meetings is None:
+            self._meetings = Meetings(self)
+        return self._meetings
+
+    def group_of(self, round_index, player):
+        """
+        Returns the index of the group of the given player in the given
+        round, or None if the player is not in it
+        """
+        num_ids, tables = self._build_group_tables()
+        if not 0 <= player < num_ids:
+            return None
+        group_index = tables[round_index * num_ids + player]
+        return None if group_index == self.NO_GROUP else group_index
+
+    @classmethod
+    def from_array(cls, rounds):
+        """
+        Makes a schedule from nested lists of rounds of groups of players.
+        Raises ValueError if the rounds do not all have the same number of
+        groups of the same size, or a player ID cannot be stored.
+        """
+        if isinstance(rounds, Schedule):
+            return rounds
+        num_rounds = len(rounds)
+        num_groups = len(rounds[0]) if rounds else 0
+        group_size = len(rounds[0][0]) if num_groups else 0
+        players = array(cls.TYPECODE)
+        for round in rounds:
+            if len(round) != num_groups:
+                raise ValueError('Schedule rounds have different numbers of groups')
+            for group in round:
+                if len(group) != group_size:
+                    raise ValueError('Schedule groups have different sizes')
+                try:
+                    players.extend(group)
+                except OverflowError:
+                    raise ValueError('Schedule player IDs must be between 0 and %d' % cls.MAX_PLAYER)
+        return cls(num_rounds, num_groups, group_size, players)
+
+    @classmethod
+    def from_string(cls, string):
+        """
+        Makes a schedule from a solution string, as used by GolfSolution
+        """
+        return cls.from_array([[[int(player) for player in group.split(',')] for group in round.split('|')] for round in string.split('\n')])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Makes a schedule from its binary encoding (see to_bytes())
+        """
+        players = array(cls.TYPECODE)
+        players.fromstring(data)
+        if sys.byteorder != 'little':
+            players.byteswap()
+        header = players[:cls.HEADER_LENGTH]
+        if len(header) != cls.HEADER_LENGTH:
+            raise ValueError('Truncated schedule data')
+        del players[:cls.HEADER_LENGTH]
+        num_rounds, num_groups, group_size = header
+        return cls(num_rounds, num_groups, group_size, players)
+
+    def to_bytes(self):
+        """
+        Returns the binary encoding of the schedule
+        """
+        data = array(self.TYPECODE, (self.num_rounds, self.num_groups, self.group_size))
+        data.extend(self.players)
+        if sys.byteorder != 'little':
+            data.byteswap()
+        return data.tostring()
+
+    def to_string(self):
+        """
+        Returns the schedule as a solution string, as used by GolfSolution
+        """
+        return '\n'.join(['|'.join([','.join([str(player) for player in group]) for group in round]) for round in self.tolist()])
+
+    def tolist(self):
+        """
+        Returns the schedule as nested lists of rounds of groups of players
+        """
+        players = self.players.tolist()
+        group_size = self.group_size
+        round_length = self.num_groups * group_size
+        if not round_length:
+            return [[[] for _ in xrange(self.num_groups)] for _ in xrange(self.num_rounds)]
+        return [
+            [players[start:start + group_size] for start in xrange(round_start, round_start + round_length, group_size)]
+            for round_start in xrange(0, len(players), round_length)
+        ]
+
+
+class Meetings(object):
+    """
+    Which pairs of players of a Schedule meet, and in which rounds.
+
+    As for validation.SolutionChecker, the players each player meets are
+    kept as an integer bitset per player (indexed by player ID), found with
+    O(group size) bitwise operations per group; along the way it is noted
+    whether any player appears twice in a round or any pair of players meets
+    more than once.  The matrix of the rounds in which each pair meets is
+    only built (in O(rounds x groups x group size^2)) when first needed.
+    """
+    __slots__ = ('schedule', 'num_ids', 'present', 'met', 'has_conflicts', '_rounds')
+
+    # Entry in the rounds matrix for a pair of players who don't meet
+    NO_ROUND = 0xffff
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        players = schedule.players
+        self.num_ids = num_ids = max(players) + 1 if players else 0
+        met = [0] * num_ids
+        present = 0
+        has_conflicts = False
+        group_size = schedule.group_size
+        round_length = schedule.num_groups * group_size
+        for round_start in xrange(0, len(players), round_length):
+            round_mask = 0
+            for start in xrange(round_start, round_start + round_length, group_size):
+                group_mask = 0
+                for p in players[start:start + group_size]:
+                    bit = 1 << p
+                    if (round_mask | group_mask) & bit:
+                        has_conflicts = True
+                    group_mask |= bit
+                for p in players[start:start + group_size]:
+                    if met[p] & group_mask:
+                        has_conflicts = True
+                    met[p] |= group_mask ^ (1 << p)
+                round_mask |= group_mask
+            present |= round_mask
+        # Bitset of the players appearing in the schedule
+        self.present = present
+        # For each player ID, the bitset of the players it meets
+        self.met = met
+        # Whether any player appears twice in a round or any pair of
+        # players meets more than once
+        self.has_conflicts = has_conflicts
+        self._rounds = None
+
+    @property
+    def num_players(self):
+        """
+        Number of distinct players in the schedule
+        """
+        return bin(self.present).count('1')
+
+    def unmet_mask(self, player):
+        """
+        Returns the bitset of the players in the schedule who the given
+        player (also in the schedule) never meets
+        """
+        return self.present & ~self.met[player] & ~(1 << player)
+
+    def unmet_partners(self, player):
+        """
+        Returns a list of the players in the schedule who the given player
+        (also in the schedule) never meets, in order
+        """
+        mask = self.unmet_mask(player)
+        return [q for q in xrange(self.num_ids) if mask >> q & 1]
+
+    def unmet_pairs(self):
+        """
+        Returns the set of (p, q) pairs of players, with p < q, who never meet
+        """
+        return set((p, q) for p in xrange(self.num_ids) if self.present >> p & 1 for q in self.unmet_partners(p) if p < q)
+
+    @property
+    def num_unmet_pairs(self):
+        return sum(bin(self.unmet_mask(p)).count('1') for p in xrange(self.num_ids) if self.present >> p & 1) // 2
+
+    def met_round(self, p, q):
+        """
+        Returns the index of the (first) round in which players p and q meet,
+        or None if they never do
+        """
+        if not (0 <= p < self.num_ids and 0 <= q < self.num_ids) or p == q:
+            return None
+        if self._rounds is None:
+            num_ids = self.num_ids
+            rounds = array(Schedule.TYPECODE, [self.NO_ROUND]) * (num_ids * num_ids)
+            for round_index, round in enumerate(self.schedule):
+                for group in round:
+                    for i in group:
+                        row = i * num_ids
+                        for j in group:
+                            if i != j and rounds[row + j] == self.NO_ROUND:
+                                rounds[row + j] = round_index
+            self._rounds = rounds
+        round_index = self._rounds[p * self.num_ids + q]
+        return None if round_index == self.NO_ROUND else round_index
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent when bounds have been saved in bulk (see GolfBound.save_many()), which
+# bypasses the usual per-object post_save signals.  instance_ids are the IDs
+# of the GolfInstances whose bounds have changed, and bounds the bounds saved.
+bounds_changed = Signal(providing_args=['instance_ids', 'bounds'])
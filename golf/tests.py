@@ -1,11 +1,33 @@
+import datetime
+import json
+import pickle
 import pprint
-
+import time
+from StringIO import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth.models import User as AuthUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.core.exceptions import ValidationError
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
 
 import models
+import benchmarks
+import caching
+import canonical
 import constructions
+import dlx
+import feed
+import finite_fields
+import local_search
+import middleware
+import schedule
+import validation
 
 # TODO: Override the setUp() or setUpClass() methods to define some
 # users/citations/submission_infos to use in the tests, rather than
@@ -511,6 +533,75 @@ class GolfInstanceMethodTests(TestCase):
         self.assertEqual(instance_5x4.bound_range, '4 - 5')
 
 
+class GolfInstanceWithBoundsTests(TestCase):
+
+    def setUp(self):
+        self.instance_5x4 = make_instance(5, 4)
+        self.instance_6x3 = make_instance(6, 3)
+        models.GolfUpperBound(
+            instance=self.instance_5x4,
+            num_rounds=5,
+            submission_info=make_dummy_submission_info(),
+        ).save()
+        models.GolfLowerBound(
+            instance=self.instance_5x4,
+            num_rounds=5,
+            submission_info=make_dummy_submission_info(),
+        ).save()
+        models.GolfSolution(
+            instance=self.instance_5x4,
+            num_rounds=5,
+            submission_info=make_dummy_submission_info(),
+            solution_string=solution_string_5x4_5,
+        ).save()
+        models.GolfUpperBound(
+            instance=self.instance_5x4,
+            num_rounds=6,
+            submission_info=make_dummy_submission_info(),
+        ).save()
+
+    def get_annotated(self, instance):
+        return models.GolfInstance.objects.with_bounds().get(id=instance.id)
+
+    def test_annotations(self):
+        """
+        with_bounds() should annotate instances with their best bounds
+        """
+        instance = self.get_annotated(self.instance_5x4)
+        self.assertEqual(instance.best_upper_bound_rounds, 5)
+        self.assertEqual(instance.best_lower_bound_rounds, 5)
+        self.assertTrue(instance.best_lower_bound_has_solution)
+        instance = self.get_annotated(self.instance_6x3)
+        self.assertIsNone(instance.best_upper_bound_rounds)
+        self.assertIsNone(instance.best_lower_bound_rounds)
+        self.assertFalse(instance.best_lower_bound_has_solution)
+
+    def test_annotated_properties_without_queries(self):
+        """
+        is_closed and bound_range should not query the database for annotated
+        instances
+        """
+        instances = list(models.GolfInstance.objects.with_bounds().order_by('num_groups'))
+        with self.assertNumQueries(0):
+            self.assertEqual([i.bound_range for i in instances], ['5', 'unknown'])
+            self.assertEqual([i.is_closed for i in instances], [True, False])
+
+    def test_annotated_bounds_match_unannotated(self):
+        """
+        The bounds of annotated instances should be the same as those found
+        without the annotations
+        """
+        instance = self.get_annotated(self.instance_5x4)
+        plain = models.GolfInstance.objects.get(id=self.instance_5x4.id)
+        self.assertEqual(instance.upper_bound, plain.upper_bound)
+        self.assertEqual(instance.lower_bound, plain.lower_bound)
+        self.assertEqual(instance.solution, plain.solution)
+        instance = self.get_annotated(self.instance_6x3)
+        with self.assertNumQueries(0):
+            self.assertIsInstance(instance.upper_bound, models.DummyBound)
+            self.assertIsInstance(instance.lower_bound, models.DummyBound)
+
+
 class GolfLowerBoundMethodTests(TestCase):
 
     def setUp(self):
@@ -581,6 +672,47 @@ class GolfSolutionMethodTests(TestCase):
         self.assertIsNotNone(solution)
         self.assertIs(solution, solution_5x4)
 
+    def test_resave_with_fewer_rounds(self):
+        """
+        A loaded solution should be re-savable with a different solution
+        string and number of rounds, the stale normalised fields being cleared
+        rather than checked against the new number of rounds
+        """
+        solution = models.GolfSolution(
+            instance=self.instance_5x4,
+            num_rounds=5,
+            submission_info=make_dummy_submission_info(),
+            solution_string=solution_string_5x4_5,
+        )
+        solution.normalise()
+        solution.save()
+        solution = models.GolfSolution.objects.get(pk=solution.pk)
+        self.assertEqual(solution.normalised_solution_string.count('\n'), 4)
+        solution.num_rounds = 4
+        solution.solution_string = solution_string_5x4_4
+        solution.save()
+        reloaded = models.GolfSolution.objects.get(pk=solution.pk)
+        self.assertEqual((reloaded.normalised_solution_string, reloaded.normalised_hash), ('', ''))
+
+    def test_edit_loaded_solution_invalid(self):
+        """
+        Changing the solution string of a loaded solution to an invalid one
+        should make it fail validation, despite the stored binary encoding
+        """
+        solution = models.GolfSolution(
+            instance=self.instance_5x4,
+            num_rounds=5,
+            submission_info=make_dummy_submission_info(),
+            solution_string=solution_string_5x4_5,
+        )
+        solution.save()
+        solution = models.GolfSolution.objects.get(pk=solution.pk)
+        solution.schedule
+        rounds = solution_string_5x4_5.split()
+        solution.solution_string = '\n'.join(rounds[:4] + rounds[3:4])
+        self.assertRaises(ValidationError, solution.full_clean)
+        self.assertRaises(ValidationError, solution.save)
+
     def test_validate_not_enough_rounds(self):
         """
         validate_solution_string() should raise a ValidationError if the
@@ -732,8 +864,847 @@ class GolfSolutionMethodTests(TestCase):
         )
 
 
+class SolutionCheckerTests(TestCase):
+
+    def validation_error(self, string, num_rounds, num_groups, group_size):
+        array = models.GolfSolution.solution_string_to_array(string)
+        with self.assertRaises(ValidationError) as cm:
+            validation.validate_solution_array(array, num_rounds, num_groups, group_size)
+        return cm.exception
+
+    def test_repeated_pair_reports_earlier_meeting(self):
+        """
+        The error for a repeated pair should identify where the players met
+        before, and its message should be renderable
+        """
+        string = '\n'.join(solution_string_5x4_5.split()[:4] + ['1,2,10,14|6,12,13,18|3,7,16,17|4,5,11,20|8,9,15,19'])
+        e = self.validation_error(string, 5, 5, 4)
+        self.assertEqual(e.code, 'players_meet_more_than_once')
+        self.assertEqual((e.params['i'], e.params['j']), (1, 2))
+        self.assertEqual((e.params['group'], e.params['round']), (1, 5))
+        self.assertEqual((e.params['old_group'], e.params['old_round']), (1, 1))
+        self.assertEqual(len(e.messages), 1)
+
+    def test_arbitrary_player_ids(self):
+        """
+        Player IDs need not be dense; extra players should still be counted
+        after the checker has had to grow
+        """
+        array = [[[100, 2000], [7, 3]], [[100, 7], [2000, 3]]]
+        checker = validation.validate_solution_array(array, 2, 2, 2)
+        self.assertEqual(checker.num_players, 4)
+        e = self.validation_error('1,2|3,4\n5,6|7,8\n9,10|11,12', 3, 2, 2)
+        self.assertEqual(e.code, 'too_many_players')
+        self.assertEqual(e.params['actual'], 12)
+
+    def test_stream_stops_at_first_problem(self):
+        """
+        Validating a file of rounds should stop at the first bad round without
+        parsing the rest of the file
+        """
+        rounds = solution_string_5x4_5.split()
+        rounds[1] = rounds[1].replace('|6,', '|5,')
+        upload = StringIO('\n'.join(rounds[:2] + ['not a round'] * 3) + '\n')
+        with self.assertRaises(ValidationError) as cm:
+            validation.validate_solution_source(upload, 5, 5, 4)
+        self.assertEqual(cm.exception.code, 'repeated_player_in_round')
+        self.assertEqual(cm.exception.params['round'], 2)
+
+    def test_stream_repeated_pair(self):
+        """
+        Validating a file should be able to find where a repeated pair met
+        before
+        """
+        rounds = solution_string_5x4_5.split()
+        rounds[2] = rounds[0]
+        upload = StringIO('\n'.join(rounds))
+        with self.assertRaises(ValidationError) as cm:
+            validation.validate_solution_source(upload, 5, 5, 4)
+        self.assertEqual(cm.exception.code, 'players_meet_more_than_once')
+        self.assertEqual((cm.exception.params['old_group'], cm.exception.params['old_round']), (1, 1))
+
+    def test_stream_wrong_number_of_rounds(self):
+        """
+        Validating a file should report the actual number of rounds when there
+        are too many or too few
+        """
+        for num_rounds, string in ((4, solution_string_5x4_5), (5, solution_string_5x4_4)):
+            with self.assertRaises(ValidationError) as cm:
+                validation.validate_solution_source(StringIO(string), num_rounds, 5, 4)
+            self.assertEqual(cm.exception.code, 'wrong_number_of_rounds')
+            self.assertEqual(cm.exception.params['actual'], 9 - num_rounds)
+        checker = validation.validate_solution_source(StringIO(solution_string_5x4_5 + '\n'), 5, 5, 4)
+        self.assertEqual(checker.num_players, 20)
+
+
+class BatchValidationTests(TestCase):
+
+    def setUp(self):
+        self.instance_4x3 = make_instance(4, 3)
+        self.instance_5x4 = make_instance(5, 4)
+        array_5x4 = models.GolfSolution.solution_string_to_array(solution_string_5x4_5)
+        repeated_player = [[list(group) for group in round] for round in array_5x4]
+        repeated_player[2][1][0] = repeated_player[2][0][0]
+        repeated_pair = [[list(group) for group in round] for round in array_5x4]
+        repeated_pair[4][3][3], repeated_pair[4][4][3] = repeated_pair[4][4][3], repeated_pair[4][3][3]
+        extra_player = [[list(group) for group in round] for round in array_5x4]
+        extra_player[1][0][0] = 21
+        self.items = [
+            (self.instance_5x4, 5, array_5x4),
+            (self.instance_5x4, 4, array_5x4),
+            (self.instance_5x4, 5, repeated_player),
+            (self.instance_5x4, 5, repeated_pair),
+            (self.instance_5x4, 5, extra_player),
+            (self.instance_5x4, 5, array_5x4[:4] + [array_5x4[4][:4]]),
+            (self.instance_4x3, 4, models.GolfSolution.solution_string_to_array(solution_string_4x3_4)),
+        ]
+
+    def expected_codes(self):
+        codes = []
+        for instance, num_rounds, array in self.items:
+            try:
+                validation.validate_solution_array(array, num_rounds, instance.num_groups, instance.group_size)
+                codes.append(None)
+            except ValidationError as e:
+                codes.append(e.code)
+        return codes
+
+    def check_batch(self):
+        results = validation.validate_solution_arrays(self.items)
+        self.assertEqual([e.code if e else None for e in results], self.expected_codes())
+
+    def test_batch_matches_single_validation(self):
+        """
+        validate_solution_arrays() should give the same errors as validating
+        the solutions one at a time
+        """
+        self.assertEqual(self.expected_codes(), [
+            None,
+            'wrong_number_of_rounds',
+            'repeated_player_in_round',
+            'players_meet_more_than_once',
+            'too_many_players',
+            'wrong_number_of_groups_in_round',
+            None,
+        ])
+        self.check_batch()
+
+    def test_batch_without_numpy(self):
+        """
+        validate_solution_arrays() should still work when NumPy is not
+        available
+        """
+        numpy = validation.numpy
+        validation.numpy = None
+        try:
+            self.check_batch()
+        finally:
+            validation.numpy = numpy
+
+    def test_validate_solutions(self):
+        """
+        GolfSolution.validate_solutions() should validate saved solutions
+        """
+        solution = models.GolfSolution(
+            instance=self.instance_5x4,
+            num_rounds=5,
+            submission_info=make_dummy_submission_info(),
+            solution_string=solution_string_5x4_5,
+        )
+        solution.save()
+        bad_solution = models.GolfSolution(
+            instance=self.instance_5x4,
+            num_rounds=5,
+            solution_string=solution_string_5x4_4,
+        )
+        results = models.GolfSolution.validate_solutions([solution, bad_solution])
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1].code, 'wrong_number_of_rounds')
+
+    def test_validate_solutions_checks_string(self):
+        """
+        GolfSolution.validate_solutions() should check the stored solution
+        string rather than the binary encoding, and report rows where the two
+        don't match
+        """
+        solution = models.GolfSolution(
+            instance=self.instance_5x4,
+            num_rounds=5,
+            submission_info=make_dummy_submission_info(),
+            solution_string=solution_string_5x4_5,
+        )
+        solution.save()
+        rounds = solution_string_5x4_5.split()
+        solutions = models.GolfSolution.objects.filter(pk=solution.pk)
+        solutions.update(solution_string='\n'.join(rounds[:4] + rounds[3:4]))
+        self.assertEqual(models.GolfSolution.validate_solutions(solutions)[0].code, 'players_meet_more_than_once')
+        solutions.update(solution_string=relabel_solution_string(solution_string_5x4_5, dict((n, 21 - n) for n in xrange(1, 21))))
+        self.assertEqual(models.GolfSolution.validate_solutions(solutions)[0].code, 'solution_data_mismatch')
+        solutions.update(solution_string=solution_string_5x4_5)
+        self.assertIsNone(models.GolfSolution.validate_solutions(solutions)[0])
+
+
+class ScheduleTests(TestCase):
+
+    def test_string_round_trip(self):
+        """
+        A schedule made from a solution string should convert back to the same
+        string and nested array
+        """
+        s = schedule.Schedule.from_string(solution_string_5x4_5)
+        self.assertEqual((s.num_rounds, s.num_groups, s.group_size), (5, 5, 4))
+        self.assertEqual(s.to_string(), solution_string_5x4_5)
+        self.assertEqual(s.tolist(), models.GolfSolution.solution_string_to_array(solution_string_5x4_5))
+
+    def test_bytes_round_trip(self):
+        """
+        A schedule should survive being encoded to and decoded from bytes
+        """
+        s = schedule.Schedule.from_string(solution_string_4x3_4)
+        data = s.to_bytes()
+        self.assertEqual(len(data), 2 * (3 + 4 * 4 * 3))
+        self.assertEqual(data[:6], '\x04\x00\x04\x00\x03\x00')
+        self.assertEqual(schedule.Schedule.from_bytes(data), s)
+
+    def test_unstorable_schedules(self):
+        """
+        Ragged schedules and player IDs that don't fit should be rejected
+        """
+        self.assertRaises(ValueError, schedule.Schedule.from_array, [[[1, 2], [3, 4]], [[1, 3]]])
+        self.assertRaises(ValueError, schedule.Schedule.from_array, [[[1, 2], [3, 4]], [[1, 3], [2, 4, 5]]])
+        self.assertRaises(ValueError, schedule.Schedule.from_array, [[[1, 2], [3, 70000]]])
+        self.assertRaises(ValueError, schedule.Schedule.from_array, [[[1, 2], [3, -4]]])
+
+    def test_solution_binary_storage(self):
+        """
+        Saving a solution should store its binary encoding, which is then used
+        when the solution is loaded
+        """
+        models.GolfSolution(
+            instance=make_instance(5, 4),
+            num_rounds=5,
+            submission_info=make_dummy_submission_info(),
+            solution_string=solution_string_5x4_5,
+        ).save()
+        solution = models.GolfSolution.objects.get()
+        self.assertEqual(schedule.Schedule.from_bytes(bytes(solution.solution_data)).to_string(), solution_string_5x4_5)
+        self.assertEqual(solution.schedule, schedule.Schedule.from_string(solution_string_5x4_5))
+        self.assertEqual(solution.solution, models.GolfSolution.solution_string_to_array(solution_string_5x4_5))
+        self.assertIsInstance(solution.solution, schedule.Schedule)
+
+    def test_solution_binary_storage_stale(self):
+        """
+        Once the solution string of a loaded solution has changed, its
+        binary encoding should no longer be used, and should be rewritten on
+        save
+        """
+        models.GolfSolution(
+            instance=make_instance(5, 4),
+            num_rounds=5,
+            submission_info=make_dummy_submission_info(),
+            solution_string=solution_string_5x4_5,
+        ).save()
+        solution = models.GolfSolution.objects.get()
+        solution.schedule
+        relabelled = relabel_solution_string(solution_string_5x4_5, dict((n, 21 - n) for n in xrange(1, 21)))
+        solution.solution_string = relabelled
+        self.assertEqual(solution.schedule, schedule.Schedule.from_string(relabelled))
+        solution.save()
+        solution = models.GolfSolution.objects.get()
+        self.assertEqual(schedule.Schedule.from_bytes(bytes(solution.solution_data)).to_string(), relabelled)
+
+    def test_round_and_group_views(self):
+        """
+        Indexing and iterating over a schedule should behave as for the
+        nested lists
+        """
+        array = models.GolfSolution.solution_string_to_array(solution_string_5x4_5)
+        s = schedule.Schedule.from_array(array)
+        self.assertEqual(len(s), 5)
+        self.assertEqual(len(s[0]), 5)
+        self.assertEqual(s[1][2], array[1][2])
+        self.assertEqual(s[-1][-1], array[-1][-1])
+        self.assertEqual(s[1:3], array[1:3])
+        self.assertEqual(s[2][1:], array[2][1:])
+        self.assertEqual([[group for group in round] for round in s], array)
+        self.assertEqual(s, array)
+        self.assertNotEqual(s, array[:4])
+        self.assertRaises(IndexError, lambda: s[5])
+        self.assertRaises(IndexError, lambda: s[0][5])
+
+    def test_group_tables(self):
+        """
+        The group tables should give the group of each player in each round
+        """
+        s = schedule.Schedule.from_string(solution_string_5x4_5)
+        for round_index, round in enumerate(s.tolist()):
+            table = s.group_table(round_index)
+            for group_index, group in enumerate(round):
+                for player in group:
+                    self.assertEqual(s.group_of(round_index, player), group_index)
+                    self.assertEqual(table[player], group_index)
+        s = schedule.Schedule.from_array([[[0, 2], [3, 5]]])
+        self.assertEqual(s.group_table(0).tolist(), [0, schedule.Schedule.NO_GROUP, 0, 1, schedule.Schedule.NO_GROUP, 1])
+        self.assertIsNone(s.group_of(0, 1))
+        self.assertIsNone(s.group_of(0, 6))
+
+    def test_meetings(self):
+        """
+        The meetings of a valid schedule should agree with the rounds, with
+        the pairs who never meet found for each player
+        """
+        s = schedule.Schedule.from_string(solution_string_5x4_5)
+        meetings = s.meetings
+        self.assertIs(s.meetings, meetings)
+        self.assertFalse(meetings.has_conflicts)
+        self.assertEqual(meetings.num_players, 20)
+        array = s.tolist()
+        players = sorted(set(s.players))
+        for p in players:
+            for q in players:
+                group_num, round_num = validation.find_meeting(array, p, q) if p != q else (None, None)
+                self.assertEqual(meetings.met_round(p, q), round_num - 1 if round_num else None)
+        # Each player meets 3 others in each of the 5 rounds
+        self.assertEqual(meetings.num_unmet_pairs, 20 * 19 / 2 - 5 * 5 * 6)
+        self.assertEqual(len(meetings.unmet_pairs()), meetings.num_unmet_pairs)
+        for p in players:
+            partners = meetings.unmet_partners(p)
+            self.assertEqual(len(partners), 19 - 5 * 3)
+            self.assertTrue(all(meetings.met_round(p, q) is None for q in partners))
+            self.assertTrue(all((min(p, q), max(p, q)) in meetings.unmet_pairs() for q in partners))
+
+    def test_meetings_conflicts(self):
+        """
+        Players repeated in a round and pairs meeting twice should be noted,
+        and reported as for the other validation functions
+        """
+        self.assertTrue(schedule.Schedule.from_array([[[0, 1], [1, 2]]]).meetings.has_conflicts)
+        self.assertTrue(schedule.Schedule.from_array([[[0, 0], [1, 2]]]).meetings.has_conflicts)
+        self.assertTrue(schedule.Schedule.from_array([[[0, 1], [2, 3]], [[1, 0], [3, 2]]]).meetings.has_conflicts)
+        for string in (solution_string_5x4_5, solution_string_4x3_4, '0,1|2,3\n1,0|3,2', '0,1|2,3\n0,2|1,3\n4,5|6,7'):
+            array = models.GolfSolution.solution_string_to_array(string)
+            s = schedule.Schedule.from_array(array)
+            for num_rounds, num_groups, group_size in ((len(array), len(array[0]), len(array[0][0])), (5, 5, 4)):
+                try:
+                    validation.validate_solution_array(array, num_rounds, num_groups, group_size)
+                except ValidationError as e:
+                    with self.assertRaises(ValidationError) as cm:
+                        validation.validate_schedule(s, num_rounds, num_groups, group_size)
+                    self.assertEqual(cm.exception.messages, e.messages)
+                else:
+                    validation.validate_schedule(s, num_rounds, num_groups, group_size)
+
+    def test_pickle(self):
+        """
+        A schedule should survive pickling, as when constructions are passed
+        between processes
+        """
+        s = schedule.Schedule.from_string(solution_string_5x4_5)
+        s.group_of(0, 0)
+        for protocol in (0, 2):
+            self.assertEqual(pickle.loads(pickle.dumps(s, protocol)), s)
+
+    def test_solution_property(self):
+        """
+        Setting a solution from nested lists or a schedule should set the
+        solution string, with ragged solutions kept as nested lists
+        """
+        array = models.GolfSolution.solution_string_to_array(solution_string_5x4_5)
+        solution = models.GolfSolution(solution=array)
+        self.assertEqual(solution.solution_string, solution_string_5x4_5)
+        self.assertIsInstance(solution.solution, schedule.Schedule)
+        solution.solution = schedule.Schedule.from_string(solution_string_4x3_4)
+        self.assertEqual(solution.solution_string, solution_string_4x3_4)
+        solution.solution_string = solution_string_5x4_5
+        self.assertEqual(solution.solution, array)
+        solution.solution = [[[1, 2], [3, 4]], [[1, 3]]]
+        self.assertEqual(solution.solution_string, '1,2|3,4\n1,3')
+        self.assertEqual(solution.solution, [[[1, 2], [3, 4]], [[1, 3]]])
+
+
+def relabel_solution_string(string, mapping):
+    """
+    Relabels the players of a solution string and reverses the order of its
+    rounds, the groups in each round and the players in each group, giving an
+    equivalent solution
+    """
+    rounds = models.GolfSolution.solution_string_to_array(string)
+    return models.GolfSolution.solution_array_to_string(
+        [[[mapping[player] for player in reversed(group)] for group in reversed(round)] for round in reversed(rounds)]
+    )
+
+
+class CanonicalFormTests(TestCase):
+
+    def test_canonical_form_is_sorted(self):
+        """
+        The canonical form should number the players from 0 and be sorted at
+        every level
+        """
+        form = canonical.canonical_form(models.GolfSolution.solution_string_to_array(solution_string_5x4_5))
+        self.assertEqual(sorted(player for group in form[0] for player in group), range(20))
+        self.assertEqual(form, sorted(form))
+        for round in form:
+            self.assertEqual(round, sorted(round))
+            for group in round:
+                self.assertEqual(group, sorted(group))
+
+    def test_equivalent_solutions(self):
+        """
+        Solutions differing only by relabelling the players and reordering the
+        rounds and groups should have the same canonical form
+        """
+        for string in (solution_string_4x3_4, solution_string_5x4_5, solution_string_5x4_3):
+            players = sorted(set(int(player) for player in string.replace('|', ',').replace('\n', ',').split(',')))
+            shuffled = players[7:] + players[:7]
+            mapping = dict((player, 100 + shuffled[n]) for n, player in enumerate(players))
+            self.assertEqual(
+                canonical.canonical_solution_string(relabel_solution_string(string, mapping)),
+                canonical.canonical_solution_string(string),
+            )
+
+    def test_inequivalent_solutions(self):
+        """
+        Solutions describing different designs should have different canonical
+        forms
+        """
+        # Two rounds of 2x2 with the second round either pairing up the same
+        # players as the first or not
+        self.assertNotEqual(
+            canonical.canonical_solution_string('1,2|3,4\n1,2|3,4'),
+            canonical.canonical_solution_string('1,2|3,4\n1,3|2,4'),
+        )
+        # Three rounds of 3x3 with the last round either repeating no pairs
+        # or repeating some
+        self.assertNotEqual(
+            canonical.canonical_solution_string('1,2,3|4,5,6|7,8,9\n1,4,7|2,5,8|3,6,9\n1,5,9|2,6,7|3,4,8'),
+            canonical.canonical_solution_string('1,2,3|4,5,6|7,8,9\n1,4,7|2,5,8|3,6,9\n1,5,6|2,4,9|3,7,8'),
+        )
+
+    def test_large_solution(self):
+        """
+        A solution with 400 players should be canonicalised, consistently
+        """
+        string = models.GolfSolution.solution_array_to_string([
+            [range(group * 20, group * 20 + 20) for group in xrange(20)],
+            [range(group, 400, 20) for group in xrange(20)],
+        ])
+        mapping = dict((player, (player * 7) % 400) for player in xrange(400))
+        self.assertEqual(
+            canonical.canonical_solution_string(relabel_solution_string(string, mapping)),
+            canonical.canonical_solution_string(string),
+        )
+
+    def test_symmetric_solutions_time(self):
+        """
+        Highly symmetric solutions with many players (a round robin for 40
+        players and the affine plane of order 19) should be canonicalised
+        quickly, consistently
+        """
+        # Player 39 stays put while the others rotate
+        round_robin = [
+            [[39, round]] + [[(round + offset) % 39, (round - offset) % 39] for offset in xrange(1, 20)]
+            for round in xrange(39)
+        ]
+        # The lines of each slope, and the vertical lines
+        affine_plane = [
+            [[x * 19 + (slope * x + intercept) % 19 for x in xrange(19)] for intercept in xrange(19)]
+            for slope in xrange(19)
+        ] + [[range(x * 19, x * 19 + 19) for x in xrange(19)]]
+        for rounds in (round_robin, affine_plane):
+            string = models.GolfSolution.solution_array_to_string(rounds)
+            num_players = len(rounds[0]) * len(rounds[0][0])
+            mapping = dict((player, (player * 7 + 3) % num_players) for player in xrange(num_players))
+            start = time.time()
+            self.assertEqual(
+                canonical.canonical_solution_string(relabel_solution_string(string, mapping)),
+                canonical.canonical_solution_string(string),
+            )
+            self.assertLess(time.time() - start, 5)
+
+    def test_solution_normalised_when_compared(self):
+        """
+        Saving a solution should leave its normalised solution string to be
+        filled in when it is compared with another solution for the same
+        instance and number of rounds, the same for equivalent solutions
+        """
+        instance = make_instance(5, 4)
+        submission_info = make_dummy_submission_info()
+        solution = models.GolfSolution(
+            instance=instance,
+            num_rounds=3,
+            submission_info=submission_info,
+            solution_string=solution_string_5x4_3,
+        )
+        solution.save()
+        self.assertEqual(models.GolfSolution.objects.get(pk=solution.pk).normalised_solution_string, '')
+        mapping = dict((player, 20 - player) for player in xrange(1, 21))
+        other = models.GolfSolution(
+            instance=instance,
+            num_rounds=3,
+            submission_info=submission_info,
+            solution_string=relabel_solution_string(solution_string_5x4_3, mapping),
+        )
+        self.assertEqual(other.find_equivalent(), solution)
+        self.assertEqual(other.normalised_solution_string, canonical.canonical_solution_string(solution_string_5x4_3))
+        self.assertEqual(
+            models.GolfSolution.objects.get(pk=solution.pk).normalised_solution_string,
+            other.normalised_solution_string,
+        )
+
+
+class DuplicateSolutionTests(TestCase):
+
+    def setUp(self):
+        self.instance = make_instance(5, 4)
+        self.submission_info = make_dummy_submission_info()
+        self.solution = models.GolfSolution(
+            instance=self.instance,
+            num_rounds=3,
+            submission_info=self.submission_info,
+            solution_string=solution_string_5x4_3,
+        )
+        self.solution.save()
+
+    def make_solution(self, solution_string, num_rounds=3, instance=None):
+        return models.GolfSolution(
+            instance=instance or self.instance,
+            num_rounds=num_rounds,
+            submission_info=self.submission_info,
+            solution_string=solution_string,
+        )
+
+    def test_hash_saved(self):
+        """
+        Comparing with a saved solution should store the hash of its
+        normalised solution string
+        """
+        mapping = dict((player, 21 - player) for player in xrange(1, 21))
+        self.make_solution(relabel_solution_string(solution_string_5x4_3, mapping)).find_equivalent()
+        solution = models.GolfSolution.objects.get(pk=self.solution.pk)
+        self.assertEqual(len(solution.normalised_hash), 40)
+        self.assertEqual(models.GolfSolution.objects.filter(normalised_hash=solution.normalised_hash).count(), 1)
+
+    def test_find_equivalent(self):
+        """
+        An equivalent solution for the same instance and number of rounds
+        should be found, but not one for a different instance or number of
+        rounds
+        """
+        mapping = dict((player, 21 - player) for player in xrange(1, 21))
+        equivalent = self.make_solution(relabel_solution_string(solution_string_5x4_3, mapping))
+        self.assertEqual(equivalent.find_equivalent(), self.solution)
+        self.assertEqual(self.solution.find_equivalent(), None)
+        self.assertEqual(self.make_solution(solution_string_5x4_4, num_rounds=4).find_equivalent(), None)
+        self.assertEqual(self.make_solution(solution_string_5x4_3, instance=make_instance(6, 4)).find_equivalent(), None)
+
+    def test_save_unless_duplicate(self):
+        """
+        Saving a duplicate solution should return the existing one without
+        saving (or validating) it, while new solutions should be saved
+        """
+        duplicate = self.make_solution(solution_string_5x4_3)
+        # Just the lookup, as it is identical
+        with self.assertNumQueries(1):
+            self.assertEqual(duplicate.save_unless_duplicate(), self.solution)
+        self.assertEqual(duplicate.pk, None)
+        self.assertEqual(models.GolfSolution.objects.count(), 1)
+        self.assertEqual(models.GolfSolution.objects.get().normalised_hash, '')
+        new = self.make_solution(solution_string_5x4_4, num_rounds=4)
+        self.assertEqual(new.save_unless_duplicate(), new)
+        self.assertEqual(models.GolfSolution.objects.count(), 2)
+        self.assertRaises(ValidationError, self.make_solution('1,2,3,4|1,5,6,7').save_unless_duplicate)
+
+
+class BulkSaveTests(TestCase):
+
+    def setUp(self):
+        self.instance = make_instance(5, 4)
+        self.submission_info = make_dummy_submission_info()
+
+    def make_bounds(self):
+        return [
+            models.GolfUpperBound(instance=self.instance, submission_info=self.submission_info, num_rounds=6),
+            models.GolfSolution(instance=self.instance, submission_info=self.submission_info, num_rounds=4, solution_string=solution_string_5x4_4),
+            models.GolfLowerBound(instance=self.instance, submission_info=self.submission_info, num_rounds=5),
+            models.GolfSolution(instance=self.instance, submission_info=self.submission_info, num_rounds=3, solution_string=solution_string_5x4_3),
+        ]
+
+    def test_save_many(self):
+        """
+        save_many() should save bounds of all kinds, with the rows of each
+        table in the inheritance chain linked up, and update the summary
+        """
+        bounds = self.make_bounds()
+        self.assertEqual(models.GolfBound.save_many(bounds), bounds)
+        ids = [bound.id for bound in bounds]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(set(models.GolfBound.objects.values_list('id', flat=True)), set(ids))
+        self.assertEqual(models.GolfUpperBound.objects.get().id, ids[0])
+        self.assertEqual(set(models.GolfLowerBound.objects.values_list('id', flat=True)), set(ids[1:]))
+        self.assertEqual(models.GolfLowerBound.objects.get(id=ids[2]).as_solution(), None)
+        solution = models.GolfLowerBound.objects.get(id=ids[1]).as_solution()
+        self.assertEqual(solution.solution_string, solution_string_5x4_4)
+        # With nothing to compare it with
+        self.assertEqual(solution.normalised_solution_string, '')
+        self.assertEqual(bytes(solution.solution_data), schedule.Schedule.from_string(solution_string_5x4_4).to_bytes())
+        summary = models.GolfInstanceSummary.objects.get(instance=self.instance)
+        self.assertEqual((summary.lower_bound_rounds, summary.upper_bound_rounds), (5, 6))
+
+    def test_save_many_duplicates(self):
+        """
+        save_many() should not save solutions equivalent to existing ones or
+        to earlier ones in the batch
+        """
+        existing = models.GolfSolution(instance=self.instance, submission_info=self.submission_info, num_rounds=3, solution_string=solution_string_5x4_3)
+        existing.save()
+        mapping = dict((player, 21 - player) for player in xrange(1, 21))
+        bounds = [
+            models.GolfSolution(instance=self.instance, submission_info=self.submission_info, num_rounds=3, solution_string=relabel_solution_string(solution_string_5x4_3, mapping)),
+            models.GolfSolution(instance=self.instance, submission_info=self.submission_info, num_rounds=4, solution_string=solution_string_5x4_4),
+            models.GolfSolution(instance=self.instance, submission_info=self.submission_info, num_rounds=4, solution_string=relabel_solution_string(solution_string_5x4_4, mapping)),
+        ]
+        saved = models.GolfBound.save_many(bounds)
+        self.assertEqual(saved, [existing, bounds[1], bounds[1]])
+        self.assertEqual(models.GolfSolution.objects.count(), 2)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Uses an SQLite trigger to save bounds concurrently')
+    def test_save_many_concurrent(self):
+        """
+        save_many() should find the IDs of the bounds it saves even if other
+        bounds are saved at the same time
+        """
+        other_submission_info = make_dummy_submission_info()
+        cursor = connection.cursor()
+        # Saves another bound straight after each of the batch's rows
+        cursor.execute(
+            'CREATE TEMP TRIGGER golf_concurrent_save AFTER INSERT ON golf_golfbound WHEN NEW.submission_info_id = %d BEGIN '
+            'INSERT INTO golf_golfbound (instance_id, submission_info_id, num_rounds, timestamp) VALUES (NEW.instance_id, %d, 7, NEW.timestamp); '
+            'END' % (self.submission_info.id, other_submission_info.id)
+        )
+        try:
+            bounds = models.GolfBound.save_many(self.make_bounds())
+        finally:
+            cursor.execute('DROP TRIGGER golf_concurrent_save')
+        self.assertEqual(models.GolfBound.objects.filter(submission_info=other_submission_info).count(), 4)
+        for bound in bounds:
+            self.assertEqual(models.GolfBound.objects.get(id=bound.id).submission_info_id, self.submission_info.id)
+        self.assertEqual(models.GolfUpperBound.objects.get().id, bounds[0].id)
+        self.assertEqual(models.GolfSolution.objects.get(num_rounds=4).solution_string, solution_string_5x4_4)
+
+    def test_save_many_invalid(self):
+        """
+        save_many() should save nothing if any solution is invalid
+        """
+        bounds = self.make_bounds()
+        bounds[3].solution_string = solution_string_5x4_4
+        self.assertRaises(ValidationError, models.GolfBound.save_many, bounds)
+        self.assertEqual(models.GolfBound.objects.count(), 0)
+
+
+class GolfInstanceSummaryTests(TestCase):
+
+    def setUp(self):
+        self.instance_5x4 = make_instance(5, 4)
+
+    def get_summary(self):
+        return models.GolfInstanceSummary.objects.get(instance=self.instance_5x4)
+
+    def test_summary_created_with_instance(self):
+        """
+        Saving a new instance should create an empty summary for it
+        """
+        summary = self.get_summary()
+        self.assertIsNone(summary.upper_bound_rounds)
+        self.assertIsNone(summary.lower_bound_rounds)
+        self.assertFalse(summary.has_solution)
+        self.assertFalse(summary.is_closed)
+        self.assertEqual(summary.bound_range, 'unknown')
+
+    def test_summary_tracks_saved_bounds(self):
+        """
+        The summary should be updated as bounds and solutions are saved, and
+        agree with the instance's own bound resolution
+        """
+        models.GolfUpperBound(
+            instance=self.instance_5x4,
+            num_rounds=6,
+            submission_info=make_dummy_submission_info(),
+        ).save()
+        models.GolfLowerBound(
+            instance=self.instance_5x4,
+            num_rounds=4,
+            submission_info=make_dummy_submission_info(),
+        ).save()
+        summary = self.get_summary()
+        self.assertEqual(summary.upper_bound_rounds, 6)
+        self.assertEqual(summary.lower_bound_rounds, 4)
+        self.assertFalse(summary.has_solution)
+        self.assertEqual(summary.bound_range, '4 - 6')
+
+        solution = models.GolfSolution(
+            instance=self.instance_5x4,
+            num_rounds=4,
+            submission_info=make_dummy_submission_info(),
+            solution_string=solution_string_5x4_4,
+        )
+        solution.save()
+        models.GolfUpperBound(
+            instance=self.instance_5x4,
+            num_rounds=4,
+            submission_info=make_dummy_submission_info(),
+        ).save()
+        summary = self.get_summary()
+        self.assertTrue(summary.has_solution)
+        self.assertEqual(summary.lower_bound.as_solution(), solution)
+        self.assertTrue(summary.is_closed)
+        self.assertEqual(summary.bound_range, self.instance_5x4.bound_range)
+
+    def test_summary_tracks_deleted_bounds(self):
+        """
+        The summary should be updated when bounds are deleted, including by
+        cascading deletes
+        """
+        submission_info = make_dummy_submission_info()
+        models.GolfSolution(
+            instance=self.instance_5x4,
+            num_rounds=5,
+            submission_info=submission_info,
+            solution_string=solution_string_5x4_5,
+        ).save()
+        models.GolfLowerBound(
+            instance=self.instance_5x4,
+            num_rounds=3,
+            submission_info=make_dummy_submission_info(),
+        ).save()
+        self.assertEqual(self.get_summary().lower_bound_rounds, 5)
+        submission_info.delete()
+        summary = self.get_summary()
+        self.assertEqual(summary.lower_bound_rounds, 3)
+        self.assertFalse(summary.has_solution)
+
+
+class BoundChangesFeedTests(TestCase):
+
+    def setUp(self):
+        self.instance_5x4 = make_instance(5, 4)
+        self.upper = models.GolfUpperBound(instance=self.instance_5x4, num_rounds=6, submission_info=make_dummy_submission_info())
+        self.upper.save()
+        self.solution = models.GolfSolution(
+            instance=self.instance_5x4,
+            num_rounds=4,
+            submission_info=make_dummy_submission_info(),
+            solution_string=solution_string_5x4_4,
+        )
+        self.solution.save()
+
+    def tearDown(self):
+        constructions.clear_submission_infos()
+
+    def summarise(self, changes):
+        return [(change['change'], change.get('kind'), change['id']) for change in changes]
+
+    def test_additions_and_deletions(self):
+        """
+        The feed should report the bounds added in order, and after a cursor
+        only later changes, with deletions by bound ID
+        """
+        changes = list(feed.bound_changes())
+        self.assertEqual(self.summarise(changes), [('added', 'upper', self.upper.id), ('added', 'solution', self.solution.id)])
+        self.assertEqual(changes[1]['solution_string'], solution_string_5x4_4)
+        self.assertEqual((changes[1]['num_groups'], changes[1]['group_size']), (5, 4))
+        cursor = feed.parse_cursor(changes[-1]['cursor'])
+        self.assertEqual(list(feed.bound_changes(cursor)), [])
+        lower = models.GolfLowerBound(instance=self.instance_5x4, num_rounds=3, submission_info=make_dummy_submission_info())
+        lower.save()
+        self.upper.delete()
+        self.assertEqual(self.summarise(feed.bound_changes(cursor)), [('added', 'lower', lower.id), ('deleted', None, self.upper.id)])
+
+    def test_same_timestamp(self):
+        """
+        Changes made at the same time as the last one seen should still be
+        reported after its cursor
+        """
+        cursor = feed.parse_cursor(list(feed.bound_changes())[-1]['cursor'])
+        lower = models.GolfLowerBound(instance=self.instance_5x4, num_rounds=3, submission_info=make_dummy_submission_info())
+        lower.save()
+        models.GolfBound.objects.filter(pk=lower.pk).update(timestamp=self.solution.timestamp)
+        self.assertEqual(self.summarise(feed.bound_changes(cursor)), [('added', 'lower', lower.id)])
+
+    def test_deleted_and_added_again(self):
+        """
+        A bound deleted and another added between two requests should both be
+        reported, even if the new bound gets the deleted one's ID (as SQLite
+        reuses the highest ID after it is deleted)
+        """
+        cursor = feed.parse_cursor(list(feed.bound_changes())[-1]['cursor'])
+        solution_id = self.solution.id
+        self.solution.delete()
+        lower = models.GolfLowerBound(instance=self.instance_5x4, num_rounds=3, submission_info=make_dummy_submission_info())
+        lower.save()
+        self.assertEqual(self.summarise(feed.bound_changes(cursor)), [('deleted', None, solution_id), ('added', 'lower', lower.id)])
+        # From the start, the addition of the deleted solution is left out
+        self.assertEqual(
+            self.summarise(feed.bound_changes()),
+            [('added', 'upper', self.upper.id), ('deleted', None, solution_id), ('added', 'lower', lower.id)],
+        )
+
+    def test_bulk_saved(self):
+        """
+        Bounds saved in bulk should be reported
+        """
+        cursor = feed.parse_cursor(list(feed.bound_changes())[-1]['cursor'])
+        bounds = models.GolfBound.save_many([
+            models.GolfUpperBound(instance=self.instance_5x4, num_rounds=5, submission_info=make_dummy_submission_info()),
+            models.GolfSolution(instance=self.instance_5x4, num_rounds=3, submission_info=make_dummy_submission_info(), solution_string=solution_string_5x4_3),
+        ])
+        changes = list(feed.bound_changes(cursor))
+        self.assertEqual(self.summarise(changes), [('added', 'upper', bounds[0].id), ('added', 'solution', bounds[1].id)])
+        self.assertEqual(changes[1]['solution_string'], solution_string_5x4_3)
+
+    def test_invalid_cursor(self):
+        """
+        parse_cursor() should only accept cursors as given with the changes
+        """
+        self.assertEqual(feed.parse_cursor('12'), 12)
+        for string in ('', '12:3', '-3', '2014-01-01T00:00:00'):
+            self.assertRaises(ValueError, feed.parse_cursor, string)
+
+    def test_cleared_constructions(self):
+        """
+        Clearing a constructor's constructions should report the deletions of
+        them in the feed
+        """
+        constructor = constructions.TrivialSolutionConstructor()
+        construction = constructor.construct(self.instance_5x4)
+        cursor = feed.parse_cursor(list(feed.bound_changes())[-1]['cursor'])
+        constructor.clear_constructions()
+        self.assertEqual(self.summarise(feed.bound_changes(cursor)), [('deleted', None, construction.id)])
+
+    def test_view_and_command(self):
+        """
+        The feed should be available as JSON from the view and the command,
+        with a cursor for the next request
+        """
+        response = self.client.get(reverse('golf:bound_changes_json'))
+        result = json.loads(''.join(response.streaming_content))
+        self.assertEqual(self.summarise(result['changes']), [('added', 'upper', self.upper.id), ('added', 'solution', self.solution.id)])
+        self.assertEqual(result['cursor'], result['changes'][-1]['cursor'])
+        response = self.client.get(reverse('golf:bound_changes_json'), {'since': result['cursor']})
+        self.assertEqual(json.loads(''.join(response.streaming_content)), {'changes': [], 'cursor': result['cursor']})
+        self.assertEqual(self.client.get(reverse('golf:bound_changes_json'), {'since': 'yesterday'}).status_code, 400)
+        output = StringIO()
+        call_command('bound_changes', since=result['changes'][0]['cursor'], stdout=output)
+        self.assertEqual(self.summarise(json.loads(output.getvalue())['changes']), [('added', 'solution', self.solution.id)])
+
+
 class ConstructorMethodTests(TestCase):
 
+    def tearDown(self):
+        # The test's database changes are rolled back, so forget about any
+        # SubmissionInfo records made
+        constructions.clear_submission_infos()
+
     def construct(self, num_groups, group_size):
         """
         Run the constructor's construct() method on the instance with the given
@@ -768,6 +1739,41 @@ class TrivialSolutionConstructorMethodTests(ConstructorMethodTests):
         self.do_test(8, 5)
         self.do_test(8, 8)
 
+    def test_construct_records_run(self):
+        """
+        construct() should record the cost of the construction against the
+        constructor
+        """
+        construction = self.construct(5, 4)
+        run = models.ConstructionRun.objects.get()
+        self.assertEqual(run.construction_id, self.constructor.id)
+        self.assertEqual(run.instance_id, construction.instance_id)
+        self.assertTrue(run.produced)
+        self.assertEqual(run.output_size, len(construction.solution_string))
+        self.assertGreaterEqual(run.construct_time, 0)
+        self.assertGreaterEqual(run.construct_cpu_time, 0)
+        self.assertGreaterEqual(run.save_time, 0)
+        if constructions.resource is not None:
+            self.assertGreater(run.peak_memory, 0)
+        self.assertGreaterEqual(run.peak_memory_growth, 0)
+        self.assertLessEqual(run.peak_memory_growth, run.peak_memory)
+
+    @skipUnless(constructions.resource is not None, 'Needs the resource module to measure memory use')
+    def test_construct_records_peak_memory_growth(self):
+        """
+        A construction using more memory than the process has so far should
+        record how much it raised the peak
+        """
+        class HungryConstructor(constructions.TrivialSolutionConstructor):
+            def do_construct(self, instance):
+                # More than the peak so far, so it must raise it
+                bytearray((constructions._usage()[2] + 16 * 1024) * 1024)
+                return super(HungryConstructor, self).do_construct(instance)
+
+        HungryConstructor().construct(make_instance(5, 4))
+        run = models.ConstructionRun.objects.get()
+        self.assertGreaterEqual(run.peak_memory_growth, 16 * 1024)
+
 
 class TrivialUpperBoundConstructorMethodTests(ConstructorMethodTests):
 
@@ -796,6 +1802,298 @@ class TrivialUpperBoundConstructorMethodTests(ConstructorMethodTests):
         self.do_test(8, 8, 9)
 
 
+class RoundExtensionConstructorMethodTests(ConstructorMethodTests):
+
+    def setUp(self):
+        self.constructor = constructions.RoundExtensionConstructor()
+
+    def save_solution(self, num_groups, group_size, solution_string):
+        models.GolfSolution(
+            instance=models.GolfInstance.objects.get_or_create_many([(num_groups, group_size)])[0],
+            num_rounds=solution_string.count('\n') + 1,
+            submission_info=make_dummy_submission_info(),
+            solution_string=solution_string,
+        ).save()
+
+    def test_construct(self):
+        """
+        construct() should extend the best stored solution by a round
+        """
+        self.save_solution(5, 4, solution_string_5x4_3)
+        self.save_solution(5, 4, solution_string_5x4_4)
+        construction = self.constructor.construct(models.GolfInstance.objects.get(num_groups=5, group_size=4))
+        self.assertIsInstance(construction, models.GolfSolution)
+        self.assertEqual(construction.num_rounds, 5)
+        self.assertEqual(construction.solution[:4], models.GolfSolution.solution_string_to_array(solution_string_5x4_4))
+        self.assertIsNone(self.construct(4, 3))
+
+    def test_extend_trivial_solutions(self):
+        """
+        construct() should extend the trivial solutions of some small
+        instances
+        """
+        for num_groups, group_size in ((2, 2), (5, 4), (6, 3)):
+            instance = make_instance(num_groups, group_size)
+            constructions.TrivialSolutionConstructor().construct(instance)
+            construction = self.constructor.construct(instance)
+            self.assertEqual(construction.num_rounds, 3)
+
+    def test_complete_solution(self):
+        """
+        construct() should not extend a solution in which every pair of
+        players has met
+        """
+        self.save_solution(2, 2, '0,1|2,3\n0,2|1,3\n0,3|1,2')
+        self.assertIsNone(self.constructor.construct(models.GolfInstance.objects.get(num_groups=2, group_size=2)))
+
+
+class RoundRobinConstructorMethodTests(ConstructorMethodTests):
+
+    def setUp(self):
+        self.constructor = constructions.RoundRobinConstructor()
+
+    def test_construct(self):
+        """
+        construct() should make a solution in which every pair meets, for
+        groups of two only
+        """
+        for num_groups in (2, 3, 10):
+            construction = self.construct(num_groups, 2)
+            self.assertEqual(construction.num_rounds, 2 * num_groups - 1)
+            self.assertEqual(construction.schedule.meetings.num_unmet_pairs, 0)
+        self.assertIsNone(self.construct(3, 3))
+
+
+class AffineGeometryConstructorMethodTests(ConstructorMethodTests):
+
+    def setUp(self):
+        self.constructor = constructions.AffineGeometryConstructor()
+
+    def test_construct(self):
+        """
+        construct() should make a solution in which every pair meets, for
+        q^(m-1) groups of size q
+        """
+        for num_groups, group_size, num_rounds in ((3, 3, 4), (4, 4, 5), (9, 3, 13), (16, 4, 21)):
+            construction = self.construct(num_groups, group_size)
+            self.assertEqual(construction.num_rounds, num_rounds)
+            self.assertEqual(construction.schedule.meetings.num_unmet_pairs, 0)
+        for num_groups, group_size in ((2, 2), (6, 6), (5, 4), (8, 3)):
+            self.assertIsNone(self.construct(num_groups, group_size))
+
+
+class TransversalDesignConstructorMethodTests(ConstructorMethodTests):
+
+    def setUp(self):
+        self.constructor = constructions.TransversalDesignConstructor()
+
+    def test_construct(self):
+        """
+        construct() should make a q-round solution for q groups of size less
+        than q
+        """
+        for num_groups, group_size in ((4, 3), (5, 4), (8, 5), (9, 8)):
+            construction = self.construct(num_groups, group_size)
+            self.assertEqual(construction.num_rounds, num_groups)
+        for num_groups, group_size in ((5, 2), (5, 5), (6, 3)):
+            self.assertIsNone(self.construct(num_groups, group_size))
+
+
+class FiniteFieldTests(TestCase):
+
+    def test_prime_power(self):
+        """
+        prime_power() should factor prime powers, and only them
+        """
+        self.assertEqual(finite_fields.prime_power(2), (2, 1))
+        self.assertEqual(finite_fields.prime_power(13), (13, 1))
+        self.assertEqual(finite_fields.prime_power(16), (2, 4))
+        self.assertEqual(finite_fields.prime_power(27), (3, 3))
+        for n in (0, 1, 6, 12, 20):
+            self.assertIsNone(finite_fields.prime_power(n))
+
+    def test_field(self):
+        """
+        The tables should satisfy the field axioms
+        """
+        for order in (2, 4, 5, 8, 9):
+            field = finite_fields.finite_field(order)
+            add, mul = field.add, field.mul
+            elements = range(order)
+            for a in elements:
+                self.assertEqual(add[a][0], a)
+                self.assertEqual(mul[a][1], a)
+                self.assertEqual(add[a][field.neg[a]], 0)
+                if a:
+                    self.assertEqual(mul[a][field.inv[a]], 1)
+                for b in elements:
+                    self.assertEqual(add[a][b], add[b][a])
+                    self.assertEqual(mul[a][b], mul[b][a])
+                    for c in elements:
+                        self.assertEqual(mul[a][add[b][c]], add[mul[a][b]][mul[a][c]])
+                        self.assertEqual(mul[a][mul[b][c]], mul[mul[a][b]][c])
+
+    def test_cached(self):
+        """
+        finite_field() should make each field once, and only for prime powers
+        """
+        self.assertIs(finite_fields.finite_field(7), finite_fields.finite_field(7))
+        self.assertRaises(ValueError, finite_fields.finite_field, 6)
+
+
+class LocalSearchConstructorMethodTests(ConstructorMethodTests):
+
+    def setUp(self):
+        self.constructor = constructions.LocalSearchConstructor(num_rounds=5, seed=1)
+
+    def test_construct(self):
+        """
+        construct() should find and save a valid solution with the target
+        number of rounds
+        """
+        construction = self.construct(5, 4)
+        self.assertIsInstance(construction, models.GolfSolution)
+        self.assertIsNotNone(construction.pk)
+        self.assertEqual(construction.num_rounds, 5)
+        construction.full_clean()
+
+    def test_repeatable(self):
+        """
+        do_construct() should find the same solution each time for the same
+        seed and iteration limit, without a time limit
+        """
+        self.constructor = constructions.LocalSearchConstructor(num_rounds=5, seed=1, time_limit=None)
+        instance = make_instance(5, 4)
+        self.assertEqual(self.constructor.do_construct(instance).solution_string, self.constructor.do_construct(instance).solution_string)
+
+    def test_default_target(self):
+        """
+        By default construct() should look for a solution with one more round
+        than the best lower bound
+        """
+        self.constructor = constructions.LocalSearchConstructor(seed=1)
+        self.assertTrue(self.constructor.uses_database)
+        instance = make_instance(6, 3)
+        self.assertEqual(self.constructor.construct(instance).num_rounds, 2)
+        constructions.TrivialSolutionConstructor().construct(instance)
+        self.assertEqual(self.constructor.construct(instance).num_rounds, 3)
+
+    def test_not_found(self):
+        """
+        construct() should return None if there can't be a solution or the
+        search gives up
+        """
+        self.assertIsNone(self.construct(3, 3))
+        self.constructor = constructions.LocalSearchConstructor(num_rounds=6, seed=1, max_iterations=10)
+        self.assertIsNone(self.construct(5, 5))
+        self.assertFalse(models.GolfSolution.objects.exists())
+
+    def test_command(self):
+        """
+        The search_solution command should save the solution found
+        """
+        output = StringIO()
+        call_command('search_solution', '5', '3', rounds=6, stdout=output)
+        self.assertIn('Found a 6-round solution', output.getvalue())
+        self.assertEqual(models.GolfSolution.objects.get().num_rounds, 6)
+
+    def test_command_invalid_instance(self):
+        """
+        The search_solution command should reject instances which can't be
+        saved, without making them
+        """
+        for args in (('3', '5'), ('1', '1'), ('5', '1')):
+            self.assertRaises(CommandError, call_command, 'search_solution', *args, stdout=StringIO())
+        self.assertFalse(models.GolfInstance.objects.exists())
+
+
+class ExactCoverTests(TestCase):
+
+    # Knuth's example, with the columns numbered from 0
+    rows = [[2, 4, 5], [0, 3, 6], [1, 2, 5], [0, 3], [1, 6], [3, 4, 6]]
+
+    def test_solve(self):
+        """
+        solve() should find the exact cover
+        """
+        problem = dlx.ExactCover(7, self.rows)
+        self.assertEqual(sorted(problem.solve()), [0, 3, 4])
+        # And leave the problem as it was
+        self.assertEqual(sorted(problem.solve()), [0, 3, 4])
+
+    def test_no_solution(self):
+        """
+        solve() should return None if there is no exact cover
+        """
+        self.assertIsNone(dlx.ExactCover(7, self.rows[1:]).solve())
+        self.assertIsNone(dlx.ExactCover(3, [[0, 1], [1, 2]]).solve())
+
+    def test_search_limit(self):
+        """
+        solve() should give up after the given number of nodes, leaving the
+        problem as it was
+        """
+        problem = dlx.ExactCover(7, self.rows)
+        self.assertRaises(dlx.SearchLimitReached, problem.solve, max_nodes=1)
+        self.assertEqual(sorted(problem.solve()), [0, 3, 4])
+
+
+class TabuSearchTests(TestCase):
+
+    def test_swap_delta(self):
+        """
+        swap_delta() should give the change in the number of conflicts made by
+        swap(), which should keep the meeting counts up to date
+        """
+        search = local_search.TabuSearch(6, 5, 4, seed=1)
+        rng = search.rng
+        for n in xrange(50):
+            r = rng.randrange(1, 6)
+            x, y = rng.sample(xrange(20), 2)
+            if search.group_of[r][x] == search.group_of[r][y]:
+                continue
+            conflicts = search.num_conflicts
+            delta = search.swap_delta(r, x, y)
+            search.swap(r, x, y)
+            self.assertEqual(search.num_conflicts, conflicts + delta)
+        counts = [0] * 400
+        for round in search.groups:
+            for group in round:
+                for p in group:
+                    for q in group:
+                        if p != q:
+                            counts[p * 20 + q] += 1
+        self.assertEqual(search.counts, counts)
+        self.assertEqual(search.num_conflicts, sum(count - 1 for count in counts if count > 1) / 2)
+
+    def test_run(self):
+        """
+        run() should find a schedule without conflicts, the same one each time
+        for the same seed (without a time limit)
+        """
+        solution = local_search.TabuSearch(5, 5, 3, seed=1).run(time_limit=None)
+        validation.validate_schedule(solution, 5, 5, 3)
+        self.assertEqual(solution.tolist(), local_search.TabuSearch(5, 5, 3, seed=1).run(time_limit=None).tolist())
+
+    def test_limits(self):
+        """
+        run() should give up after the given number of iterations or time
+        """
+        # Each player can only meet 11 others, two at a time
+        self.assertIsNone(local_search.TabuSearch(6, 4, 3, seed=1).run(max_iterations=20))
+        self.assertIsNone(local_search.TabuSearch(6, 4, 3, seed=1).run(time_limit=0.01))
+
+    def test_time_limit_large(self):
+        """
+        run() should stop soon after the time limit even when looking for a
+        move takes a long time
+        """
+        search = local_search.TabuSearch(4, 20, 20, seed=1)
+        start = time.time()
+        search.run(time_limit=0.5)
+        self.assertLess(time.time() - start, 1.5)
+
+
 class ConstructorsMethodTests(ConstructorMethodTests):
 
     def setUp(self):
@@ -841,6 +2139,20 @@ class ConstructorsMethodTests(ConstructorMethodTests):
         self.check_instance_in_instances(20, 2, instances)
         self.check_instance_in_instances(20, 20, instances)
 
+    def test_instances_bulk(self):
+        """
+        instances() should return the instances in order, with summaries for
+        those it creates, reading existing instances in a single query
+        """
+        instances = self.constructors.instances
+        self.assertEqual(
+            [(instance.num_groups, instance.group_size) for instance in instances],
+            sorted((instance.num_groups, instance.group_size) for instance in instances),
+        )
+        self.assertEqual(models.GolfInstanceSummary.objects.filter(instance__in=instances).count(), len(instances))
+        with self.assertNumQueries(1):
+            self.assertEqual(constructions.Constructors().instances, instances)
+
     def test_instances_already_run(self):
         """
         instances() should return the same instances if it's already been run
@@ -892,10 +2204,318 @@ class ConstructorsMethodTests(ConstructorMethodTests):
         self.constructors.construct_all()
         self.check_all_constructions()
 
+    def get_constructions(self):
+        """
+        Returns a summary of the constructed solutions/bounds, in the order
+        they were saved
+        """
+        return (
+            [(bound.instance_id, bound.num_rounds) for bound in models.GolfUpperBound.objects.order_by('id')],
+            [(solution.instance_id, solution.num_rounds, solution.solution_string) for solution in models.GolfSolution.objects.order_by('id')],
+        )
+
+    def test_construct_all_parallel(self):
+        """
+        Check that calling construct_all() with a pool of processes results in
+        the same constructions as a serial run, saved in the same order
+        """
+        self.constructors._instances = self.constructors.instances[:40]
+        self.constructors.construct_all()
+        serial = self.get_constructions()
+        # One upper bound each, and the trivial solution each plus those of
+        # the other constructions (which don't depend on how long they take)
+        self.assertEqual([len(bounds) for bounds in serial], [40, 78])
+        self.constructors.construct_all(processes=2)
+        self.assertEqual(self.get_constructions(), serial)
+
+    def get_bound_ids(self, constructor):
+        return set(models.GolfBound.objects.filter(submission_info__construction__id=constructor.id).values_list('id', flat=True))
+
+    def test_resolve_submission_infos(self):
+        """
+        The submission information for all the constructors should be looked
+        up together, and then remembered
+        """
+        constructors = self.constructors.constructors
+        constructions.resolve_submission_infos(constructors)
+        with self.assertNumQueries(4):
+            constructions.resolve_submission_infos(constructors, refresh=True)
+        with self.assertNumQueries(0):
+            submission_infos = [constructor.submission_info for constructor in constructors]
+        self.assertEqual(submission_infos[0].construction.id, 'golf_trivial_solution_constructor')
+        self.assertEqual(submission_infos[1].construction.id, 'golf_trivial_upper_bound_constructor')
+        self.assertEqual(submission_infos[-1].construction.id, 'golf_round_extension_constructor')
+        self.assertEqual(models.SubmissionInfo.objects.count(), len(constructors))
+
+    def test_resolve_deleted_submission_infos(self):
+        """
+        Submission information in the registry whose records have been
+        deleted from the database should be looked up again
+        """
+        constructor = self.constructors.constructors[0]
+        submission_info = constructor.submission_info
+        # Checked in a single query while they are still there
+        with self.assertNumQueries(1):
+            constructions.resolve_submission_infos([constructor])
+        models.ConstructionInfo.objects.filter(id=constructor.id).delete()
+        constructions.resolve_submission_infos([constructor])
+        self.assertIsNot(constructor.submission_info, submission_info)
+        self.assertTrue(models.SubmissionInfo.objects.filter(id=constructor.submission_info.id).exists())
+        # And construct_all() checks them all once per run
+        models.ConstructionInfo.objects.filter(id=constructor.id).delete()
+        self.constructors._instances = self.constructors.instances[:2]
+        self.constructors._constructors = [constructor]
+        self.constructors.construct_all()
+        self.assertEqual(set(bound.submission_info_id for bound in models.GolfBound.objects.all()), set([constructor.submission_info.id]))
+
+    def test_construct_all_incremental(self):
+        """
+        Check that an incremental construct_all() keeps existing constructions
+        and only runs constructors on new instances
+        """
+        instances = self.constructors.instances
+        self.constructors._instances = instances[:10]
+        self.constructors.construct_all()
+        solution_constructor, bound_constructor = self.constructors.constructors[:2]
+        solution_ids = self.get_bound_ids(solution_constructor)
+        bound_ids = self.get_bound_ids(bound_constructor)
+        self.constructors.construct_all(incremental=True)
+        self.assertEqual(self.get_bound_ids(solution_constructor), solution_ids)
+        self.assertEqual(self.get_bound_ids(bound_constructor), bound_ids)
+        self.constructors._instances = instances[:12]
+        self.constructors.construct_all(incremental=True)
+        self.assertEqual(len(self.get_bound_ids(solution_constructor)), 12)
+        self.assertTrue(self.get_bound_ids(solution_constructor).issuperset(solution_ids))
+        self.assertEqual(len(self.get_bound_ids(bound_constructor)), 12)
+        self.assertTrue(self.get_bound_ids(bound_constructor).issuperset(bound_ids))
+        self.assertEqual(models.ConstructionInfo.objects.get(id=solution_constructor.id).max_instance_id, max(instance.id for instance in instances[:12]))
+
+    def test_construct_all_incremental_failure(self):
+        """
+        Check that if a constructor fails part way through an incremental
+        construct_all(), the chunks saved before the failure are kept and
+        recorded as constructed, so another incremental construct_all()
+        neither skips nor repeats any instances
+        """
+        instances = self.constructors.instances
+        self.constructors._instances = instances[:10]
+        self.constructors.construct_all()
+        bound_constructor = self.constructors.constructors[1]
+        bound_ids = self.get_bound_ids(bound_constructor)
+        failing_instance_id = instances[30].id
+
+        class FailingConstructor(constructions.TrivialUpperBoundConstructor):
+            def do_construct(self, instance):
+                # In the second chunk, after the first has been saved
+                if instance.id == failing_instance_id:
+                    raise ValueError('Failed')
+                return super(FailingConstructor, self).do_construct(instance)
+
+        self.constructors._instances = instances[:40]
+        self.constructors._constructors = [FailingConstructor()]
+        self.assertRaises(ValueError, self.constructors.construct_all, incremental=True)
+        first_chunk = instances[10:10 + constructions.CONSTRUCT_CHUNK_SIZE]
+        self.assertEqual(len(self.get_bound_ids(bound_constructor)), 10 + len(first_chunk))
+        self.assertTrue(self.get_bound_ids(bound_constructor).issuperset(bound_ids))
+        self.assertEqual(models.ConstructionInfo.objects.get(id=bound_constructor.id).max_instance_id, max(instance.id for instance in first_chunk))
+        self.constructors._constructors = [bound_constructor]
+        self.constructors.construct_all(incremental=True)
+        self.assertEqual(
+            sorted(models.GolfBound.objects.filter(submission_info__construction=bound_constructor.id).values_list('instance_id', flat=True)),
+            sorted(instance.id for instance in instances[:40]),
+        )
+
+    def test_construct_all_rebuild_failure(self):
+        """
+        Check that the existing constructions are kept until a constructor
+        has been run on all the instances, and that if it fails part way
+        through, an incremental construct_all() runs it on all of them again
+        """
+        instances = self.constructors.instances
+        bound_constructor = self.constructors.constructors[1]
+        self.constructors._instances = instances[:40]
+        self.constructors._constructors = [bound_constructor]
+        self.constructors.construct_all()
+        bound_ids = self.get_bound_ids(bound_constructor)
+        failing_instance_id = instances[30].id
+
+        class FailingConstructor(constructions.TrivialUpperBoundConstructor):
+            def do_construct(self, instance):
+                if instance.id == failing_instance_id:
+                    raise ValueError('Failed')
+                return super(FailingConstructor, self).do_construct(instance)
+
+        self.constructors._constructors = [FailingConstructor()]
+        self.assertRaises(ValueError, self.constructors.construct_all)
+        self.assertTrue(self.get_bound_ids(bound_constructor).issuperset(bound_ids))
+        self.assertEqual(models.ConstructionInfo.objects.get(id=bound_constructor.id).max_instance_id, 0)
+        self.constructors._constructors = [bound_constructor]
+        self.constructors.construct_all(incremental=True)
+        self.assertFalse(self.get_bound_ids(bound_constructor) & bound_ids)
+        self.assertEqual(
+            sorted(models.GolfBound.objects.filter(submission_info__construction=bound_constructor.id).values_list('instance_id', flat=True)),
+            sorted(instance.id for instance in instances[:40]),
+        )
+
+    def test_construct_all_incremental_new_version(self):
+        """
+        Check that an incremental construct_all() replaces the constructions
+        of a constructor whose version has changed, and only those
+        """
+        self.constructors._instances = self.constructors.instances[:10]
+        self.constructors.construct_all()
+        solution_constructor, bound_constructor = self.constructors.constructors[:2]
+        solution_ids = self.get_bound_ids(solution_constructor)
+        bound_ids = self.get_bound_ids(bound_constructor)
+        bound_constructor.version = 2
+        self.constructors.construct_all(incremental=True)
+        self.assertEqual(len(self.get_bound_ids(bound_constructor)), 10)
+        self.assertFalse(self.get_bound_ids(bound_constructor) & bound_ids)
+        self.assertEqual(self.get_bound_ids(solution_constructor), solution_ids)
+        self.assertEqual(models.ConstructionInfo.objects.get(id=bound_constructor.id).version, 2)
+
+    def test_construct_all_records_runs(self):
+        """
+        construct_all() should record a run for each constructor and
+        instance, replaced when the constructions are redone, and reportable
+        slowest first
+        """
+        self.constructors._instances = self.constructors.instances[:10]
+        self.constructors.construct_all()
+        self.constructors.construct_all()
+        solution_constructor, bound_constructor = self.constructors.constructors[:2]
+        for constructor in (solution_constructor, bound_constructor):
+            runs = models.ConstructionRun.objects.filter(construction_id=constructor.id)
+            self.assertEqual(sorted(run.instance_id for run in runs), sorted(instance.id for instance in self.constructors.instances))
+            self.assertTrue(all(run.produced for run in runs))
+        self.assertTrue(all(run.output_size == 0 for run in models.ConstructionRun.objects.filter(construction_id=bound_constructor.id)))
+        report = list(models.ConstructionRun.report(solution_constructor.id, min_num_groups=4))
+        self.assertTrue(report)
+        self.assertTrue(all(run.construction_id == solution_constructor.id and run.instance.num_groups >= 4 for run in report))
+        totals = [run.total_time for run in report]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+        output = StringIO()
+        call_command('construction_report', constructor=solution_constructor.id, limit=3, stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 4)
+
+
+class BenchmarkTests(TestCase):
+
+    def tearDown(self):
+        constructions.clear_submission_infos()
+
+    def test_generate_solution(self):
+        """
+        The generated solutions should be valid, with all the rounds possible
+        when the number of groups is prime
+        """
+        for num_groups, group_size in ((4, 3), (5, 4), (8, 4), (13, 13)):
+            array = benchmarks.generate_solution(num_groups, group_size)
+            validation.validate_solution_array(array, len(array), num_groups, group_size)
+        self.assertEqual(len(benchmarks.generate_solution(13, 13)), 13)
+
+    def test_run_benchmarks(self):
+        """
+        Each selected benchmark should be run, with a result for each size
+        """
+        results = benchmarks.run_benchmarks(sizes=[(4, 3), (5, 4)], construct_all_sizes=[3], names=['validate', 'construct_all'], min_time=0, repeat=1)
+        self.assertEqual(
+            sorted(results['results']),
+            ['construct_all[up to 3x3]', 'validate_solution_string[4x3]', 'validate_solution_string[5x4]'],
+        )
+
+    def test_compare_results(self):
+        """
+        Benchmarks sufficiently slower than the baseline should be flagged
+        """
+        baseline = {'results': {'a[1]': {'seconds': 1.0}, 'b[1]': {'seconds': 2.0}, 'c[1]': {'seconds': 1.0}}}
+        results = {'results': {'a[1]': {'seconds': 1.05}, 'b[1]': {'seconds': 3.0}, 'd[1]': {'seconds': 1.0}}}
+        self.assertEqual(
+            benchmarks.compare_results(results, baseline, 1.1),
+            [('a[1]', 1.0, 1.05, 1.05, False), ('b[1]', 2.0, 3.0, 1.5, True)],
+        )
+
+
+class RequestStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        middleware.request_stats.clear()
+        make_instance(5, 4)
+
+    def tearDown(self):
+        middleware.request_stats.clear()
+
+    def get_summary(self):
+        return dict((view, (count, dict((metric, (p50, p95, max_value)) for metric, p50, p95, max_value in metric_summaries))) for view, count, metric_summaries in middleware.request_stats.summary())
+
+    def test_requests_recorded(self):
+        """
+        Requests to the index and detail views should have their statistics
+        recorded
+        """
+        self.client.get(reverse('golf:index'))
+        self.client.get(reverse('golf:index'))
+        self.client.get(reverse('golf:detail', args=(5, 4)))
+        summary = self.get_summary()
+        self.assertEqual(sorted(summary), ['golf:detail', 'golf:index'])
+        count, metrics = summary['golf:index']
+        self.assertEqual(count, 2)
+        # The second request is served from the cache, after reading the
+        # stamps
+        self.assertEqual(metrics['queries'], (1, 3, 3))
+        self.assertTrue(0 < metrics['render_time'][0] <= metrics['total_time'][0])
+        self.assertTrue(0 <= metrics['db_time'][0] <= metrics['total_time'][0])
+        self.assertEqual(summary['golf:detail'][0], 1)
+
+    def test_other_requests_not_recorded(self):
+        """
+        Requests to other views should not be recorded
+        """
+        self.client.get(reverse('golf:request_stats'))
+        self.client.get('/golf/nonexistent/')
+        self.assertEqual(middleware.request_stats.summary(), [])
+
+    def test_rolling_samples(self):
+        """
+        Only the most recent samples should be kept, and summarised by
+        percentile
+        """
+        stats = middleware.RequestStats(max_samples=20)
+        for n in xrange(30):
+            stats.record('view', queries=n, db_time=0.0, render_time=0.0, total_time=1.0)
+        [(view, count, metric_summaries)] = stats.summary()
+        self.assertEqual((view, count), ('view', 20))
+        self.assertEqual(metric_summaries[0], ('queries', 19, 28, 29))
+        self.assertEqual(metric_summaries[3], ('total_time', 1.0, 1.0, 1.0))
+
+    def test_request_stats_view(self):
+        """
+        The statistics should be shown to staff only
+        """
+        self.client.get(reverse('golf:index'))
+        response = self.client.get(reverse('golf:request_stats'))
+        self.assertNotContains(response, 'golf:index')
+        AuthUser.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        response = self.client.get(reverse('golf:request_stats'))
+        self.assertContains(response, 'golf:index')
+        response = self.client.post(reverse('golf:request_stats'), {'clear': 'Clear'})
+        self.assertContains(response, 'No requests recorded')
+
 
 class GolfIndexViewTests(TestCase):
     def setUp(self):
-        constructions.Constructors().construct_all()
+        # The cache isn't rolled back with the database
+        cache.clear()
+        # The views only need some bounds for every instance, so skip the
+        # slower constructions
+        constructors = constructions.Constructors()
+        constructors._constructors = constructors.constructors[:2]
+        constructors.construct_all()
+
+    def tearDown(self):
+        constructions.clear_submission_infos()
 
     def test_index_view(self):
         """
@@ -908,6 +2528,15 @@ class GolfIndexViewTests(TestCase):
         self.assertEqual(array[19][1].name, '20x2')
         self.assertEqual(array[19][19].name, '20x20')
 
+    def test_index_view_query_count(self):
+        """
+        Check that the index view fetches the whole grid without resolving
+        each instance's bounds separately
+        """
+        # The stamps, the instances and their summaries
+        with self.assertNumQueries(3):
+            self.client.get(reverse('golf:index'))
+
     def test_index_view_no_left_over_instances(self):
         """
         Check that the index view has no left over instances
@@ -928,3 +2557,133 @@ class GolfIndexViewTests(TestCase):
                     self.assertEqual(array[i][j].num_groups, array[i][0])
                     self.assertEqual(array[i][j].group_size, array[0][j])
 
+    def test_index_view_cached(self):
+        """
+        Check that the index view is served from the cache once it has been
+        rendered
+        """
+        first = self.client.get(reverse('golf:index'))
+        # Just the stamps
+        with self.assertNumQueries(1):
+            second = self.client.get(reverse('golf:index'))
+        self.assertEqual(second.content, first.content)
+
+    def test_index_view_cell_invalidation(self):
+        """
+        Check that saving a bound only changes the stamp of the cached cell
+        for its instance, which is rebuilt with the new bound
+        """
+        self.client.get(reverse('golf:index'))
+        instance = models.GolfInstance.objects.get(num_groups=5, group_size=4)
+        other = models.GolfInstance.objects.get(num_groups=6, group_size=4)
+        models.GolfUpperBound(instance=instance, num_rounds=5, submission_info=make_dummy_submission_info()).save()
+        stamps = dict(models.GolfInstanceSummary.objects.values_list('instance_id', 'last_modified'))
+        self.assertIsNone(cache.get(caching.index_cell_key(instance.id, caching.index_stamp(stamps[instance.id]))))
+        self.assertIsNotNone(cache.get(caching.index_cell_key(other.id, caching.index_stamp(stamps[other.id]))))
+        # The stamps and the summary for the changed cell
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('golf:index'))
+        self.assertContains(response, '>%s</a>' % models.GolfInstance.objects.get(pk=instance.pk).bound_range)
+
+    def test_index_view_cell_other_process(self):
+        """
+        Check that a cached cell is rebuilt when its instance's bounds are
+        changed without this process's signals (e.g. by another process)
+        """
+        self.client.get(reverse('golf:index'))
+        instance = models.GolfInstance.objects.get(num_groups=5, group_size=4)
+        summaries = models.GolfInstanceSummary.objects.filter(instance=instance)
+        summaries.update(upper_bound_rounds=5, last_modified=timezone.now() + datetime.timedelta(seconds=1))
+        response = self.client.get(reverse('golf:index'))
+        self.assertContains(response, '>%s</a>' % summaries.get().bound_range)
+
+    def test_index_view_new_instance(self):
+        """
+        Check that adding an instance changes the key of the cached list of
+        instances
+        """
+        self.client.get(reverse('golf:index'))
+        make_instance(21, 2)
+        response = self.client.get(reverse('golf:index'))
+        self.assertEqual(response.context['instance_array'][20][1].name, '21x2')
+
+    def test_index_view_not_modified(self):
+        """
+        Check that conditional requests for the index view are answered with
+        304 Not Modified until a bound changes
+        """
+        response = self.client.get(reverse('golf:index'))
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse('golf:index'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        last_modified = response['Last-Modified']
+        self.assertEqual(self.client.get(reverse('golf:index'), HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        instance = models.GolfInstance.objects.get(num_groups=5, group_size=4)
+        models.GolfUpperBound(instance=instance, num_rounds=5, submission_info=make_dummy_submission_info()).save()
+        response = self.client.get(reverse('golf:index'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_index_view_not_modified_other_process(self):
+        """
+        Check that the index view's freshness comes from the database, so
+        that changes made without this process's signals (e.g. by another
+        process) are seen
+        """
+        etag = self.client.get(reverse('golf:index'))['ETag']
+        instance = models.GolfInstance.objects.get(num_groups=5, group_size=4)
+        models.GolfInstanceSummary.objects.filter(instance=instance).update(last_modified=timezone.now() + datetime.timedelta(seconds=1))
+        self.assertEqual(self.client.get(reverse('golf:index'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_view_not_modified(self):
+        """
+        Check that conditional requests for the detail view are answered with
+        304 Not Modified, without resolving the bounds, until one of the
+        instance's bounds changes
+        """
+        url = reverse('golf:detail', args=(5, 4))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        other = models.GolfInstance.objects.get(num_groups=6, group_size=4)
+        models.GolfUpperBound(instance=other, num_rounds=6, submission_info=make_dummy_submission_info()).save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        instance = models.GolfInstance.objects.get(num_groups=5, group_size=4)
+        models.GolfUpperBound(instance=instance, num_rounds=5, submission_info=make_dummy_submission_info()).save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(reverse('golf:detail', args=(30, 4))).status_code, 404)
+
+    def test_bounds_json(self):
+        """
+        Check that the JSON bounds table streams every instance with its best
+        bounds and their citations
+        """
+        response = self.client.get(reverse('golf:bounds_json'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        table = json.loads(''.join(response.streaming_content))['instances']
+        instances = list(models.GolfInstance.objects.order_by('num_groups', 'group_size'))
+        self.assertEqual([(row['num_groups'], row['group_size']) for row in table], [(instance.num_groups, instance.group_size) for instance in instances])
+        instance = models.GolfInstance.objects.get(num_groups=5, group_size=4)
+        row = table[instances.index(instance)]
+        self.assertEqual(row['lower_bound'], instance.lower_bound.num_rounds)
+        self.assertEqual(row['upper_bound'], instance.upper_bound.num_rounds)
+        self.assertEqual(row['is_closed'], instance.is_closed)
+        self.assertEqual(row['has_solution'], instance.solution is not None)
+        self.assertEqual(row['lower_bound_citation'], instance.lower_bound.submission_info.citation_id)
+        self.assertEqual(row['upper_bound_citation'], instance.upper_bound.submission_info.citation_id)
+        self.assertEqual(self.client.get(reverse('golf:bounds_json'), HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_detail_view_solution(self):
+        """
+        Check that the detail view shows the rounds of the instance's solution
+        """
+        response = self.client.get(reverse('golf:detail', args=(5, 4)))
+        self.assertContains(response, '<td>0 1 2 3</td>')
+        self.assertContains(response, '<th>Round 2</th>')
+        instance = models.GolfInstance.objects.get(num_groups=5, group_size=4)
+        unmet = instance.solution.schedule.meetings.num_unmet_pairs
+        self.assertContains(response, '%d pairs of players never meet.' % unmet)
@@ -5,5 +5,8 @@ from golf import views
 urlpatterns = patterns('',
     url(r'^$', views.index, name='index'),
     url(r'^(?P<num_groups>\d+)x(?P<group_size>\d+)/$', views.detail, name='detail'),
+    url(r'^bounds\.json$', views.bounds_json, name='bounds_json'),
+    url(r'^changes\.json$', views.bound_changes_json, name='bound_changes_json'),
+    url(r'^request_stats/$', views.request_stats_view, name='request_stats'),
 )
 
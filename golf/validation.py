@@ -0,0 +1,373 @@
+from array import array
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+
+from golf.schedule import iter_rounds
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import gettext
+_ = gettext.gettext
+
+
+def find_meeting(rounds, i, j):
+    """
+    Returns the (group number, round number) of the first group in the given
+    rounds containing both players i and j, or (None, None) if there isn't
+    one
+    """
+    for round_index, round in enumerate(rounds):
+        for group_index, group in enumerate(round):
+            if i in group and j in group:
+                return group_index + 1, round_index + 1
+    return None, None
+
+
+class SolutionChecker(object):
+    """
+    Checks the rounds of a golf solution one at a time, raising a
+    ValidationError as soon as a round is found to be invalid.
+
+    Players can have any integer IDs; they are mapped to dense indices as they
+    are first seen.  Which pairs of players have met is kept as a bit matrix,
+    one integer bitset per player with bit q set if the player has met player
+    q, so that checking and recording all the pairs in a group takes O(group
+    size) bitwise operations.  Repeated players within a round are detected
+    by stamping each player with the number of the round it was last seen in,
+    so nothing needs to be allocated or cleared per group or per round.
+    """
+
+    def __init__(self, num_groups, group_size, num_players=0):
+        self.num_groups = num_groups
+        self.group_size = group_size
+        self.num_rounds = 0
+        self._index = {}
+        self._capacity = 0
+        self._bits = []
+        self._met = []
+        self._seen_round = array('i')
+        self._seen_group = array('i')
+        self._grow(max(num_players, num_groups * group_size))
+
+    @property
+    def num_players(self):
+        """
+        Number of distinct players seen so far
+        """
+        return len(self._index)
+
+    def _grow(self, capacity):
+        """
+        Makes room for players with dense indices less than capacity
+        """
+        extra = capacity - self._capacity
+        if extra <= 0:
+            return
+        self._bits.extend(1 << p for p in xrange(self._capacity, capacity))
+        self._met.extend([0] * extra)
+        self._seen_round.extend([0] * extra)
+        self._seen_group.extend([0] * extra)
+        self._capacity = capacity
+
+    def check_round(self, round, find_meeting):
+        """
+        Checks the next round of the solution against the rounds already
+        checked.  find_meeting(i, j) is called if players i and j are found to
+        have already met, and must return the (group number, round number) of
+        their earlier meeting for the error message.
+        """
+        self.num_rounds += 1
+        round_num = self.num_rounds
+        if len(round) != self.num_groups:
+            raise ValidationError(
+                _('Golf solution only has %(actual)d groups in round %(round)d; expected %(expected)d.'),
+                code='wrong_number_of_groups_in_round',
+                params={
+                    'actual': len(round),
+                    'expected': self.num_groups,
+                    'round': round_num,
+                },
+            )
+        group_size = self.group_size
+        index = self._index
+        bits = self._bits
+        met = self._met
+        seen_round = self._seen_round
+        seen_group = self._seen_group
+        for group_index, group in enumerate(round):
+            group_num = group_index + 1
+            if len(group) != group_size:
+                raise ValidationError(
+                    _('Golf solution has %(actual)d players in group %(group)d of round %(round)d; expected %(expected)d.'),
+                    code='wrong_number_of_players_in_group',
+                    params={
+                        'actual': len(group),
+                        'expected': group_size,
+                        'group': group_num,
+                        'round': round_num,
+                    },
+                )
+            dense = []
+            group_mask = 0
+            for player in group:
+                p = index.get(player)
+                if p is None:
+                    p = index[player] = len(index)
+                    if p >= self._capacity:
+                        self._grow(2 * self._capacity)
+                elif seen_round[p] == round_num:
+                    raise ValidationError(
+                        _('Player %(player)s appears in groups %(group1)d and %(group2)d in round %(round)d.'),
+                        code='repeated_player_in_round',
+                        params={
+                            'player': player,
+                            'group1': seen_group[p],
+                            'group2': group_num,
+                            'round': round_num,
+                        },
+                    )
+                seen_round[p] = round_num
+                seen_group[p] = group_num
+                dense.append(p)
+                group_mask |= bits[p]
+            for p in dense:
+                if met[p] & group_mask:
+                    self._raise_repeated_pair(group, group_num, round_num, find_meeting)
+            for p in dense:
+                met[p] |= group_mask ^ bits[p]
+
+    def _raise_repeated_pair(self, group, group_num, round_num, find_meeting):
+        """
+        Raises a ValidationError for the first pair of players (in the order
+        they are listed in the group) who have already met
+        """
+        index = self._index
+        bits = self._bits
+        met = self._met
+        for j in xrange(1, len(group)):
+            for i in xrange(j):
+                if met[index[group[i]]] & bits[index[group[j]]]:
+                    old_group, old_round = find_meeting(group[i], group[j])
+                    raise ValidationError(
+                        _('Players %(i)s and %(j)s meet in group %(group)d of round %(round)d but they already met in group %(old_group)d of round %(round)d.'),
+                        code='players_meet_more_than_once',
+                        params={
+                            'i': group[i],
+                            'j': group[j],
+                            'group': group_num,
+                            'round': round_num,
+                            'old_group': old_group,
+                            'old_round': old_round,
+                        },
+                    )
+
+    def check_num_players(self, num_players):
+        """
+        Checks that no more than the given number of distinct players have been
+        seen
+        """
+        if self.num_players > num_players:
+            raise ValidationError(
+                _('Too many players in solution; found %(actual)d, expected %(expected)d.'),
+                code='too_many_players',
+                params={
+                    'actual': self.num_players,
+                    'expected': num_players,
+                },
+            )
+
+
+def _wrong_number_of_rounds(actual, expected):
+    return ValidationError(
+        _('Golf solution has %(actual)d rounds; expected %(expected)d.'),
+        code='wrong_number_of_rounds',
+        params={
+            'actual': actual,
+            'expected': expected,
+        },
+    )
+
+
+def validate_solution_array(array, num_rounds, num_groups, group_size):
+    """
+    Checks that the given solution (nested lists of rounds of groups of
+    players) is a valid solution with the given number of rounds for the
+    instance with the given number of groups and group size, raising a
+    ValidationError if not
+    """
+    if len(array) != num_rounds:
+        raise _wrong_number_of_rounds(len(array), num_rounds)
+    checker = SolutionChecker(num_groups, group_size)
+    for round_index, round in enumerate(array):
+        checker.check_round(round, lambda i, j: find_meeting(array[:round_index], i, j))
+    checker.check_num_players(num_groups * group_size)
+    return checker
+
+
+def validate_schedule(schedule, num_rounds, num_groups, group_size):
+    """
+    As for validate_solution_array(), for a Schedule, using its Meetings
+    (which are kept for later use) to check it in one go.  Only if it is
+    invalid is it checked round by round to find the problem to report.
+    """
+    meetings = schedule.meetings
+    if (
+        (schedule.num_rounds, schedule.num_groups, schedule.group_size) != (num_rounds, num_groups, group_size) or
+        meetings.has_conflicts or
+        meetings.num_players > num_groups * group_size
+    ):
+        validate_solution_array(schedule, num_rounds, num_groups, group_size)
+
+
+def validate_solution_source(source, num_rounds, num_groups, group_size):
+    """
+    As for validate_solution_array(), but parses the solution one round at a
+    time from a solution string or a file of lines (see
+    schedule.iter_rounds()), stopping at the first problem found.  Only the
+    round being checked is held in memory.
+
+    For a string the number of rounds is checked first, exactly as for
+    validate_solution_array(); for a file it is checked as the rounds are
+    read, so that problems in earlier rounds are reported first.  A file must
+    support seek() so that the earlier meeting of a repeated pair of players
+    can be found for the error message.
+    """
+    if isinstance(source, basestring):
+        actual = source.count('\n') + 1
+        if actual != num_rounds:
+            raise _wrong_number_of_rounds(actual, num_rounds)
+        lines = source
+        reread = lambda: iter_rounds(source)
+    else:
+        lines = iter(source)
+        def reread():
+            source.seek(0)
+            return iter_rounds(source)
+    checker = SolutionChecker(num_groups, group_size)
+    for round_index, round in enumerate(iter_rounds(lines)):
+        if round_index == num_rounds:
+            # Count (but don't parse) the rest of the rounds
+            actual = round_index + 1 + sum(1 for line in lines)
+            raise _wrong_number_of_rounds(actual, num_rounds)
+        checker.check_round(round, lambda i, j: find_meeting(islice(reread(), round_index), i, j))
+    if checker.num_rounds != num_rounds:
+        raise _wrong_number_of_rounds(checker.num_rounds, num_rounds)
+    checker.check_num_players(num_groups * group_size)
+    return checker
+
+
+# Maximum number of pairs of players to check at once in
+# validate_solution_arrays(), to bound its memory use
+BATCH_PAIR_LIMIT = 1 << 22
+
+
+def validate_solution_arrays(items):
+    """
+    Validates many solutions at once.  Each item is a (instance, num_rounds,
+    array) tuple, where the array is the solution as nested lists (or a
+    NumPy array) of rounds of groups of players.  Returns a list with, for
+    each item, None if the solution is valid or the ValidationError that
+    validate_solution_array() would raise for it.
+
+    If NumPy is available, solutions of the same shape are checked together
+    with vectorised operations, and only those found to be invalid are
+    re-checked one at a time to produce the error.  Otherwise every solution
+    is checked one at a time.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    if numpy is None:
+        suspects = range(len(items))
+    else:
+        suspects = []
+        batches = {}
+        for n, (instance, num_rounds, solution) in enumerate(items):
+            shape = (num_rounds, instance.num_groups, instance.group_size)
+            try:
+                solution = numpy.asarray(solution)
+            except ValueError:
+                # Ragged nested lists, with newer versions of NumPy
+                suspects.append(n)
+                continue
+            if solution.shape != shape or solution.dtype.kind not in 'iu':
+                suspects.append(n)
+            else:
+                batches.setdefault(shape, []).append((n, solution))
+        for shape, batch in batches.iteritems():
+            num_rounds, num_groups, group_size = shape
+            num_players = num_groups * group_size
+            pairs_per_solution = max(
+                num_rounds * num_groups * group_size * (group_size - 1) // 2,
+                num_players * (num_players - 1) // 2,
+            )
+            chunk_size = max(1, BATCH_PAIR_LIMIT // pairs_per_solution)
+            for start in xrange(0, len(batch), chunk_size):
+                chunk = batch[start:start + chunk_size]
+                stacked = numpy.array([item[1] for item in chunk], dtype=numpy.int64)
+                for item, ok in zip(chunk, _check_stacked_solutions(stacked)):
+                    if not ok:
+                        suspects.append(item[0])
+    for n in suspects:
+        instance, num_rounds, solution = items[n]
+        if numpy is not None and isinstance(solution, numpy.ndarray):
+            solution = solution.tolist()
+        try:
+            validate_solution_array(solution, num_rounds, instance.num_groups, instance.group_size)
+        except ValidationError as e:
+            results[n] = e
+    return results
+
+
+def _check_stacked_solutions(stacked):
+    """
+    Given a NumPy array of solutions of shape (solutions, rounds, groups,
+    group size), returns a boolean array saying which of the solutions are
+    valid
+    """
+    num_solutions, num_rounds, num_groups, group_size = stacked.shape
+    num_players = num_groups * group_size
+    rounds = numpy.sort(stacked.reshape(num_solutions, num_rounds, num_players), axis=2)
+    # No player appears twice in a round
+    ok = (numpy.diff(rounds, axis=2) != 0).all(axis=(1, 2))
+    # Every round has the same players (otherwise there are too many players)
+    ok &= (rounds == rounds[:, :1, :]).all(axis=(1, 2))
+    if not ok.any() or num_rounds == 0 or group_size < 2:
+        return ok
+    # No pair of players meets twice.  Number each solution's players 0..n-1
+    # by their position in its (sorted) first round, so that each pair has a
+    # compact key.  Offsetting each solution's player IDs into a range of its
+    # own lets all the solutions be looked up with one searchsorted().
+    low = stacked.min()
+    span = int(stacked.max()) - int(low) + 1
+    if span * num_solutions >= 1 << 62:
+        return numpy.zeros(num_solutions, dtype=bool)
+    offsets = numpy.arange(num_solutions, dtype=numpy.int64) * span
+    first_round = rounds[:, 0, :] - low + offsets[:, None]
+    players = stacked.reshape(num_solutions, -1) - low + offsets[:, None]
+    dense = numpy.searchsorted(first_round.ravel(), players.ravel()).reshape(stacked.shape)
+    dense -= (numpy.arange(num_solutions, dtype=numpy.int64) * num_players)[:, None, None, None]
+    # (Players not in the first round only occur in solutions already known
+    # to be invalid, but must not be allowed to index outside the solution.)
+    dense = numpy.minimum(dense, num_players - 1).astype(numpy.int32)
+    # Mark each pair's rank in a triangular coverage array per solution; a
+    # solution has a repeated pair iff fewer ranks are covered than it has
+    # pairs.
+    i, j = numpy.triu_indices(group_size, 1)
+    a = dense[..., i]
+    b = dense[..., j]
+    low_player = numpy.minimum(a, b)
+    high_player = numpy.maximum(a, b, out=a)
+    num_pairs = num_players * (num_players - 1) // 2
+    tri = numpy.arange(num_players, dtype=numpy.int64)
+    tri = ((tri * (tri - 1)) // 2).astype(numpy.int32)
+    ranks = tri.take(high_player)
+    ranks += low_player
+    ranks += (numpy.arange(num_solutions, dtype=numpy.int32) * num_pairs)[:, None, None, None]
+    covered = numpy.zeros(num_solutions * num_pairs, dtype=bool)
+    covered[ranks.ravel()] = True
+    ok &= covered.reshape(num_solutions, num_pairs).sum(axis=1) == ranks[0].size
+    return ok
@@ -1,17 +1,101 @@
-from django.db.models import Min, Max
-from django.shortcuts import render, get_object_or_404
+import json
 
-from golf.models import GolfInstance
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.views.decorators.http import condition
 
+from golf.caching import index_cache_timeout, index_cell_key, index_instances_key, index_stamp
+from golf.feed import bound_changes_json_chunks, parse_cursor
+from golf.middleware import request_stats
+from golf.models import GolfInstance, GolfInstanceSummary
+
+def index_stamps(request):
+    """
+    Returns the time the bounds of each instance last changed, by instance
+    ID, as recorded in the database (so that changes made by any process are
+    seen), looked up once per request
+    """
+    if not hasattr(request, '_golf_index_stamps'):
+        request._golf_index_stamps = dict(GolfInstanceSummary.objects.values_list('instance_id', 'last_modified'))
+    return request._golf_index_stamps
+
+def index_instances(request):
+    """
+    Returns the instances in the grid on the index page, in order, from the
+    cache if possible
+    """
+    key = index_instances_key(index_stamps(request).keys())
+    instances = cache.get(key)
+    if instances is None:
+        instances = list(GolfInstance.objects.order_by('num_groups', 'group_size'))
+        cache.set(key, instances, index_cache_timeout())
+    return instances
+
+def index_freshness(request):
+    """
+    Returns the number of instances and the latest time the bounds of any of
+    them changed
+    """
+    stamps = index_stamps(request)
+    return len(stamps), max(stamps.values()) if stamps else None
+
+def index_etag(request):
+    num_instances, last_modified = index_freshness(request)
+    return '%d-%s' % (num_instances, last_modified.isoformat() if last_modified else '')
+
+def index_last_modified(request):
+    return index_freshness(request)[1]
+
+def detail_last_modified(request, num_groups, group_size):
+    # Looked up once for both the ETag and the Last-Modified header
+    if not hasattr(request, '_golf_last_modified'):
+        request._golf_last_modified = GolfInstanceSummary.objects.filter(
+            instance__num_groups=num_groups, instance__group_size=group_size,
+        ).values_list('last_modified', flat=True).first()
+    return request._golf_last_modified
+
+def detail_etag(request, num_groups, group_size):
+    last_modified = detail_last_modified(request, num_groups, group_size)
+    return last_modified.isoformat() if last_modified else None
+
+# Conditional requests are answered (with 304 Not Modified if nothing has
+# changed) before resolving any bounds or rendering anything.  The ETags
+# include the full modification time, which the Last-Modified header only
+# gives to the second; the index's also includes the number of instances,
+# which changes when one is deleted.
+
+@condition(etag_func=index_etag, last_modified_func=index_last_modified)
 def index(request):
     """
     Display table of all golf instances
     """
-    instances = GolfInstance.objects.order_by('num_groups', 'group_size')
-    bounds = instances.aggregate(Min('group_size'), Max('group_size'), Min('num_groups'), Max('num_groups'))
-    num_groups_range = range(bounds['num_groups__min'], bounds['num_groups__max'] + 1)
-    group_size_range = range(bounds['group_size__min'], bounds['group_size__max'] + 1)
+    # The list of instances and the rendered cell for each instance are
+    # cached (under keys stamped with when they last changed), so only the
+    # cells which aren't cached need the instances' bounds; these come from
+    # the denormalised summaries, fetched in a single query.
+    stamps = index_stamps(request)
+    instances = index_instances(request)
+    for instance in instances:
+        instance.index_stamp = index_stamp(stamps.get(instance.id))
+    cell_keys = dict((index_cell_key(instance.id, instance.index_stamp), instance) for instance in instances)
+    cached_cells = cache.get_many(cell_keys.keys())
+    uncached = dict((instance.id, instance) for key, instance in cell_keys.iteritems() if key not in cached_cells)
+    if uncached:
+        summaries = GolfInstanceSummary.objects.all()
+        if len(uncached) < len(instances):
+            summaries = summaries.filter(instance_id__in=uncached.keys())
+        for summary in summaries:
+            if summary.instance_id in uncached:
+                uncached[summary.instance_id].summary = summary
     idx = 0
+    if instances:
+        num_groups_range = range(instances[0].num_groups, instances[-1].num_groups + 1)
+        group_size_range = range(min(instance.group_size for instance in instances), max(instance.group_size for instance in instances) + 1)
+    else:
+        num_groups_range = group_size_range = []
     array = [[None] + group_size_range]
     for num_groups in num_groups_range:
         row = [num_groups]
@@ -25,16 +109,94 @@ def index(request):
     # There shouldn't be any instances left over, but we put them into the
     # context anyway so that in the tests we can check that there really aren't
     # any.
-    context = {'instance_array': array, 'left_over_instances': instances[idx:]}
-    return render(request, 'golf/index.html', context)
+    context = {
+        'instance_array': array,
+        'left_over_instances': instances[idx:],
+        'cache_timeout': index_cache_timeout(),
+    }
+    return TemplateResponse(request, 'golf/index.html', context)
 
+@condition(etag_func=detail_etag, last_modified_func=detail_last_modified)
 def detail(request, num_groups, group_size):
     """
     Display details of the given golf instance
     """
-    instance = get_object_or_404(GolfInstance, num_groups=num_groups, group_size=group_size)
+    instance = get_object_or_404(GolfInstance.objects.with_bounds(), num_groups=num_groups, group_size=group_size)
     context = {
         'instance': instance,
     }
-    return render(request, 'golf/detail.html', context)
+    return TemplateResponse(request, 'golf/detail.html', context)
 
+
+# Fields of the instances in the JSON bounds table, and the summary fields
+# they come from
+BOUNDS_JSON_FIELDS = (
+    ('num_groups', 'instance__num_groups'),
+    ('group_size', 'instance__group_size'),
+    ('lower_bound', 'lower_bound_rounds'),
+    ('upper_bound', 'upper_bound_rounds'),
+    ('has_solution', 'has_solution'),
+    ('is_closed', 'is_closed'),
+    ('lower_bound_citation', 'lower_bound__submission_info__citation'),
+    ('upper_bound_citation', 'upper_bound__submission_info__citation'),
+)
+
+def bounds_json_chunks():
+    """
+    Generates the JSON bounds table a piece at a time, reading the instances
+    from the database as it goes
+    """
+    summaries = GolfInstanceSummary.objects.order_by('instance__num_groups', 'instance__group_size').values_list(
+        *[summary_field for field, summary_field in BOUNDS_JSON_FIELDS]
+    )
+    yield '{"instances": ['
+    separator = '\n'
+    for values in summaries.iterator():
+        yield separator + json.dumps(dict(zip([field for field, summary_field in BOUNDS_JSON_FIELDS], values)), sort_keys=True)
+        separator = ',\n'
+    yield '\n]}\n'
+
+@condition(etag_func=index_etag, last_modified_func=index_last_modified)
+def bounds_json(request):
+    """
+    Stream the best known bounds of all golf instances as JSON
+    """
+    return StreamingHttpResponse(bounds_json_chunks(), content_type='application/json')
+
+
+def bound_changes_json(request):
+    """
+    Stream the changes to the bounds since the cursor given by the "since"
+    parameter (or all of them) as JSON; see golf.feed
+    """
+    since = request.GET.get('since')
+    if since:
+        try:
+            since = parse_cursor(since)
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+    else:
+        since = None
+    return StreamingHttpResponse(bound_changes_json_chunks(since), content_type='application/json')
+
+
+@staff_member_required
+def request_stats_view(request):
+    """
+    Display statistics about recent requests (see RequestStatsMiddleware)
+    """
+    if request.method == 'POST' and request.POST.get('clear'):
+        request_stats.clear()
+    # Show the times in milliseconds
+    summary = [
+        (view, count, [
+            (metric, p50, p95, max_value) if metric == 'queries' else (metric, p50 * 1000, p95 * 1000, max_value * 1000)
+            for metric, p50, p95, max_value in metric_summaries
+        ])
+        for view, count, metric_summaries in request_stats.summary()
+    ]
+    context = {
+        'metrics': request_stats.METRICS,
+        'summary': summary,
+    }
+    return TemplateResponse(request, 'golf/request_stats.html', context)